@@ -1,6 +1,18 @@
+from fnmatch import fnmatchcase
+from pathlib import Path
+import archive_formats
+from cancellation import InstallCancelled
 from state_manager import state_manager
 from widgets.version_selector_dialog import VersionSelectorDialog
 from shim_manager import shim_manager
+from cold_storage_manager import cold_storage_manager
+from delta_manager import delta_manager
+from disk_usage_manager import disk_usage_manager, format_size
+from download_manager import download_manager
+from lock_manager import lock_manager
+from trash_manager import trash_manager
+from usage_manager import usage_manager
+from versions import resolve_version, version_name
 from state_manager import APPS_DIR, TEMP_PATH
 
 
@@ -14,6 +26,15 @@ class NonManagedApp:
 
 
 class ManagedApp:
+    # Version parts that must match for a release to count as an update of an
+    # installed version: 2 offers 20.11.1 for 20.11.0. None disables updates.
+    update_line_depth = 2
+    # Optional parts of the release archive: {component: [fnmatch patterns on
+    # member names]}. Members matching no pattern are always installed.
+    components = {}
+    # Named component selections, e.g. {"minimal": []}; "full" is everything
+    component_profiles = {}
+
     def __init__(self, app_name: str):
         self.app_name = app_name
         self._load_state()
@@ -27,34 +48,203 @@ class ManagedApp:
             self.app_name
         )
 
+    def _refresh_state(self):
+        """Reload the app state, picking up changes made by other processes"""
+        state_manager.reload_app_state(self.app_name)
+        self._load_state()
+
     def _save_state(
         self, installed: bool, version: str = None, install_path: str = None
     ):
         """Save the app state to storage"""
-        state_manager.set_app_installed(self.app_name, installed, version, install_path)
-        self.is_installed = installed
-        if version:
-            self.version = version
+        with lock_manager.app_lock(self.app_name):
+            state_manager.reload_app_state(self.app_name)
+            state_manager.set_app_installed(
+                self.app_name, installed, version, install_path
+            )
+            self.is_installed = installed
+            if version:
+                self.version = version
 
     def _add_installed_version(self, version: str, install_path: str):
         """Add a version to the list of installed versions"""
-        state_manager.add_app_version(self.app_name, version, install_path)
-        self._load_state()
+        with lock_manager.app_lock(self.app_name):
+            state_manager.reload_app_state(self.app_name)
+            state_manager.add_app_version(self.app_name, version, install_path)
+            self._load_state()
 
     def _remove_installed_version(self, version: str):
         """Remove a version from the list of installed versions"""
-        state_manager.remove_app_version(self.app_name, version)
-        self._load_state()
+        with lock_manager.app_lock(self.app_name):
+            cold_storage_manager.discard(self.app_name, version)
+            state_manager.reload_app_state(self.app_name)
+            state_manager.remove_app_version(self.app_name, version)
+            disk_usage_manager.remove(self.app_name, version)
+            usage_manager.forget(self.app_name, version)
+            self._load_state()
 
     def _set_active_version(self, version: str):
         """Set the active version and update shims"""
-        if version not in self.installed_versions:
-            raise ValueError(f"Version {version} is not installed")
+        with lock_manager.app_lock(self.app_name):
+            self._refresh_state()
+            if version not in self.installed_versions:
+                raise ValueError(f"Version {version} is not installed")
+            if not cold_storage_manager.thaw(self.app_name, version):
+                raise ValueError(
+                    f"Version {version} could not be restored from cold storage"
+                )
+
+            state_manager.set_app_active_version(self.app_name, version)
+            self.active_version = version
+
+            self._update_shims_for_version(version)
+
+    def get_component_profile(self) -> str:
+        """The component profile new installs use ("full" unless set)"""
+        profiles = state_manager.get_preference("component_profiles", {})
+        return profiles.get(self.app_name, "full")
+
+    def set_component_profile(self, profile: str):
+        if profile != "full" and profile not in self.component_profiles:
+            raise ValueError(
+                f"Unknown component profile for {self.app_name}: {profile}"
+            )
+        profiles = dict(state_manager.get_preference("component_profiles", {}))
+        profiles[self.app_name] = profile
+        state_manager.set_preference("component_profiles", profiles)
+
+    def _profile_components(self):
+        """Components the current profile installs, or None for all of them"""
+        profile = self.get_component_profile()
+        if profile not in self.component_profiles:
+            return None
+        return list(self.component_profiles[profile])
+
+    def get_installed_components(self, version: str):
+        """Optional components present in an installed version"""
+        components = state_manager.get_app_version_components(self.app_name, version)
+        return list(self.components) if components is None else components
+
+    def _member_component(self, name: str):
+        """The optional component a zip member belongs to, or None for core files"""
+        for component, patterns in self.components.items():
+            if any(fnmatchcase(name, pattern) for pattern in patterns):
+                return component
+        return None
+
+    def _component_selector(self, components):
+        """A zip member filter for core files plus the given components"""
+        if components is None:
+            return None
+        wanted = set(components)
 
-        state_manager.set_app_active_version(self.app_name, version)
-        self.active_version = version
+        def select(info):
+            component = self._member_component(info.filename)
+            return component is None or component in wanted
 
-        self._update_shims_for_version(version)
+        return select
+
+    def _archive_url(self, version: str):
+        """Where the release archive of a version lives. Override in subclasses;
+        needed to add components to an installed version."""
+        return None
+
+    def _archive_urls(self, version: str):
+        """Every URL of a version's release archive, the preferred one first"""
+        url = self._archive_url(version)
+        return [url] if url else []
+
+    def _install_archive(
+        self,
+        url,
+        archive_path,
+        install_path,
+        components=None,
+        sha256=None,
+        mirrors=(),
+    ):
+        """Download and extract a release archive, limited to some components.
+
+        A slim install reads the remote central directory of a zip and
+        fetches only the selected members with Range requests, each checked
+        against its CRC-32 in the central directory; otherwise,
+        or if the server cannot do that, the whole archive (any format
+        archive_formats supports) is downloaded and filtered while
+        extracting. mirrors are other URLs of the same archive to fail over
+        to. Returns the extracted members. On failure or cancellation
+        nothing is left in install_path.
+        """
+        select = self._component_selector(components)
+        try:
+            if select is not None and archive_formats.format_of(url) == "zip":
+                try:
+                    members, stats = download_manager.extract_remote_zip(
+                        url, install_path, select, mirrors
+                    )
+                    print(
+                        f"Slim install ({self.get_component_profile()}): downloaded "
+                        f"{format_size(stats['downloaded_bytes'])} of "
+                        f"{format_size(stats['archive_bytes'])}"
+                    )
+                    return members
+                except InstallCancelled:
+                    raise
+                except Exception as e:
+                    print(
+                        f"Warning: Slim install not possible, downloading everything: {e}"
+                    )
+
+            download_manager.download(url, archive_path, sha256, mirrors=mirrors)
+            try:
+                return archive_formats.extract(archive_path, install_path, select)
+            finally:
+                Path(archive_path).unlink(missing_ok=True)
+        except BaseException:
+            if Path(install_path).exists():
+                trash_manager.discard_quietly(install_path)
+            raise
+
+    def add_components(self, version: str, components):
+        """Fetch more optional components into an installed version"""
+        # Keeps an uninstall or reinstall of the version from running meanwhile
+        with lock_manager.version_lock(self.app_name, version):
+            self._refresh_state()
+            if version not in self.installed_versions:
+                raise ValueError(f"{self.app_name} {version} is not installed")
+            installed = self.get_installed_components(version)
+            missing = [name for name in components if name not in installed]
+            if not missing:
+                return
+            unknown = [name for name in missing if name not in self.components]
+            if unknown:
+                raise ValueError(f"Unknown components for {self.app_name}: {unknown}")
+            urls = self._archive_urls(version)
+            if not urls:
+                raise ValueError(
+                    f"{self.app_name} cannot add components; reinstall {version} instead"
+                )
+
+            url, *mirrors = urls
+            install_path = Path(self.installed_versions[version])
+            wanted = set(missing)
+            members, stats = download_manager.extract_remote_zip(
+                url,
+                install_path,
+                lambda info: self._member_component(info.filename) in wanted,
+                mirrors,
+            )
+            delta_manager.record_manifest(self.app_name, version, members, extend=True)
+            disk_usage_manager.record_directory(self.app_name, version, install_path)
+            present = set(installed) | wanted
+            state_manager.set_app_version_components(
+                self.app_name,
+                version,
+                None if present >= set(self.components) else present,
+            )
+        print(
+            f"Added {', '.join(missing)} to {self.app_name} {version} "
+            f"({format_size(stats['downloaded_bytes'])} downloaded)"
+        )
 
     def get_available_versions(self):
         """Get list of available versions for this app. Override in subclasses.
@@ -62,6 +252,19 @@ class ManagedApp:
         """
         raise NotImplementedError("get_available_versions method must be implemented.")
 
+    def resolve_version(self, spec: str, installed_only: bool = False):
+        """Resolve a pin or range ('20.x', '^3.12', 'latest') to a version name.
+
+        Resolves against installed versions when installed_only is set,
+        otherwise against get_available_versions(). Returns None if nothing matches.
+        """
+        if installed_only:
+            candidates = self.list_installed_versions()
+        else:
+            candidates = self.get_available_versions()
+        match = resolve_version(spec, candidates)
+        return version_name(match) if match is not None else None
+
     def install(self, version: str = None):
         """Install the app with optional version specification"""
         raise NotImplementedError("Install method must be implemented.")
@@ -79,7 +282,10 @@ class ManagedApp:
             list(self.installed_versions.keys()) if self.installed_versions else []
         )
         if version not in installed_version_keys:
-            raise ValueError(f"Version {version} is not installed")
+            resolved = self.resolve_version(version, installed_only=True)
+            if resolved is None:
+                raise ValueError(f"Version {version} is not installed")
+            version = resolved
 
         self._set_active_version(version)
         print(f"Switched {self.app_name} to version {version}")
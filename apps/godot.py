@@ -1,64 +1,82 @@
 from state_manager import state_manager
 from widgets.version_selector_dialog import VersionSelectorDialog
 from shim_manager import shim_manager
+from staging_manager import staging_manager
+from trash_manager import trash_manager
+from disk_usage_manager import disk_usage_manager
+from download_manager import download_manager
+from lock_manager import lock_manager
+from cancellation import current_token
+from catalog_cache import catalog_cache
+from json_stream import iter_items
+from trace_manager import trace_manager
 import httpx
 from state_manager import APPS_DIR, TEMP_PATH
 import zipfile
-import shutil
 import re
 from pathlib import Path
 
 
 import os
 from apps.Apps import ManagedApp
+from versions import sort_versions
 from shortcut_manager import shortcut_manager
 
+RELEASES_URL = "https://api.github.com/repos/godotengine/godot/releases"
+
 
 class Godot(ManagedApp):
     path = APPS_DIR / "godot"
+    components = {"console": ["*_console.exe"]}
+    component_profiles = {"minimal": []}
 
     def __init__(self):
         super().__init__("godot")
 
     def get_available_versions(self):
-        response = httpx.get(
-            "https://api.github.com/repos/godotengine/godot/releases",
-            follow_redirects=True,
-        )
-
-        if response.status_code == 200:
-            releases = response.json()
-
-            sorted_releases = sorted(
-                releases, key=lambda r: r["tag_name"], reverse=True
+        # Release notes and asset lists are skipped while streaming
+        try:
+            tags = catalog_cache.fetch(
+                RELEASES_URL,
+                lambda response: [
+                    release["tag_name"]
+                    for release in iter_items(
+                        response.iter_text(), "$[*]", keep={"tag_name"}
+                    )
+                    if "tag_name" in release
+                ],
+                max_age=10 * 60,
             )
-            return [release["tag_name"] for release in sorted_releases]
+        except (httpx.HTTPError, ValueError) as e:
+            print(f"Failed to fetch Godot versions: {e}")
+            return []
 
-        return []
+        return sort_versions(tags)
 
     def uninstall(self, version: str = None):
         if version is None:
             print("Uninstalling all Godot versions...")
-            shortcut_manager.remove_shortcut("Godot")
-            for installed_version in list(self.installed_versions.keys()):
-                version_path = self.path
-                if os.path.exists(version_path):
-                    shutil.rmtree(version_path, ignore_errors=True)
-                self._remove_installed_version(installed_version)
-            state_manager.remove_app_completely(self.app_name)
-            self._load_state()
+            with lock_manager.app_lock(self.app_name):
+                self._refresh_state()
+                shortcut_manager.remove_shortcut("Godot")
+                for installed_version in list(self.installed_versions.keys()):
+                    self._uninstall_version(installed_version)
+                    self._remove_installed_version(installed_version)
+                state_manager.remove_app_completely(self.app_name)
+                self._load_state()
             print("All Godot versions uninstalled successfully")
-        else:
+            return
+
+        with lock_manager.version_lock(self.app_name, version):
+            self._refresh_state()
             if version not in self.installed_versions:
                 print(f"Godot {version} is not installed.")
                 return
             print(f"Uninstalling Godot {version}...")
-            version_path = self.path
-            if os.path.exists(version_path):
-                shutil.rmtree(version_path, ignore_errors=True)
+            is_active_version = self.active_version == version
+            self._uninstall_version(version)
             self._remove_installed_version(version)
             shortcut_manager.remove_shortcut("Godot")
-            is_active_version = self.active_version == version
             if is_active_version:
                 remaining_versions = list(self.installed_versions.keys())
                 if remaining_versions:
@@ -70,6 +88,14 @@ class Godot(ManagedApp):
                     self._load_state()
             print(f"Godot {version} uninstalled successfully")
 
+    def _uninstall_version(self, version: str):
+        """Remove a specific version's files"""
+        version_path = Path(self.installed_versions.get(version, self.path / version))
+        try:
+            trash_manager.discard(version_path)
+        except OSError as e:
+            print(f"Warning: Could not remove Godot {version} files: {e}")
+
     def install(self, version: str = None):
         import os
 
@@ -83,15 +109,21 @@ class Godot(ManagedApp):
             version = available[0]
 
         print(f"Installing Godot version: {version}")
-        response = httpx.get(
-            f"https://api.github.com/repos/godotengine/godot/releases/tags/{version}",
-            follow_redirects=True,
-        )
-        if response.status_code != 200:
-            print(f"Failed to fetch release info for {version}: {response.status_code}")
-            return
-        release = response.json()
-        assets = release.get("assets", [])
+        with httpx.stream(
+            "GET", f"{RELEASES_URL}/tags/{version}", follow_redirects=True
+        ) as response:
+            if response.status_code != 200:
+                print(
+                    f"Failed to fetch release info for {version}: {response.status_code}"
+                )
+                return
+            assets = list(
+                iter_items(
+                    response.iter_text(),
+                    "$.assets[*]",
+                    keep={"name", "browser_download_url"},
+                )
+            )
 
         version_clean = version.replace("-stable", "")
 
@@ -112,58 +144,71 @@ class Godot(ManagedApp):
         self.download_and_extract(asset_url, asset_name, version)
 
     def download_and_extract(self, url: str, asset_name: str, version: str):
-        headers = {"Accept": "application/octet-stream"}
+        # A second install of the same version waits here and then finds it installed
+        with lock_manager.version_lock(self.app_name, version):
+            self._refresh_state()
+            if version in self.installed_versions:
+                print(f"Godot {version} is already installed.")
+                return
+            self._download_and_extract(url, asset_name, version)
+
+    def _download_and_extract(self, url: str, asset_name: str, version: str):
         print(url)
-        response = httpx.get(url, headers=headers, follow_redirects=True)
-        if response.status_code != 200:
-            print(f"Failed to download asset: {response.status_code}")
-            return
         zip_path = TEMP_PATH / asset_name
-        with open(zip_path, "wb") as f:
-            f.write(response.content)
-
-        os.makedirs(self.path / version, exist_ok=True)
-
-        try:
-            with zipfile.ZipFile(zip_path, "r") as zip_ref:
-                zip_ref.extractall(self.path / version)
-
-            print(f"Extracted Godot to {self.path / version}")
-
-            godot_exe = None
+        install_path = self.path / version
+
+        components = self._profile_components()
+        with trace_manager.trace("install", app=self.app_name, version=version):
+            try:
+                with staging_manager.stage(
+                    self.app_name, version, install_path
+                ) as staging:
+                    members = self._install_archive(url, zip_path, staging, components)
+
+                    godot_exe = None
+                    for file in os.listdir(staging):
+                        if file.lower().startswith("godot") and file.lower().endswith(
+                            ".exe"
+                        ):
+                            godot_exe = file
+                            break
+                    if not godot_exe:
+                        raise FileNotFoundError(
+                            "Godot executable not found after extraction"
+                        )
+                    current_token().check()
+            except Exception as e:
+                print(f"Failed to install Godot {version}: {e}")
+                return
 
-            for file in os.listdir(self.path / version):
-                if file.lower().startswith("godot") and file.lower().endswith(".exe"):
-                    godot_exe = file
-                    break
-            if godot_exe:
-                version_str = version
+            print(f"Extracted Godot to {install_path}")
 
-                self._add_installed_version(version_str, str(self.path / version))
+            with trace_manager.span("state_commit"):
+                disk_usage_manager.record_members(self.app_name, version, members)
+                state_manager.set_app_version_components(
+                    self.app_name, version, components
+                )
+                self._add_installed_version(version, str(install_path))
 
                 if not self.active_version:
-                    self._set_active_version(version_str)
+                    self._set_active_version(version)
                     self._save_state(
                         installed=True,
-                        version=version_str,
-                        install_path=str(self.path / version),
+                        version=version,
+                        install_path=str(install_path),
                     )
 
+            with trace_manager.span("shortcuts"):
                 shortcut_manager.create_shortcut(
                     app_name="godot",
                     executable_name=godot_exe,
                     shortcut_name="Godot",
                     executable_subpath="",
                     description="Godot Engine",
-                    icon_path=str(self.path / version / godot_exe),
-                    working_directory=str(self.path / version),
+                    icon_path=str(install_path / godot_exe),
+                    working_directory=str(install_path),
                     arguments="",
                 )
-            else:
-                print("Godot executable not found after extraction.")
-        except Exception as e:
-            print(f"Failed to extract zip: {e}")
-        zip_path.unlink()
 
     def _get_shortcut_configs(self):
         """Get shortcut configurations for Godot"""
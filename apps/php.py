@@ -1,90 +1,165 @@
 from apps.Apps import ManagedApp
-from state_manager import APPS_DIR, TEMP_PATH
+from versions import sort_versions
+from state_manager import APPS_DIR, TEMP_PATH, state_manager
 from shim_manager import shim_manager
+from staging_manager import staging_manager
+from trash_manager import trash_manager
+from disk_usage_manager import disk_usage_manager
+from cancellation import current_token
+from catalog_cache import catalog_cache
+from download_manager import download_manager
+from lock_manager import lock_manager
+from trace_manager import trace_manager
 import httpx
 import re
 from pathlib import Path
+from typing import Dict, Iterable, Iterator
+from urllib.parse import urljoin
 import zipfile
-import shutil
+
+RELEASES_URL = "https://windows.php.net/downloads/releases/"
+ARCHIVES_URL = "https://windows.php.net/downloads/releases/archives/"
+
+LINK_PATTERN = re.compile(r'<A HREF="([^"]+)">([^<]+)</A>', re.IGNORECASE)
+# php-<version>[-nts]-Win32-<vc|vs><n>-<arch>.zip; dev/debug/test packs don't match
+BUILD_PATTERN = re.compile(
+    r"^php-(\d+\.\d+\.\d+(?:(?:alpha|beta|RC)\d+)?)-(nts-)?Win32-(v[cs]\d+)-(x64|x86)\.zip$",
+    re.IGNORECASE,
+)
+# Longest link we need to be able to complete across two chunks
+MAX_LINK_LENGTH = 1024
 
 
 class Php(ManagedApp):
     path = APPS_DIR / "php"
+    # Builds of one version differ by compiler, so updates are picked by hand
+    update_line_depth = None
+    components = {
+        "extras": ["extras/*"],
+        "dev": ["dev/*"],
+    }
+    component_profiles = {"minimal": []}
 
     def __init__(self):
         super().__init__("php")
 
-    def parse_versions(self, sb):
-        regex = r'<A HREF="([a-zA-Z0-9./-]+)">([a-zA-Z0-9./-]+)</A>'
-        matches = re.findall(regex, sb)
-        versions = []
-
-        for url, name in matches:
-            name: str = name
-
-            if name and name.startswith("php-devel-pack-"):
-                continue
-            if name and name.startswith("php-debug-pack-"):
-                continue
-            if name and name.startswith("php-test-pack-"):
-                continue
-            if name and "src" in name:
-                continue
-            if name and not name.endswith(".zip"):
-                continue
-            if name and not ("nts" in name or "NTS" in name):
-                continue
-            if name and not "x64" in name:
-                continue
-
-            version_name = name.split("-")[1]
-
-            versions.append({"real_name": name, "display_name": version_name})
-
-        return versions[::-1]
+    @staticmethod
+    def parse_listing(chunks: Iterable[str], base_url: str) -> Iterator[Dict]:
+        """Yield NTS x64 builds from a windows.php.net directory listing.
+
+        Works on text chunks as they arrive, so the page is never held in full.
+        """
+        buffer = ""
+        for chunk in chunks:
+            buffer += chunk
+            last_end = 0
+            for match in LINK_PATTERN.finditer(buffer):
+                last_end = match.end()
+                href, name = match.groups()
+                build = BUILD_PATTERN.match(name.strip())
+                if not build:
+                    continue
+                version, nts, vc, arch = build.groups()
+                if not nts or arch.lower() != "x64":
+                    continue
+                yield {
+                    "real_name": name.strip(),
+                    "display_name": version,
+                    "version": version,
+                    "thread_safe": False,
+                    "vc": vc.lower(),
+                    "url": urljoin(base_url, href),
+                }
+            # Keep only an unfinished link at the end of the buffer
+            buffer = buffer[max(last_end, len(buffer) - MAX_LINK_LENGTH) :]
 
     def get_available_versions(self):
-        resp = httpx.get("https://windows.php.net/downloads/releases/archives/")
-
-        versions = self.parse_versions(resp.text)
-
-        return versions
+        """Get current and archived PHP builds, newest first"""
+        builds = {}
+        # Current releases first, so they win over the same build in archives
+        for base_url in (RELEASES_URL, ARCHIVES_URL):
+            try:
+                listing = catalog_cache.fetch(
+                    base_url,
+                    lambda response, base_url=base_url: list(
+                        self.parse_listing(response.iter_text(), base_url)
+                    ),
+                )
+            except httpx.HTTPError as e:
+                print(f"Failed to fetch PHP listing {base_url}: {e}")
+                continue
+            for build in listing:
+                key = (build["version"], build["thread_safe"], build["vc"])
+                builds.setdefault(key, build)
+
+        builds_per_version = {}
+        for version, _, _ in builds.keys():
+            builds_per_version[version] = builds_per_version.get(version, 0) + 1
+        for build in builds.values():
+            if builds_per_version[build["version"]] > 1:
+                build["display_name"] = f"{build['version']} ({build['vc']})"
+
+        return sort_versions(builds.values())
+
+    def _download_url(self, name: str) -> str:
+        """Find where a build lives, preferring the cached listings"""
+        for base_url in (RELEASES_URL, ARCHIVES_URL):
+            for build in catalog_cache.get_cached(base_url) or []:
+                if build["real_name"] == name:
+                    return build["url"]
+        return urljoin(ARCHIVES_URL, name)
+
+    def _archive_url(self, version: str):
+        # One version has a build per compiler; only the installed one will do
+        name = state_manager.get_app_version_build(self.app_name, version)
+        return self._download_url(name) if name else None
 
     def install(self, url: str):
+        # A second install of the same version waits here and then finds it installed
         version = url.split("-")[1]
+        with lock_manager.version_lock(self.app_name, version):
+            self._refresh_state()
+            if version in self.installed_versions:
+                print(f"PHP {version} is already installed.")
+                return
+            self._install_url(url, version)
+
+    def _install_url(self, url: str, version: str):
         print(url)
 
         install_path = self.path / version
-
-        install_path.mkdir(parents=True, exist_ok=True)
-        print("b")
-
-        with httpx.stream(
-            "GET", f"https://windows.php.net/downloads/releases/archives/{url}"
-        ) as response:
-            if response.status_code == 200:
-                with open(install_path / f"php_{version}.zip", "wb") as f:
-                    for chunk in response.iter_bytes():
-                        f.write(chunk)
-            else:
-                print(f"Failed to download PHP {version}: {response.status_code}")
+        archive_path = TEMP_PATH / f"php_{version}.zip"
+
+        components = self._profile_components()
+        with trace_manager.trace("install", app=self.app_name, version=version):
+            try:
+                with staging_manager.stage(
+                    self.app_name, version, install_path
+                ) as staging:
+                    members = self._install_archive(
+                        self._download_url(url), archive_path, staging, components
+                    )
+                    current_token().check()
+            except Exception as e:
+                print(f"Failed to install PHP {version}: {e}")
                 return
 
-        with zipfile.ZipFile(install_path / f"php_{version}.zip", "r") as zip_ref:
-            zip_ref.extractall(install_path)
+            with trace_manager.span("state_commit"):
+                disk_usage_manager.record_members(self.app_name, version, members)
+                state_manager.set_app_version_components(
+                    self.app_name, version, components
+                )
+                state_manager.set_app_version_build(self.app_name, version, url)
+                self._add_installed_version(version, str(install_path))
 
-        (install_path / f"php_{version}.zip").unlink(True)
+                if not self.active_version:
+                    self._set_active_version(version)
+                    self._save_state(
+                        installed=True, version=version, install_path=str(install_path)
+                    )
 
-        self._add_installed_version(version, str(install_path))
-
-        if not self.active_version:
-            self._set_active_version(version)
-            self._save_state(
-                installed=True, version=version, install_path=str(install_path)
-            )
-
-        if self.active_version == version:
-            self._create_shims(version)
+            if self.active_version == version:
+                self._create_shims(version)
 
     def _create_shims(self, version: str):
         """Create PowerShell shims for PHP executables"""
@@ -117,16 +192,18 @@ class Php(ManagedApp):
         """Uninstall PHP or specific version"""
         if version is None:
             print("Uninstalling all PHP versions...")
-            self._remove_shims()
-            for installed_version in list(self.installed_versions.keys()):
-                self._uninstall_version(installed_version)
-            from state_manager import state_manager
-
-            state_manager.remove_app_completely(self.app_name)
-
-            self._load_state()
+            with lock_manager.app_lock(self.app_name):
+                self._refresh_state()
+                self._remove_shims()
+                for installed_version in list(self.installed_versions.keys()):
+                    self._uninstall_version(installed_version)
+                state_manager.remove_app_completely(self.app_name)
+                self._load_state()
             print("All PHP versions uninstalled successfully")
-        else:
+            return
+
+        with lock_manager.version_lock(self.app_name, version):
+            self._refresh_state()
             if version not in self.installed_versions:
                 print(f"PHP {version} is not installed.")
                 return
@@ -143,8 +220,6 @@ class Php(ManagedApp):
                     print(f"Set {new_active} as the new active version")
                 else:
                     self._remove_shims()
-                    from state_manager import state_manager
-
                     state_manager.remove_app_completely(self.app_name)
                     self._load_state()
 
@@ -153,5 +228,7 @@ class Php(ManagedApp):
     def _uninstall_version(self, version: str):
         """Remove a specific version's files"""
         version_path = self.path / version
-        if version_path.exists():
-            shutil.rmtree(version_path, ignore_errors=True)
+        try:
+            trash_manager.discard(version_path)
+        except OSError as e:
+            print(f"Warning: Could not remove PHP {version} files: {e}")
@@ -0,0 +1,552 @@
+import json
+import re
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import httpx
+
+import archive_formats
+from apps.Apps import ManagedApp
+from cancellation import InstallCancelled, current_token
+from catalog_cache import catalog_cache
+from delta_manager import delta_manager
+from disk_usage_manager import disk_usage_manager, format_size
+from download_manager import download_manager
+from json_stream import iter_items, parse_path
+from lock_manager import lock_manager
+from mirror_manager import mirror_manager
+from shim_manager import shim_manager
+from staging_manager import staging_manager
+from state_manager import state_manager, APPS_DIR, CACHE_DIR, TEMP_PATH
+from trace_manager import trace_manager
+from trash_manager import trash_manager
+from versions import CatalogEntry, parse_version, sort_versions
+from widgets.version_selector_dialog import VersionSelectorDialog
+
+# Verified archives downloaded ahead of an upgrade
+PREFETCH_DIR = CACHE_DIR / "prefetch"
+
+
+def select_json(data: Any, path: str) -> List[Tuple[Any, Any]]:
+    """Evaluate a small JSONPath subset ($, .key, [*], [n]).
+
+    Returns (owner, value) pairs, where owner is the object the value was
+    read from, so filters and flags can look at sibling keys.
+    """
+    nodes = [(None, data)]
+    for key, index in parse_path(path):
+        selected = []
+        for owner, node in nodes:
+            if key:
+                if isinstance(node, dict) and key in node:
+                    selected.append((node, node[key]))
+            elif isinstance(node, list):
+                items = node if index == "*" else node[int(index) : int(index) + 1]
+                selected.extend((item, item) for item in items)
+        nodes = selected
+    return nodes
+
+
+class ProviderApp(ManagedApp):
+    """A managed app defined by a declarative spec instead of code.
+
+    Subclasses only set class attributes; catalog caching, parallel
+    download, checksum verification, parallel extraction, version state and
+    shims come from here. Templates are formatted with {version}.
+
+        app_name         key in apps.json, also the APPS_DIR folder name
+        display_name     name shown in the UI
+        catalog_url      where the list of versions lives
+        catalog_format   "json" (default) or "text"
+        version_path     JSONPath to version strings, e.g. "$[*].tag_name"
+        version_pattern  regex; group 1 (or the whole match) is the version.
+                         For text catalogs it is searched across the body.
+        catalog_filter   {key: value} the object owning a version must match
+        version_flags    {flag: key} copied as booleans onto each entry;
+                         flags are "lts" and "stable"
+        date_key         optional key of the release date
+        catalog_fields   other keys of the owning object find_asset or
+                         describe_version read; JSON catalogs are streamed
+                         and only the version, filter, flag and these keys
+                         are kept
+        flag_labels      {flag: label} appended to the display name if set
+        label_latest     mark the newest version "(Latest)"
+        asset_url        template of the archive to download (zip)
+        asset_formats    other formats asset_url is published in under the
+                         same name (e.g. ["7z"]); whole-archive downloads
+                         take the smallest one archive_formats supports,
+                         slim and delta installs keep reading the zip
+        mirrors          optional base URLs serving the same files, the first
+                         being the start of asset_url; archives come from
+                         the fastest (see mirror_manager) and fail over to
+                         the others, catalogs and checksums from the origin
+        checksum_url     optional template of a sha256 or SHASUMS file
+        install_dir      template of the install folder under APPS_DIR/app_name
+        components       optional archive parts {name: [member patterns]}
+        component_profiles  {profile: [components]}, e.g. {"minimal": []}
+        shims            shim_manager configs; executable_subpath is a template
+    """
+
+    app_name: str = None
+    display_name: str = None
+    description: str = ""
+    catalog_url: str = None
+    catalog_format: str = "json"
+    catalog_max_age: float = 10 * 60
+    version_path: str = "$[*]"
+    version_pattern: Optional[str] = None
+    catalog_filter: Dict[str, Any] = {}
+    version_flags: Dict[str, str] = {}
+    date_key: Optional[str] = None
+    catalog_fields: List[str] = []
+    flag_labels: Dict[str, str] = {}
+    label_latest: bool = False
+    asset_url: str = None
+    asset_formats: List[str] = []
+    mirrors: List[str] = []
+    checksum_url: Optional[str] = None
+    install_dir: str = "{version}"
+    shims: List[Dict[str, str]] = []
+
+    def __init__(self):
+        self.path = APPS_DIR / self.app_name
+        self._entries: Dict[str, CatalogEntry] = {}
+        super().__init__(self.app_name)
+
+    def _parse_catalog(
+        self,
+        response: httpx.Response,
+        on_entry: Callable[[CatalogEntry], None] = None,
+    ) -> List[list]:
+        """Turn a catalog response into entry rows (cached by catalog_cache).
+
+        on_entry is called with each entry as soon as it has been parsed.
+        Versions without an installable archive are left out.
+        """
+        if self.catalog_format == "text":
+            body = response.read().decode(response.encoding or "utf-8")
+            pairs = [(None, match) for match in re.finditer(self.version_pattern, body)]
+        else:
+            pairs = self._select_versions(response)
+
+        entries = []
+        seen = set()
+        for owner, value in pairs:
+            if isinstance(value, re.Match):
+                match = value
+            elif isinstance(value, str):
+                if self.catalog_filter and not (
+                    isinstance(owner, dict)
+                    and all(owner.get(k) == v for k, v in self.catalog_filter.items())
+                ):
+                    continue
+                match = re.search(self.version_pattern or r".+", value)
+                if not match:
+                    continue
+            else:
+                continue
+
+            version = match.group(1) if match.groups() else match.group(0)
+            if version in seen:
+                continue
+            seen.add(version)
+            entry = self.describe_version(
+                version, owner if isinstance(owner, dict) else {}
+            )
+            if entry is None:
+                continue
+            entries.append(entry.to_row())
+            if on_entry is not None:
+                on_entry(entry)
+        return entries
+
+    def _select_versions(self, response: httpx.Response):
+        """Stream (owner, version string) pairs out of a JSON catalog.
+
+        The objects owning the versions are parsed one at a time with only
+        the keys in use, so release notes and asset lists are never built.
+        """
+        owner_path, _, key = self.version_path.rpartition(".")
+        if not owner_path or "[" in key:
+            # The versions are not keys of an object; parse the whole body
+            return select_json(json.loads(response.read()), self.version_path)
+        keep = {key, *self.catalog_filter, *self.version_flags.values()}
+        keep.update(self.catalog_fields)
+        if self.date_key:
+            keep.add(self.date_key)
+        return (
+            (owner, owner[key])
+            for owner in iter_items(response.iter_text(), owner_path, keep)
+            if isinstance(owner, dict) and key in owner
+        )
+
+    def find_asset(
+        self, version: str, item: Dict[str, Any]
+    ) -> Optional[Tuple[str, Optional[int], Optional[str]]]:
+        """(url, size, sha256) of a version's archive as its catalog item lists it.
+
+        Returns None if the item shows there is no archive to install. The
+        default knows nothing beyond asset_url; override for catalogs that
+        list their files.
+        """
+        return self.asset_url.format(version=version), None, None
+
+    def describe_version(
+        self, version: str, item: Dict[str, Any]
+    ) -> Optional[CatalogEntry]:
+        """Build the catalog entry for a version; override for custom labels.
+
+        Returns None for a version that cannot be installed.
+        """
+        asset = self.find_asset(version, item)
+        if asset is None:
+            return None
+        url, size, sha256 = asset
+        entry = CatalogEntry(version, url=url, size=size, sha256=sha256)
+        if self.date_key and item.get(self.date_key):
+            entry.date = str(item[self.date_key])[:10]
+        labels = []
+        for flag, key in self.version_flags.items():
+            setattr(entry, flag, bool(item.get(key)))
+            if item.get(key) and flag in self.flag_labels:
+                labels.append(self.flag_labels[flag])
+        if labels:
+            entry.display_name = f"{version} ({', '.join(labels)})"
+        return entry
+
+    def get_available_versions(
+        self, on_entry: Callable[[CatalogEntry], None] = None
+    ) -> List[CatalogEntry]:
+        """Get available versions from the catalog, newest first.
+
+        When the catalog is downloaded, on_entry receives each entry while the
+        body is still streaming in, e.g. to start filling a list early.
+        """
+        try:
+            rows = catalog_cache.fetch(
+                self.catalog_url,
+                lambda response: self._parse_catalog(response, on_entry),
+                max_age=self.catalog_max_age,
+            )
+        except (httpx.HTTPError, ValueError) as e:
+            print(f"Failed to fetch {self.display_name} versions: {e}")
+            return []
+
+        versions = sort_versions(CatalogEntry.from_row(row) for row in rows)
+        self._entries = {entry.real_name: entry for entry in versions}
+        if self.label_latest and versions:
+            versions[0].display_name = f"{versions[0].real_name} (Latest)"
+        return versions
+
+    def catalog_entry(self, version: str) -> Optional[CatalogEntry]:
+        """A version's entry in the last fetched catalog, without any request"""
+        if not self._entries:
+            rows = catalog_cache.get_cached(self.catalog_url) or []
+            self._entries = {
+                entry.real_name: entry for entry in map(CatalogEntry.from_row, rows)
+            }
+        return self._entries.get(version)
+
+    def _install_path(self, version: str) -> Path:
+        return self.path / self.install_dir.format(version=version)
+
+    def install(self, version: str = None):
+        """Install a version, asking for one if not given"""
+        if version is None:
+            available_versions = self.get_available_versions()
+            if not available_versions:
+                print("No versions available for installation.")
+                return
+
+            version = VersionSelectorDialog.select_version(
+                self.display_name, available_versions, app_key=self.app_name
+            )
+            if not version:
+                print("Installation cancelled.")
+                return
+
+        # A second install of the same version (double click, another
+        # process) waits here and then finds it installed
+        with lock_manager.version_lock(self.app_name, version):
+            self._refresh_state()
+            if version in self.list_installed_versions():
+                print(f"{self.display_name} {version} is already installed.")
+                return
+
+            print(f"Installing {self.display_name} {version}...")
+            with trace_manager.trace("install", app=self.app_name, version=version):
+                self._install_version(version)
+
+    def _asset(self, version: str, fmt: str = None) -> str:
+        """The origin URL of a version's archive, in fmt if given"""
+        entry = self.catalog_entry(version)
+        if entry is not None and entry.url:
+            url = entry.url
+        else:
+            url = self.asset_url.format(version=version)
+        return archive_formats.with_format(url, fmt) if fmt else url
+
+    def _archive_name(self, version: str, fmt: str = None) -> str:
+        filename = self._asset(version, fmt).rsplit("/", 1)[-1]
+        return f"{self.app_name}-{version}-{filename}"
+
+    def _archive_urls(self, version: str, fmt: str = None) -> List[str]:
+        """The archive's URL on every mirror, fastest first"""
+        return mirror_manager.mirror_urls(
+            self.app_name, self.mirrors, self._asset(version, fmt)
+        )
+
+    def _archive_url(self, version: str) -> str:
+        return self._archive_urls(version)[0]
+
+    def _checksum(self, version: str, fmt: str = None) -> Optional[str]:
+        entry = self.catalog_entry(version)
+        if fmt is None and entry is not None and entry.sha256:
+            return entry.sha256
+        if not self.checksum_url:
+            return None
+        return download_manager.fetch_checksum(
+            self.checksum_url.format(version=version),
+            self._asset(version, fmt).rsplit("/", 1)[-1],
+        )
+
+    def _asset_size(self, version: str, fmt: str) -> Optional[int]:
+        """Size of the archive in fmt, or None if it is not published"""
+        entry = self.catalog_entry(version)
+        if fmt is None and entry is not None and entry.size:
+            return entry.size
+        _, size, _ = download_manager.probe(self._asset(version, fmt))
+        return size or None
+
+    def _download_format(self, version: str) -> Optional[str]:
+        """The smallest supported format to download a whole archive in.
+
+        None stands for the format of asset_url itself.
+        """
+        formats = [
+            fmt for fmt in self.asset_formats if archive_formats.is_supported(fmt)
+        ]
+        if not formats:
+            return None
+        sizes = {fmt: self._asset_size(version, fmt) for fmt in [None, *formats]}
+        known = [fmt for fmt, size in sizes.items() if size]
+        # Ties and unknown sizes keep asset_url's format
+        return min(known, key=lambda fmt: sizes[fmt]) if known else None
+
+    def _download_archive(
+        self,
+        version: str,
+        destination: Path,
+        rate_limit: float = None,
+        fmt: str = None,
+    ):
+        url, *mirrors = self._archive_urls(version, fmt)
+        download_manager.download(
+            url,
+            destination,
+            self._checksum(version, fmt),
+            rate_limit=rate_limit,
+            mirrors=mirrors,
+        )
+
+    def get_prefetched(self, version: str) -> Optional[Path]:
+        """The verified archive of a version downloaded by prefetch(), if any"""
+        for fmt in [None, *self.asset_formats]:
+            path = PREFETCH_DIR / self._archive_name(version, fmt)
+            if path.exists():
+                return path
+        return None
+
+    def prefetch(self, version: str, rate_limit: float = None) -> Path:
+        """Download and verify a version's archive now so installing it later is local"""
+        path = self.get_prefetched(version)
+        if path is not None:
+            return path
+        fmt = self._download_format(version)
+        path = PREFETCH_DIR / self._archive_name(version, fmt)
+        partial = path.with_name(path.name + ".part")
+        try:
+            self._download_archive(version, partial, rate_limit, fmt)
+            partial.replace(path)
+        finally:
+            partial.unlink(missing_ok=True)
+        return path
+
+    def _delta_base(self, version: str) -> Optional[str]:
+        """The newest installed version below version on the same update line"""
+        depth = self.update_line_depth or 2
+        target = parse_version(version)
+        candidates = [
+            installed
+            for installed in self.list_installed_versions()
+            if parse_version(installed).line(depth) == target.line(depth)
+            and parse_version(installed) < target
+            and delta_manager.load_manifest(self.app_name, installed) is not None
+        ]
+        return max(candidates, key=parse_version) if candidates else None
+
+    def _install_delta(self, version: str, install_path: Path, select=None):
+        """Try a delta upgrade from a close installed version; None if not possible"""
+        base_version = self._delta_base(version)
+        if base_version is None or not state_manager.get_preference(
+            "delta_updates", True
+        ):
+            return None
+        try:
+            members, stats = delta_manager.install_delta(
+                self.app_name,
+                self._archive_url(version),
+                base_version,
+                self._install_path(base_version),
+                version,
+                install_path,
+                select,
+            )
+        except Exception as e:
+            if install_path.exists():
+                trash_manager.discard_quietly(install_path)
+            if isinstance(e, InstallCancelled):
+                raise
+            print(
+                f"Delta update from {base_version} not possible, downloading all: {e}"
+            )
+            return None
+        print(
+            f"Delta update from {base_version}: downloaded "
+            f"{format_size(stats['downloaded_bytes'])} of "
+            f"{format_size(stats['archive_bytes'])}, saved "
+            f"{format_size(stats['saved_bytes'])} "
+            f"({stats['reused_files']} files reused, {stats['fetched_files']} fetched)"
+        )
+        return members
+
+    def _install_version(self, version: str):
+        components = self._profile_components()
+        select = self._component_selector(components)
+        archive_path = self.get_prefetched(version)
+        install_path = self._install_path(version)
+
+        members = None
+        try:
+            with staging_manager.stage(self.app_name, version, install_path) as staging:
+                if archive_path is None:
+                    members = self._install_delta(version, staging, select)
+                if members is None and archive_path is not None:
+                    members = archive_formats.extract(archive_path, staging, select)
+                elif members is None:
+                    # A slim install reads only some of the zip; a whole
+                    # archive is fetched in the smallest format
+                    fmt = self._download_format(version) if select is None else None
+                    url, *mirrors = self._archive_urls(version, fmt)
+                    members = self._install_archive(
+                        url,
+                        TEMP_PATH / self._archive_name(version, fmt),
+                        staging,
+                        components,
+                        self._checksum(version, fmt),
+                        mirrors,
+                    )
+                # Last point to back out; the rename into place and the state
+                # commit below always complete
+                current_token().check()
+        except Exception as e:
+            print(f"Failed to install {self.display_name} {version}: {e}")
+            return
+        finally:
+            if archive_path is not None:
+                archive_path.unlink(missing_ok=True)
+
+        with trace_manager.span("state_commit"), lock_manager.app_lock(self.app_name):
+            self._refresh_state()
+            disk_usage_manager.record_members(self.app_name, version, members)
+            delta_manager.record_manifest(self.app_name, version, members)
+            state_manager.set_app_version_components(self.app_name, version, components)
+            self._add_installed_version(version, str(install_path))
+
+            if not self.active_version:
+                # Creates the shims too
+                self._set_active_version(version)
+                self._save_state(
+                    installed=True, version=version, install_path=str(install_path)
+                )
+
+        print(f"{self.display_name} {version} installed successfully at {install_path}")
+
+    def uninstall(self, version: str = None):
+        """Uninstall one version, or every version if none is given"""
+        if version is None:
+            print(f"Uninstalling all {self.display_name} versions...")
+            with lock_manager.app_lock(self.app_name):
+                self._refresh_state()
+                self._remove_shims()
+                for installed_version in list(self.installed_versions.keys()):
+                    self._uninstall_version(installed_version)
+                state_manager.remove_app_completely(self.app_name)
+                disk_usage_manager.remove(self.app_name)
+                delta_manager.remove_manifest(self.app_name)
+                self._load_state()
+            print(f"All {self.display_name} versions uninstalled successfully")
+            return
+
+        with lock_manager.version_lock(self.app_name, version):
+            self._refresh_state()
+            if version not in self.installed_versions:
+                print(f"{self.display_name} {version} is not installed.")
+                return
+
+            print(f"Uninstalling {self.display_name} {version}...")
+            is_active_version = self.active_version == version
+            self._uninstall_version(version)
+            self._remove_installed_version(version)
+            if is_active_version:
+                remaining_versions = list(self.installed_versions.keys())
+                if remaining_versions:
+                    new_active = remaining_versions[0]
+                    self._set_active_version(new_active)
+                    print(f"Set {new_active} as the new active version")
+                else:
+                    self._remove_shims()
+                    state_manager.remove_app_completely(self.app_name)
+                    self._load_state()
+
+            print(f"{self.display_name} {version} uninstalled successfully")
+
+    def _uninstall_version(self, version: str):
+        """Remove a specific version's files"""
+        try:
+            trash_manager.discard(self._install_path(version))
+        except OSError as e:
+            print(f"Warning: Could not remove {self.display_name} {version} files: {e}")
+        delta_manager.remove_manifest(self.app_name, version)
+
+    def _shim_configs(self, version: str) -> List[Dict[str, str]]:
+        configs = []
+        for shim in self.shims:
+            config = dict(shim)
+            config["executable_subpath"] = shim.get("executable_subpath", "").format(
+                version=version
+            )
+            config.setdefault("shim_name", Path(shim["executable_name"]).stem)
+            configs.append(config)
+        return configs
+
+    def _create_shims(self, version: str):
+        """Create PowerShell shims for the spec's executables"""
+        with trace_manager.span("shims", version=version) as span:
+            created_shims = shim_manager.create_multiple_shims(
+                self.app_name, self._shim_configs(version)
+            )
+            span["shims"] = [shim.name for shim in created_shims]
+
+    def _remove_shims(self):
+        """Remove PowerShell shims for the spec's executables"""
+        shim_names = [
+            config.get("shim_name", Path(config["executable_name"]).stem)
+            for config in self.shims
+        ]
+        removed_count = shim_manager.remove_multiple_shims(shim_names)
+        print(f"Removed {removed_count} shims")
+
+    def _update_shims_for_version(self, version: str):
+        """Update shims to point to specific version"""
+        self._remove_shims()
+        self._create_shims(version)
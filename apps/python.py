@@ -2,13 +2,29 @@ from sys import version
 from state_manager import state_manager
 from widgets.version_selector_dialog import VersionSelectorDialog
 from shim_manager import shim_manager
+from trash_manager import trash_manager
+from disk_usage_manager import disk_usage_manager
+from download_manager import download_manager
+from lock_manager import lock_manager
+from cancellation import current_token
+from trace_manager import trace_manager
+from mirror_manager import mirror_manager
+from staging_manager import staging_manager
 import httpx
 from state_manager import APPS_DIR, TEMP_PATH
 import zipfile
-import shutil
 import json
 
 from apps.Apps import ManagedApp
+from versions import sort_versions
+
+FTP_URL = "https://www.python.org/ftp/python/"
+# Copies of FTP_URL; release archives come from the fastest
+MIRRORS = [
+    FTP_URL,
+    "https://mirrors.huaweicloud.com/python/",
+    "https://registry.npmmirror.com/-/binary/python/",
+]
 
 
 class Python(ManagedApp):
@@ -19,53 +35,66 @@ class Python(ManagedApp):
 
     def get_available_versions(self):
         """Get available versions of Python"""
-        responseLegacy = httpx.get(
-            "https://www.python.org/ftp/python/index-windows-legacy.json"
-        )
-        response = httpx.get("https://www.python.org/ftp/python/index-windows.json")
-        responseRecent = httpx.get(
-            "https://www.python.org/ftp/python/index-windows-recent.json"
-        )
+        responseLegacy = httpx.get(f"{FTP_URL}index-windows-legacy.json")
+        response = httpx.get(f"{FTP_URL}index-windows.json")
+        responseRecent = httpx.get(f"{FTP_URL}index-windows-recent.json")
 
         data = json.loads(response.text)
         dataLegacy = json.loads(responseLegacy.text)
         dataRecent = json.loads(responseRecent.text)
 
-        versions = []
-
-        for version in dataLegacy["versions"]:
-            if version["sort-version"] in versions:
-                continue
-
-            versions.append(version["sort-version"])
+        versions = set()
+        for index in (dataLegacy, data, dataRecent):
+            versions.update(version["sort-version"] for version in index["versions"])
 
-        for version in data["versions"]:
-            if version["sort-version"] in versions:
-                continue
-
-            versions.append(version["sort-version"])
-
-        for version in dataRecent["versions"]:
-            if version["sort-version"] in versions:
-                continue
-
-            versions.append(version["sort-version"])
-
-        # sort versions
-        versions.sort(
-            key=lambda x: [int(part) if part.isdigit() else 0 for part in x.split(".")],
-            reverse=True,
-        )
-
-        return versions
+        return sort_versions(versions)
 
     def uninstall(self, version=None):
-        if version:
-            shutil.rmtree(self.path / version, ignore_errors=True)
+        if version is None:
+            print("Uninstalling all Python versions...")
+            with lock_manager.app_lock(self.app_name):
+                self._refresh_state()
+                self._remove_shims()
+                for installed_version in list(self.installed_versions.keys()):
+                    self._uninstall_version(installed_version)
+                state_manager.remove_app_completely(self.app_name)
+                self._load_state()
+            print("All Python versions uninstalled successfully")
+            return
+
+        with lock_manager.version_lock(self.app_name, version):
+            self._refresh_state()
+            if version not in self.installed_versions:
+                print(f"Python {version} is not installed.")
+                return
+
+            print(f"Uninstalling Python {version}...")
+            is_active_version = self.active_version == version
+            self._uninstall_version(version)
             self._remove_installed_version(version)
-        else:
-            shutil.rmtree(self.path, ignore_errors=True)
-            self._remove_installed_version(self.active_version)
+            if is_active_version:
+                remaining_versions = list(self.installed_versions.keys())
+                if remaining_versions:
+                    new_active = remaining_versions[0]
+                    self._set_active_version(new_active)
+                    print(f"Set {new_active} as the new active version")
+                else:
+                    self._remove_shims()
+                    state_manager.remove_app_completely(self.app_name)
+                    self._load_state()
+
+            print(f"Python {version} uninstalled successfully")
+
+    def _uninstall_version(self, version: str):
+        """Remove a specific version's files"""
+        try:
+            trash_manager.discard(self.path / version)
+        except OSError as e:
+            print(f"Warning: Could not remove Python {version} files: {e}")
+
+    def _remove_shims(self):
+        """Remove the python and pythonw shims"""
+        shim_manager.remove_multiple_shims(["python", "pythonw"])
 
     def _update_shims_for_version(self, version):
         shim_manager.create_multiple_shims(
@@ -85,6 +114,15 @@ class Python(ManagedApp):
         )
 
     def install(self, version):
+        # A second install of the same version waits here and then finds it installed
+        with lock_manager.version_lock(self.app_name, version):
+            self._refresh_state()
+            if version in self.installed_versions:
+                print(f"Python {version} is already installed.")
+                return
+            self._install_version(version)
+
+    def _install_version(self, version):
         print(version)
 
         import re
@@ -99,49 +137,55 @@ class Python(ManagedApp):
             base_version = version
             suffix = ""
 
-        url = f"https://www.python.org/ftp/python/{base_version}/python-{version}-embed-amd64.zip"
+        url, *mirrors = mirror_manager.mirror_urls(
+            self.app_name,
+            MIRRORS,
+            f"{FTP_URL}{base_version}/python-{version}-embed-amd64.zip",
+        )
 
         install_path = self.path / version
-        filename = f"python-{version}-embed-amd64.zip"
-
-        install_path.mkdir(parents=True, exist_ok=True)
-
-        with httpx.stream("GET", url) as response:
-            if response.status_code == 200:
-                with open(install_path / filename, "wb") as f:
-                    for chunk in response.iter_bytes():
-                        f.write(chunk)
-            else:
-                print(f"Failed to download Python {version}: {response.status_code}")
+        archive_path = TEMP_PATH / f"python-{version}-embed-amd64.zip"
+
+        with trace_manager.trace("install", app=self.app_name, version=version):
+            try:
+                with staging_manager.stage(
+                    self.app_name, version, install_path
+                ) as staging:
+                    download_manager.download(url, archive_path, mirrors=mirrors)
+                    members = download_manager.extract_zip(archive_path, staging)
+                    current_token().check()
+            except Exception as e:
+                print(f"Failed to install Python {version}: {e}")
                 return
-
-        with zipfile.ZipFile(install_path / filename, "r") as zip_ref:
-            zip_ref.extractall(install_path)
-
-        shim_manager.create_multiple_shims(
-            "python",
-            [
-                {
-                    "executable_name": "python.exe",
-                    "shim_name": "python",
-                    "executable_subpath": "",
-                },
-                {
-                    "executable_name": "pythonw.exe",
-                    "shim_name": "pythonw",
-                    "executable_subpath": "",
-                },
-            ],
-        )
-
-        (install_path / filename).unlink(missing_ok=True)
-        self._add_installed_version(version, str(install_path))
-
-        if not self.active_version:
-            self._set_active_version(version)
-            self._save_state(
-                installed=True, version=version, install_path=str(install_path)
-            )
+            finally:
+                archive_path.unlink(missing_ok=True)
+
+            with trace_manager.span("shims"):
+                shim_manager.create_multiple_shims(
+                    "python",
+                    [
+                        {
+                            "executable_name": "python.exe",
+                            "shim_name": "python",
+                            "executable_subpath": "",
+                        },
+                        {
+                            "executable_name": "pythonw.exe",
+                            "shim_name": "pythonw",
+                            "executable_subpath": "",
+                        },
+                    ],
+                )
+
+            with trace_manager.span("state_commit"):
+                disk_usage_manager.record_members(self.app_name, version, members)
+                self._add_installed_version(version, str(install_path))
+
+                if not self.active_version:
+                    self._set_active_version(version)
+                    self._save_state(
+                        installed=True, version=version, install_path=str(install_path)
+                    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,137 @@
+"""Archive formats releases can be installed from.
+
+Upstreams often publish a release in several formats, e.g. Node.js as .7z
+and .zip. zip is extracted by several threads at once and can be read in
+place over HTTP for slim and delta installs. tar.gz and tar.xz are solid
+streams and are decoded front to back in a single pass. 7z needs the
+optional py7zr package and is only offered when it is installed.
+
+Every extractor returns the installed members as zipfile.ZipInfo records
+(name, size, CRC32), so disk usage and delta manifests work the same way
+whatever the format of the archive.
+"""
+
+import tarfile
+import zipfile
+import zlib
+from pathlib import Path
+from typing import Callable, List, Optional
+from cancellation import current_token
+from download_manager import download_manager, member_path
+from trace_manager import trace_manager
+
+try:
+    import py7zr
+except ImportError:
+    py7zr = None
+
+# File suffix of each format
+SUFFIXES = {"zip": ".zip", "tar.gz": ".tar.gz", "tar.xz": ".tar.xz", "7z": ".7z"}
+CHUNK_SIZE = 256 * 1024
+
+
+def is_supported(fmt: str) -> bool:
+    return fmt in SUFFIXES and (fmt != "7z" or py7zr is not None)
+
+
+def format_of(name) -> Optional[str]:
+    """The format of an archive file name or URL, or None if unknown"""
+    lowered = str(name).lower()
+    for fmt, suffix in SUFFIXES.items():
+        if lowered.endswith(suffix):
+            return fmt
+    return None
+
+
+def with_format(url: str, fmt: str) -> str:
+    """url with its archive suffix replaced by that of fmt"""
+    current = format_of(url)
+    if current is None:
+        raise ValueError(f"Not an archive: {url}")
+    return url[: -len(SUFFIXES[current])] + SUFFIXES[fmt]
+
+
+def extract(
+    archive: Path,
+    destination: Path,
+    select: Callable[[zipfile.ZipInfo], bool] = None,
+) -> List[zipfile.ZipInfo]:
+    """Extract an archive of any supported format; returns the extracted members.
+
+    Only files accepted by select are extracted when it is given.
+    """
+    fmt = format_of(archive)
+    if fmt == "zip":
+        return download_manager.extract_zip(archive, destination, select)
+    if fmt is None or not is_supported(fmt):
+        raise ValueError(f"Unsupported archive format: {Path(archive).name}")
+
+    destination = Path(destination)
+    destination.mkdir(parents=True, exist_ok=True)
+    with trace_manager.span("extract", format=fmt) as span:
+        if fmt == "7z":
+            members = _extract_7z(Path(archive), destination, select)
+        else:
+            members = _extract_tar(Path(archive), destination, select)
+        files = [info for info in members if not info.is_dir()]
+        span["bytes"] = sum(info.file_size for info in files)
+        span["files"] = len(files)
+    return members
+
+
+def _extract_tar(archive: Path, destination: Path, select) -> List[zipfile.ZipInfo]:
+    token = current_token()
+    members = []
+    # "r|*" reads strictly front to back, decompressing as it goes
+    with tarfile.open(archive, "r|*") as tar:
+        for member in tar:
+            token.wait_if_paused()
+            if member.isdir():
+                member_path(destination, member.name).mkdir(parents=True, exist_ok=True)
+                members.append(zipfile.ZipInfo(member.name.rstrip("/") + "/"))
+                continue
+            if not member.isfile():
+                # Links and devices have no place in a Windows release
+                continue
+            info = zipfile.ZipInfo(member.name)
+            info.file_size = member.size
+            if select is not None and not select(info):
+                continue
+            target = member_path(destination, member.name)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            crc = 0
+            with tar.extractfile(member) as source, open(target, "wb") as f:
+                for chunk in iter(lambda: source.read(CHUNK_SIZE), b""):
+                    f.write(chunk)
+                    crc = zlib.crc32(chunk, crc)
+            info.CRC = crc
+            members.append(info)
+    return members
+
+
+def _extract_7z(archive: Path, destination: Path, select) -> List[zipfile.ZipInfo]:
+    token = current_token()
+    with py7zr.SevenZipFile(archive, "r") as seven_zip:
+        entries = seven_zip.list()
+
+    members = []
+    targets = []
+    for entry in entries:
+        member_path(destination, entry.filename)
+        if entry.is_directory:
+            info = zipfile.ZipInfo(entry.filename.rstrip("/") + "/")
+        else:
+            info = zipfile.ZipInfo(entry.filename)
+            info.file_size = entry.uncompressed
+            info.CRC = entry.crc32 or 0
+            if select is not None and not select(info):
+                continue
+        members.append(info)
+        targets.append(entry.filename)
+
+    token.wait_if_paused()
+    with py7zr.SevenZipFile(archive, "r") as seven_zip:
+        # Solid blocks decode in one go; narrow down only when filtering
+        seven_zip.extract(path=destination, targets=None if select is None else targets)
+    token.check()
+    return members
@@ -0,0 +1,133 @@
+"""Compare full and streaming parsing of a GitHub-style releases feed.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_catalog_parse --releases 1000
+
+Prints one JSON object with timings in milliseconds and peak memory in MB.
+The body is fed in network-sized chunks, as response.iter_text() would.
+"""
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from json_stream import iter_items
+
+CHUNK_SIZE = 64 * 1024
+
+
+def make_feed(releases: int) -> str:
+    """Releases with long notes and many assets, like api.github.com returns"""
+    rng = random.Random(1234)
+    words = ["fix", "crash", "when", "loading", "large", "project", "files", "\\n"]
+    feed = []
+    for index in range(releases):
+        tag = f"v{index // 100}.{index // 10 % 10}.{index % 10}"
+        feed.append(
+            {
+                "url": f"https://api.github.com/repos/o/r/releases/{index}",
+                "tag_name": tag,
+                "name": tag,
+                "draft": False,
+                "prerelease": rng.random() < 0.1,
+                "body": " ".join(rng.choice(words) for _ in range(1200)),
+                "author": {"login": "release-bot", "id": index},
+                "assets": [
+                    {
+                        "name": f"app-{tag}-{target}.zip",
+                        "size": rng.randint(10**6, 10**8),
+                        "browser_download_url": f"https://example.com/{tag}/{target}.zip",
+                        "uploader": {"login": "release-bot"},
+                    }
+                    for target in range(30)
+                ],
+            }
+        )
+    return json.dumps(feed)
+
+
+def chunks(feed: str):
+    for start in range(0, len(feed), CHUNK_SIZE):
+        yield feed[start : start + CHUNK_SIZE]
+
+
+def parse_full(feed: str):
+    return [
+        release["tag_name"]
+        for release in json.loads("".join(chunks(feed)))
+        if not release["draft"] and not release["prerelease"]
+    ]
+
+
+def parse_streaming(feed: str):
+    return [
+        release["tag_name"]
+        for release in iter_items(
+            chunks(feed), "$[*]", keep={"tag_name", "draft", "prerelease"}
+        )
+        if not release["draft"] and not release["prerelease"]
+    ]
+
+
+def first_entry_ms(parse) -> float:
+    """Time until the first entry is available to a caller"""
+    start = time.perf_counter()
+    next(iter(parse()))
+    return (time.perf_counter() - start) * 1000
+
+
+def measure(callback, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        callback()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        "median_ms": round(statistics.median(samples), 3),
+        "max_ms": round(max(samples), 3),
+    }
+
+
+def peak_mb(callback) -> float:
+    tracemalloc.start()
+    callback()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return round(peak / 1024 / 1024, 2)
+
+
+def run(releases: int, repeat: int):
+    feed = make_feed(releases)
+    assert parse_full(feed) == parse_streaming(feed)
+    results = {"releases": releases, "feed_mb": round(len(feed) / 1024 / 1024, 2)}
+    for name, parse in (("full", parse_full), ("streaming", parse_streaming)):
+        results[name] = measure(lambda: parse(feed), repeat)
+        results[name]["peak_mb"] = peak_mb(lambda: parse(feed))
+    results["full"]["first_entry_ms"] = round(
+        first_entry_ms(lambda: json.loads("".join(chunks(feed)))), 3
+    )
+    results["streaming"]["first_entry_ms"] = round(
+        first_entry_ms(lambda: iter_items(chunks(feed), "$[*]", keep={"tag_name"})),
+        3,
+    )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--releases", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    print(json.dumps(run(args.releases, args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""End-to-end benchmarks of the real app code against a local fake upstream.
+
+Every app's upstream URLs are pointed at benchmarks.fake_upstream, so the
+numbers cover catalog fetch and parse, download, checksum, extraction, shim
+generation and state writes without touching the internet. GWEM state goes to
+a throwaway APPDATA.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_e2e --archive-mb 32 --latency-ms 20
+
+Prints one JSON object with timings in milliseconds and throughput in MB/s.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+BENCH_APPDATA = tempfile.mkdtemp(prefix="gwem-bench-")
+os.environ["APPDATA"] = BENCH_APPDATA
+
+from benchmarks.fake_upstream import FakeUpstream
+
+import apps.php
+import apps.python
+from apps.bun import Bun
+from apps.go import Golang
+from apps.nodejs import NodeJS
+from catalog_cache import catalog_cache
+from shim_manager import shim_manager
+from trace_manager import trace_manager
+from versions import version_name
+
+try:
+    import apps.godot
+except ImportError:
+    # Godot pulls in the Windows-only shortcut support
+    apps.godot = None
+
+GUI_STARTUP_SCRIPT = """
+import time
+start = time.perf_counter()
+from PySide6 import QtWidgets
+app = QtWidgets.QApplication([])
+import main
+window = main.MainWindow()
+window.show()
+app.processEvents()
+print((time.perf_counter() - start) * 1000)
+"""
+
+
+def measure(callback, repeat: int, setup=None):
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        callback()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        "median_ms": round(statistics.median(samples), 3),
+        "max_ms": round(max(samples), 3),
+    }
+
+
+def redirect_apps(base: str):
+    """Point every app's upstream URLs at the fake server"""
+    NodeJS.catalog_url = f"{base}/nodejs/dist/index.json"
+    NodeJS.asset_url = f"{base}/nodejs/dist/{{version}}/node-{{version}}-win-x64.zip"
+    NodeJS.checksum_url = f"{base}/nodejs/dist/{{version}}/SHASUMS256.txt"
+    Golang.catalog_url = f"{base}/go/dl/?mode=json"
+    Golang.asset_url = f"{base}/go/dl/{{version}}.windows-amd64.zip"
+    Golang.checksum_url = f"{base}/go/sha/{{version}}.windows-amd64.zip.sha256"
+    Bun.catalog_url = f"{base}/github/repos/oven-sh/bun/releases"
+    Bun.asset_url = (
+        f"{base}/github/download/oven-sh/bun/bun-{{version}}/bun-windows-x64.zip"
+    )
+    Bun.checksum_url = (
+        f"{base}/github/download/oven-sh/bun/bun-{{version}}/SHASUMS256.txt"
+    )
+    apps.php.RELEASES_URL = f"{base}/php/downloads/releases/"
+    apps.php.ARCHIVES_URL = f"{base}/php/downloads/releases/archives/"
+    apps.python.FTP_URL = f"{base}/python/ftp/python/"
+    if apps.godot:
+        apps.godot.RELEASES_URL = f"{base}/github/repos/godotengine/godot/releases"
+
+
+def clear_catalog_cache():
+    for path in catalog_cache.cache_dir.glob("*.json"):
+        path.unlink()
+
+
+def bench_catalogs(apps_by_name, repeat: int):
+    """Cold fetch, 304 revalidation and fresh-cache hits per app"""
+    results = {}
+    for name, app in apps_by_name.items():
+        app_results = {
+            "cold": measure(app.get_available_versions, repeat, clear_catalog_cache)
+        }
+        if hasattr(app, "catalog_max_age"):
+            # Expired entry: one conditional GET answered with 304
+            app.catalog_max_age = 0
+            app_results["revalidate_304"] = measure(app.get_available_versions, repeat)
+            del app.catalog_max_age
+            app_results["fresh"] = measure(app.get_available_versions, repeat)
+        elif name == "php":
+            # The PHP listings are always revalidated
+            app_results["revalidate_304"] = measure(app.get_available_versions, repeat)
+        app_results["versions"] = len(app.get_available_versions())
+        results[name] = app_results
+    return results
+
+
+def archive_name(name: str, app, version: str) -> str:
+    """File name of the archive an install of version downloads"""
+    if name == "python":
+        return f"python-{version}-embed-amd64.zip"
+    if name == "godot":
+        return f"Godot_v{version}_win64.exe.zip"
+    return app.asset_url.format(version=version).rsplit("/", 1)[-1]
+
+
+def bench_installs(upstream, apps_by_name, archive_size: int):
+    """One install per app: wall time and end-to-end MB/s of archive bytes"""
+    results = {}
+    for name, app in apps_by_name.items():
+        versions = app.get_available_versions()
+        if not versions:
+            results[name] = {"error": "no versions"}
+            continue
+        version = version_name(versions[0])
+        # Build the archive first so the install doesn't time zip generation
+        upstream.archive(archive_name(name, app, version))
+        start = time.perf_counter()
+        app.install(version)
+        elapsed = time.perf_counter() - start
+        results[name] = {
+            "version": version,
+            "installed": bool(app.list_installed_versions()),
+            "ms": round(elapsed * 1000, 1),
+            "mb_per_s": round(archive_size / elapsed / 1e6, 2),
+        }
+    return results
+
+
+def bench_switch(upstream, app, repeat: int):
+    """Switch between two installed versions of a provider app"""
+    versions = [entry["real_name"] for entry in app.get_available_versions()[:2]]
+    for version in versions:
+        upstream.archive(archive_name(app.app_name, app, version))
+        app.install(version)
+    installed = app.list_installed_versions()
+    if len(installed) < 2:
+        return {"error": "could not install two versions"}
+
+    targets = iter(installed * repeat)
+    return measure(lambda: app.switch_version(next(targets)), repeat)
+
+
+def bench_shims(app, repeat: int):
+    version = app.get_active_version()
+    configs = app._shim_configs(version)
+    return measure(
+        lambda: shim_manager.create_multiple_shims(app.app_name, configs), repeat
+    )
+
+
+def bench_gui_startup(repeat: int):
+    """Fresh interpreter to a shown MainWindow, offscreen"""
+    samples = []
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, "-c", GUI_STARTUP_SCRIPT],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            env={**os.environ, "PYTHONPATH": str(ROOT)},
+        )
+        if result.returncode != 0:
+            error = (result.stderr.strip().splitlines() or ["failed"])[-1]
+            return {"error": error}
+        samples.append(float(result.stdout.strip().splitlines()[-1]))
+    return {
+        "median_ms": round(statistics.median(samples), 3),
+        "max_ms": round(max(samples), 3),
+    }
+
+
+def run(args):
+    archive_size = int(args.archive_mb * 1024 * 1024)
+    upstream = FakeUpstream(
+        latency=args.latency_ms / 1000,
+        bandwidth=args.bandwidth_mbps * 1e6 / 8 if args.bandwidth_mbps else None,
+        archive_size=archive_size,
+        file_count=args.files,
+        catalog_size=args.catalog_size,
+    )
+    results = {
+        "archive_mb": args.archive_mb,
+        "files": args.files,
+        "latency_ms": args.latency_ms,
+        "bandwidth_mbps": args.bandwidth_mbps,
+    }
+
+    with upstream:
+        redirect_apps(upstream.url)
+        apps_by_name = {
+            "nodejs": NodeJS(),
+            "golang": Golang(),
+            "bun": Bun(),
+            "python": apps.python.Python(),
+            "php": apps.php.Php(),
+        }
+        if apps.godot:
+            apps_by_name["godot"] = apps.godot.Godot()
+
+        results["catalog"] = bench_catalogs(apps_by_name, args.repeat)
+        if not args.skip_installs:
+            results["install"] = bench_installs(
+                upstream,
+                {name: app for name, app in apps_by_name.items() if name != "php"},
+                archive_size,
+            )
+            results["switch"] = bench_switch(
+                upstream, apps_by_name["nodejs"], args.repeat
+            )
+            results["shims"] = bench_shims(apps_by_name["nodejs"], args.repeat)
+        results["requests"] = upstream.requests
+
+    if not args.skip_gui:
+        results["gui_startup"] = bench_gui_startup(args.gui_repeat)
+    results["phases"] = trace_manager.summary()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--archive-mb", type=float, default=32)
+    parser.add_argument("--files", type=int, default=500)
+    parser.add_argument("--catalog-size", type=int, default=400)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--bandwidth-mbps", type=float, default=0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--gui-repeat", type=int, default=3)
+    parser.add_argument("--skip-installs", action="store_true")
+    parser.add_argument("--skip-gui", action="store_true")
+    args = parser.parse_args()
+    try:
+        # App code reports progress on stdout; keep stdout for the JSON
+        with contextlib.redirect_stdout(sys.stderr):
+            results = run(args)
+        print(json.dumps(results, indent=2))
+    finally:
+        shutil.rmtree(BENCH_APPDATA, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
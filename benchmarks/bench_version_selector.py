@@ -0,0 +1,114 @@
+"""Open and filter latency of VersionSelectorDialog on large synthetic catalogs.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_version_selector --entries 10000
+
+Prints one JSON object with timings in milliseconds.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.environ.setdefault("APPDATA", tempfile.mkdtemp(prefix="gwem-bench-"))
+
+from PySide6 import QtWidgets
+
+from widgets.version_selector_dialog import VersionSelectorDialog
+
+
+def make_catalog(count: int):
+    """Node-like catalog: newest first, every fourth major LTS"""
+    catalog = []
+    major = count // 400 + 1
+    while len(catalog) < count:
+        for minor in range(20, -1, -1):
+            for patch in range(19, -1, -1):
+                real_name = f"v{major}.{minor}.{patch}"
+                lts = major % 4 == 0
+                display_name = f"{real_name} (LTS)" if lts else real_name
+                catalog.append(
+                    {"real_name": real_name, "display_name": display_name, "lts": lts}
+                )
+                if len(catalog) == count:
+                    return catalog
+        major -= 1
+    return catalog
+
+
+def measure(callback, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        callback()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        "median_ms": round(statistics.median(samples), 3),
+        "max_ms": round(max(samples), 3),
+    }
+
+
+def run(entries: int, repeat: int):
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    catalog = make_catalog(entries)
+    results = {"entries": entries}
+
+    def open_dialog():
+        dialog = VersionSelectorDialog("Node.js", catalog)
+        dialog.show()
+        app.processEvents()
+        dialog.close()
+        dialog.deleteLater()
+
+    results["open"] = measure(open_dialog, repeat)
+
+    dialog = VersionSelectorDialog("Node.js", catalog)
+    dialog.show()
+    app.processEvents()
+
+    def type_ahead():
+        dialog.search_edit.clear()
+        for char in "v12.1":
+            dialog.search_edit.insert(char)
+            app.processEvents()
+
+    results["type_ahead_5_keys"] = measure(type_ahead, repeat)
+
+    def toggle_lts():
+        dialog.lts_checkbox.setChecked(True)
+        app.processEvents()
+        dialog.lts_checkbox.setChecked(False)
+        app.processEvents()
+
+    dialog.search_edit.clear()
+    results["toggle_lts"] = measure(toggle_lts, repeat)
+
+    def toggle_grouping():
+        dialog.group_checkbox.setChecked(True)
+        app.processEvents()
+        dialog.group_checkbox.setChecked(False)
+        app.processEvents()
+
+    results["toggle_grouping"] = measure(toggle_grouping, repeat)
+    dialog.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    print(json.dumps(run(args.entries, args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
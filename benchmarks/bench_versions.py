@@ -0,0 +1,105 @@
+"""Microbenchmarks for the shared version library on large catalogs.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_versions --entries 10000
+
+Prints one JSON object with timings in milliseconds.
+"""
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from versions import (
+    filter_versions,
+    parse_range,
+    parse_version,
+    resolve_version,
+    sort_versions,
+)
+
+
+def make_catalog(count: int):
+    """Mixed catalog in the shapes real upstreams use, shuffled"""
+    shapes = [
+        "v{0}.{1}.{2}",
+        "go{0}.{1}.{2}",
+        "go{0}.{1}rc{2}",
+        "{0}.{1}.{2}",
+        "{0}.{1}.{2}a{2}",
+        "{0}.{1}-stable",
+        "php-{0}.{1}.{2}-nts-Win32-vs16-x64.zip",
+    ]
+    rng = random.Random(1234)
+    catalog = set()
+    while len(catalog) < count:
+        shape = rng.choice(shapes)
+        catalog.add(
+            shape.format(rng.randint(0, 30), rng.randint(0, 40), rng.randint(0, 60))
+        )
+    catalog = [{"real_name": name, "display_name": name} for name in catalog]
+    rng.shuffle(catalog)
+    return catalog
+
+
+def measure(callback, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        callback()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        "median_ms": round(statistics.median(samples), 3),
+        "max_ms": round(max(samples), 3),
+    }
+
+
+def run(entries: int, repeat: int):
+    catalog = make_catalog(entries)
+    names = [entry["real_name"] for entry in catalog]
+    results = {"entries": entries}
+
+    def parse_cold():
+        parse_version.cache_clear()
+        for name in names:
+            parse_version(name)
+
+    def parse_warm():
+        for name in names:
+            parse_version(name)
+
+    results["parse_cold"] = measure(parse_cold, repeat)
+    results["parse_warm"] = measure(parse_warm, repeat)
+    results["sort"] = measure(lambda: sort_versions(catalog), repeat)
+    results["resolve_latest_20x"] = measure(
+        lambda: resolve_version("20.x", catalog), repeat
+    )
+    results["resolve_caret"] = measure(
+        lambda: resolve_version("^3.12", catalog), repeat
+    )
+    results["filter_range"] = measure(
+        lambda: filter_versions(">=10.5 <20", catalog), repeat
+    )
+    results["parse_range_cached"] = measure(
+        lambda: [parse_range("^3.12") for _ in range(entries)], repeat
+    )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    print(json.dumps(run(args.entries, args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,464 @@
+"""A local stand-in for the upstreams GWEM talks to.
+
+Serves nodejs.org index.json and dist/, go.dev ?mode=json, the python.org
+Windows index files, windows.php.net listings and the GitHub releases API,
+with synthetic zip archives of configurable size and file count. Node.js
+archives can also be served as .7z (needs py7zr), .tar.gz and .tar.xz by
+listing them in node_formats. The Node.js and Go catalogs list each
+release's files, without Windows ones for the oldest major. Latency and
+bandwidth can be injected per response; archives support HEAD and Range,
+catalogs support ETag revalidation. With fail_after set, the server drops
+archive connections once it has sent that many archive bytes and answers
+503 from then on, like a mirror going down mid-download.
+
+Run standalone to poke at it:
+
+    python -m benchmarks.fake_upstream --port 8765 --latency-ms 50
+"""
+
+import argparse
+import hashlib
+import http.server
+import io
+import json
+import random
+import re
+import tarfile
+import threading
+import time
+import zipfile
+from urllib.parse import urlparse
+
+try:
+    import py7zr
+except ImportError:
+    py7zr = None
+
+CHUNK_SIZE = 64 * 1024
+
+
+def make_zip(root: str, executables, size: int, file_count: int, seed: int = 0):
+    """Build a deflated zip of roughly size bytes spread over file_count files.
+
+    Content is half random and half repetitive so it compresses about as
+    well as real runtime archives.
+    """
+    rng = random.Random(seed)
+    buffer = io.BytesIO()
+    file_count = max(file_count, len(executables))
+    per_file = max(1, size // file_count)
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED, compresslevel=1) as zf:
+        names = list(executables)
+        names += [
+            f"lib/{index // 100}/file{index}.dat"
+            for index in range(file_count - len(names))
+        ]
+        for name in names:
+            half = per_file // 2
+            data = (
+                rng.randbytes(half)
+                + (b"GWEM benchmark " * (half // 15 + 1))[: per_file - half]
+            )
+            zf.writestr(f"{root}{name}", data)
+    return buffer.getvalue()
+
+
+def repack(zip_data: bytes, fmt: str) -> bytes:
+    """The files of a zip archive as a tar.gz, tar.xz or 7z archive"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(io.BytesIO(zip_data)) as source:
+        if fmt == "7z":
+            with py7zr.SevenZipFile(buffer, "w") as target:
+                for info in source.infolist():
+                    target.writestr(source.read(info), info.filename)
+        else:
+            mode = {"tar.gz": "w:gz", "tar.xz": "w:xz"}[fmt]
+            with tarfile.open(fileobj=buffer, mode=mode) as target:
+                for info in source.infolist():
+                    member = tarfile.TarInfo(info.filename)
+                    member.size = info.file_size
+                    target.addfile(member, io.BytesIO(source.read(info)))
+    return buffer.getvalue()
+
+
+class FakeUpstream:
+    """Threaded HTTP server with the upstream routes GWEM uses"""
+
+    def __init__(
+        self,
+        port: int = 0,
+        latency: float = 0.0,
+        bandwidth: float = None,
+        archive_size: int = 32 * 1024 * 1024,
+        file_count: int = 500,
+        catalog_size: int = 400,
+        fail_after: int = None,
+        node_formats=("zip",),
+    ):
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.archive_size = archive_size
+        self.file_count = file_count
+        self.catalog_size = catalog_size
+        self.fail_after = fail_after
+        self.node_formats = node_formats
+        self.requests = 0
+        self.archive_bytes_sent = 0
+        self._archives = {}
+        self._archives_lock = threading.Lock()
+        self._catalogs = self._build_catalogs()
+        self._server = http.server.ThreadingHTTPServer(
+            ("127.0.0.1", port), self._make_handler()
+        )
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    # Catalogs
+
+    def versions(self, count: int):
+        """Newest-first (major, minor, patch) triples"""
+        result = []
+        major = count // 100 + 1
+        while len(result) < count:
+            for minor in range(9, -1, -1):
+                for patch in range(9, -1, -1):
+                    result.append((major, minor, patch))
+                    if len(result) == count:
+                        return result
+            major -= 1
+            if major < 0:
+                break
+        return result
+
+    def _build_catalogs(self):
+        versions = self.versions(self.catalog_size)
+        catalogs = {}
+
+        # The oldest major has no Windows build, like early Node.js and Go
+        oldest = versions[-1][0]
+        node_files = [f"win-x64-{fmt}" for fmt in self.node_formats] + ["linux-x64"]
+        catalogs["/nodejs/dist/index.json"] = json.dumps(
+            [
+                {
+                    "version": f"v{a}.{b}.{c}",
+                    "date": f"20{10 + a:02}-{b + 1:02}-{c + 1:02}",
+                    "files": node_files if a != oldest else ["linux-x64"],
+                    "lts": "Iron" if a % 2 == 0 else False,
+                }
+                for a, b, c in versions
+            ]
+        )
+        # Built on first request, as it lists the size and sha256 of archives
+        catalogs["/go/dl/"] = lambda: json.dumps(
+            [
+                {
+                    "version": f"go1.{a}.{c}",
+                    "stable": b == 9,
+                    "files": self._go_files(f"go1.{a}.{c}", windows=a != oldest),
+                }
+                for a, b, c in versions
+            ]
+        )
+        for suffix in ("", "-legacy", "-recent"):
+            catalogs[f"/python/ftp/python/index-windows{suffix}.json"] = json.dumps(
+                {"versions": [{"sort-version": f"3.{a}.{c}"} for a, b, c in versions]}
+            )
+
+        releases_page = "".join(
+            f'<A HREF="/php/downloads/releases/php-8.{a % 5}.{c}-nts-Win32-vs16-x64.zip">'
+            f"php-8.{a % 5}.{c}-nts-Win32-vs16-x64.zip</A><br>"
+            for a, b, c in versions[:20]
+        )
+        archives_page = "".join(
+            f'<A HREF="/php/downloads/releases/archives/php-7.{a % 5}.{c}-nts-Win32-vc15-x64.zip">'
+            f"php-7.{a % 5}.{c}-nts-Win32-vc15-x64.zip</A><br>"
+            for a, b, c in versions
+        )
+        catalogs["/php/downloads/releases/"] = (
+            f"<html><body><pre>{releases_page}</pre></body></html>"
+        )
+        catalogs["/php/downloads/releases/archives/"] = (
+            f"<html><body><pre>{archives_page}</pre></body></html>"
+        )
+
+        for owner, repo, tag_format, asset in (
+            ("oven-sh", "bun", "bun-v1.{a}.{c}", "bun-windows-x64.zip"),
+            ("denoland", "deno", "v1.{a}.{c}", "deno-x86_64-pc-windows-msvc.zip"),
+            ("godotengine", "godot", "4.{a}.{c}-stable", None),
+        ):
+            releases = []
+            for a, b, c in versions[:100]:
+                tag = tag_format.format(a=a, c=c)
+                name = asset or f"Godot_v4.{a}.{c}-stable_win64.exe.zip"
+                releases.append(
+                    {
+                        "tag_name": tag,
+                        "draft": False,
+                        "prerelease": False,
+                        "published_at": f"20{10 + a:02}-{b + 1:02}-{c + 1:02}T12:00:00Z",
+                        "assets": [
+                            {
+                                "name": name,
+                                "browser_download_url": f"{{base}}/github/download/{owner}/{repo}/{tag}/{name}",
+                            }
+                        ],
+                    }
+                )
+            catalogs[f"/github/repos/{owner}/{repo}/releases"] = json.dumps(releases)
+            for release in releases:
+                catalogs[
+                    f"/github/repos/{owner}/{repo}/releases/tags/{release['tag_name']}"
+                ] = json.dumps(release)
+        return catalogs
+
+    def _go_files(self, version: str, windows: bool):
+        files = [{"filename": f"{version}.linux-amd64.tar.gz", "os": "linux"}]
+        if windows:
+            filename = f"{version}.windows-amd64.zip"
+            data, sha256 = self.archive(filename)
+            files.append(
+                {
+                    "filename": filename,
+                    "os": "windows",
+                    "arch": "amd64",
+                    "kind": "archive",
+                    "sha256": sha256,
+                    "size": len(data),
+                }
+            )
+        return files
+
+    def catalog(self, path: str):
+        """The body of the catalog at path, or None"""
+        body = self._catalogs.get(path)
+        if callable(body):
+            body = self._catalogs[path] = body()
+        return body and body.replace("{base}", self.url)
+
+    # Archives
+
+    def _archive_layout(self, path: str):
+        """(root folder, executables) for an archive path, or None"""
+        name = path.rsplit("/", 1)[-1]
+        patterns = (
+            (
+                r"^node-(v[\d.]+)-win-x64\.(zip|7z|tar\.gz|tar\.xz)$",
+                lambda m: (f"node-{m[1]}-win-x64/", ["node.exe", "npm.ps1"]),
+            ),
+            (
+                r"^go[\d.]+\.windows-amd64\.zip$",
+                lambda m: ("go/", ["bin/go.exe", "bin/gofmt.exe"]),
+            ),
+            (
+                r"^python-.+-embed-amd64\.zip$",
+                lambda m: ("", ["python.exe", "pythonw.exe"]),
+            ),
+            (r"^php-.+\.zip$", lambda m: ("", ["php.exe", "php-cgi.exe"])),
+            (r"^bun-windows-x64\.zip$", lambda m: ("bun-windows-x64/", ["bun.exe"])),
+            (r"^deno-.+\.zip$", lambda m: ("", ["deno.exe"])),
+            (r"^(Godot_v.+_win64\.exe)\.zip$", lambda m: ("", [m[1]])),
+        )
+        for pattern, layout in patterns:
+            match = re.match(pattern, name)
+            if match:
+                return layout(match)
+        return None
+
+    def archive(self, path: str):
+        """(bytes, sha256) of the synthetic archive served at path"""
+        layout = self._archive_layout(path)
+        if layout is None:
+            return None
+        root, executables = layout
+        fmt = next(
+            (fmt for fmt in ("7z", "tar.gz", "tar.xz") if path.endswith("." + fmt)),
+            "zip",
+        )
+        if fmt != "zip" and fmt not in self.node_formats:
+            return None
+        key = (root, tuple(executables), fmt)
+        with self._archives_lock:
+            if key not in self._archives:
+                data = make_zip(root, executables, self.archive_size, self.file_count)
+                if fmt != "zip":
+                    data = repack(data, fmt)
+                self._archives[key] = (data, hashlib.sha256(data).hexdigest())
+            return self._archives[key]
+
+    def checksum_file(self, path: str):
+        """SHASUMS256.txt or <archive>.sha256 next to an archive"""
+        if path.endswith(".sha256"):
+            archive = self.archive(path[: -len(".sha256")])
+            return archive and archive[1]
+        if path.endswith("/SHASUMS256.txt"):
+            directory = path[: -len("SHASUMS256.txt")]
+            if directory.startswith("/nodejs/"):
+                tag = directory.rstrip("/").rsplit("/", 1)[-1]
+                lines = []
+                for fmt in self.node_formats:
+                    name = f"node-{tag}-win-x64.{fmt}"
+                    archive = self.archive(directory + name)
+                    if archive:
+                        lines.append(f"{archive[1]}  {name}\n")
+                return "".join(lines)
+            elif directory.startswith("/github/download/oven-sh/bun/"):
+                name = "bun-windows-x64.zip"
+            elif directory.startswith("/github/download/denoland/deno/"):
+                name = "deno-x86_64-pc-windows-msvc.zip"
+            else:
+                return None
+            return f"{self.archive(directory + name)[1]}  {name}\n"
+        return None
+
+    # HTTP
+
+    def _make_handler(self):
+        upstream = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _resolve(self):
+                parsed = urlparse(self.path)
+                path = parsed.path
+                body = upstream.catalog(path)
+                if body is not None:
+                    content_type = (
+                        "text/html" if path.startswith("/php/") else "application/json"
+                    )
+                    return body.encode(), content_type, True
+                checksum = upstream.checksum_file(path)
+                if checksum:
+                    return checksum.encode(), "text/plain", True
+                archive = upstream.archive(path)
+                if archive:
+                    return archive[0], "application/zip", False
+                return None, None, False
+
+            def _send(self, head_only: bool):
+                upstream.requests += 1
+                if upstream.latency:
+                    time.sleep(upstream.latency)
+
+                body, content_type, is_catalog = self._resolve()
+                if body is None:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                if (
+                    not is_catalog
+                    and upstream.fail_after is not None
+                    and upstream.archive_bytes_sent >= upstream.fail_after
+                ):
+                    self.send_response(503)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                etag = f'"{hashlib.sha1(body).hexdigest()}"'
+                if is_catalog and self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                status = 200
+                start, end = 0, len(body) - 1
+                range_header = self.headers.get("Range")
+                if range_header and not is_catalog:
+                    match = re.match(r"bytes=(\d+)-(\d*)", range_header)
+                    if match:
+                        status = 206
+                        start = int(match[1])
+                        end = int(match[2]) if match[2] else len(body) - 1
+
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(end - start + 1))
+                self.send_header("Accept-Ranges", "bytes")
+                self.send_header("ETag", etag)
+                if status == 206:
+                    self.send_header(
+                        "Content-Range", f"bytes {start}-{end}/{len(body)}"
+                    )
+                self.end_headers()
+                if not head_only:
+                    self._write(memoryview(body)[start : end + 1], not is_catalog)
+
+            def _write(self, data, is_archive=False):
+                if is_archive and upstream.fail_after is not None:
+                    allowed = max(upstream.fail_after - upstream.archive_bytes_sent, 0)
+                    upstream.archive_bytes_sent += min(len(data), allowed)
+                    if len(data) > allowed:
+                        # Send what is left of the budget, then hang up
+                        self._write(data[:allowed])
+                        self.close_connection = True
+                        return
+                if not upstream.bandwidth:
+                    self.wfile.write(data)
+                    return
+                # Pace each chunk so this connection stays under the bandwidth cap
+                started = time.perf_counter()
+                for offset in range(0, len(data), CHUNK_SIZE):
+                    self.wfile.write(data[offset : offset + CHUNK_SIZE])
+                    due = (offset + CHUNK_SIZE) / upstream.bandwidth
+                    delay = due - (time.perf_counter() - started)
+                    if delay > 0:
+                        time.sleep(delay)
+
+            def do_GET(self):
+                self._send(head_only=False)
+
+            def do_HEAD(self):
+                self._send(head_only=True)
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--bandwidth-mbps", type=float, default=0)
+    parser.add_argument("--archive-mb", type=float, default=32)
+    parser.add_argument("--files", type=int, default=500)
+    args = parser.parse_args()
+
+    upstream = FakeUpstream(
+        port=args.port,
+        latency=args.latency_ms / 1000,
+        bandwidth=args.bandwidth_mbps * 1e6 / 8 if args.bandwidth_mbps else None,
+        archive_size=int(args.archive_mb * 1024 * 1024),
+        file_count=args.files,
+    )
+    print(f"Serving fake upstreams at {upstream.url}")
+    upstream._server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Run every benchmark and write the results to one JSON file.
+
+Run from the repository root:
+
+    python -m benchmarks.run_all --output results.json
+    python -m benchmarks.run_all --output new.json --baseline results.json
+
+With --baseline, every timing is printed next to the baseline value with the
+ratio new/old, so regressions stand out (throughput ratios are inverted so
+above 1.0 always means slower).
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+BENCHMARKS = {
+    "versions": ["benchmarks.bench_versions", "--entries", "10000"],
+    "version_selector": ["benchmarks.bench_version_selector", "--entries", "10000"],
+    "catalog_parse": ["benchmarks.bench_catalog_parse", "--releases", "1000"],
+    "e2e": ["benchmarks.bench_e2e"],
+    "e2e_slow_network": [
+        "benchmarks.bench_e2e",
+        "--latency-ms",
+        "50",
+        "--bandwidth-mbps",
+        "200",
+        "--skip-gui",
+    ],
+}
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_benchmark(module_args):
+    result = subprocess.run(
+        [sys.executable, "-m", *module_args],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        error = (result.stderr.strip().splitlines() or ["failed"])[-1]
+        return {"error": error}
+    return json.loads(result.stdout)
+
+
+def flatten(results, prefix=""):
+    """{"a": {"b": {"median_ms": 1}}} -> {"a.b.median_ms": 1}"""
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(results, baseline):
+    """Print metric, baseline, new and slowdown ratio for shared timings"""
+    new = flatten(results["benchmarks"])
+    old = flatten(baseline["benchmarks"])
+    print(f"Baseline {baseline.get('commit')} -> {results.get('commit')}")
+    for name in sorted(new.keys() & old.keys()):
+        if not name.endswith(("_ms", "mb_per_s", ".ms")) or not old[name]:
+            continue
+        if not new[name]:
+            continue
+        ratio = new[name] / old[name]
+        if name.endswith("mb_per_s"):
+            ratio = 1 / ratio
+        marker = "  <-- slower" if ratio > 1.1 else ""
+        print(f"{name}: {old[name]} -> {new[name]} ({ratio:.2f}x){marker}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", default="benchmark-results.json")
+    parser.add_argument("--baseline", help="earlier results file to compare against")
+    parser.add_argument(
+        "--only", nargs="*", choices=sorted(BENCHMARKS), help="benchmarks to run"
+    )
+    args = parser.parse_args()
+
+    results = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "started": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "benchmarks": {},
+    }
+    for name, module_args in BENCHMARKS.items():
+        if args.only and name not in args.only:
+            continue
+        print(f"Running {name}...", file=sys.stderr)
+        results["benchmarks"][name] = run_benchmark(module_args)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}", file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
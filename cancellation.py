@@ -0,0 +1,79 @@
+"""Cooperative cancellation and pausing of installs.
+
+Whoever starts an install creates a CancelToken and runs the install inside
+cancel_scope(token). The download, verify, extract and delta code picks the
+token up with current_token() on the calling thread and hands it to its
+worker threads, checking it between chunks and files. check() raises
+InstallCancelled, which the install rolls back on; a paused token blocks
+there until resumed. Outside a scope current_token() is a token nobody can
+cancel, so code run without one (prefetch, tests) is unaffected.
+"""
+
+import threading
+from contextlib import contextmanager
+
+
+class InstallCancelled(Exception):
+    """The install was cancelled through its token"""
+
+
+class CancelToken:
+    """Cancel and pause flags shared by every thread of one install"""
+
+    def __init__(self):
+        # Set once check() has actually stopped the work
+        self.interrupted = False
+        self._cancelled = threading.Event()
+        self._running = threading.Event()
+        self._running.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    @property
+    def paused(self) -> bool:
+        return not self._running.is_set()
+
+    def cancel(self):
+        self._cancelled.set()
+        # Wake up anything waiting in a pause so it sees the cancellation
+        self._running.set()
+
+    def pause(self):
+        if not self.cancelled:
+            self._running.clear()
+
+    def resume(self):
+        self._running.set()
+
+    def check(self):
+        """Raise InstallCancelled if cancelled"""
+        if self._cancelled.is_set():
+            self.interrupted = True
+            raise InstallCancelled("Install cancelled")
+
+    def wait_if_paused(self):
+        """Block while paused, then raise InstallCancelled if cancelled meanwhile"""
+        self._running.wait()
+        self.check()
+
+
+_scope = threading.local()
+
+
+def current_token() -> CancelToken:
+    """The token of the install running on this thread"""
+    token = getattr(_scope, "token", None)
+    return token if token is not None else CancelToken()
+
+
+@contextmanager
+def cancel_scope(token: CancelToken):
+    """Make token the current one for code running on this thread"""
+    previous = getattr(_scope, "token", None)
+    _scope.token = token
+    try:
+        yield token
+    finally:
+        _scope.token = previous
@@ -0,0 +1,133 @@
+import hashlib
+import json
+import time
+from typing import Any, Callable, Dict, Optional
+import httpx
+from lock_manager import lock_manager
+from state_manager import CACHE_DIR
+from trace_manager import trace_manager
+
+
+class CatalogCache:
+    """Caches parsed upstream catalogs and revalidates them with conditional GETs.
+
+    Only the parsed result is stored, together with the ETag / Last-Modified
+    validators, so an unchanged catalog costs one 304 and no parsing.
+    """
+
+    def __init__(self):
+        self.cache_dir = CACHE_DIR / "catalogs"
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.client = httpx.Client(follow_redirects=True)
+
+    def _entry_path(self, url: str):
+        return self.cache_dir / f"{hashlib.sha1(url.encode()).hexdigest()}.json"
+
+    def _load_entry(self, url: str) -> Optional[Dict[str, Any]]:
+        path = self._entry_path(url)
+        if not path.exists():
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            return entry if entry.get("url") == url else None
+        except (json.JSONDecodeError, IOError) as e:
+            print(f"Warning: Could not load cached catalog for {url}: {e}")
+            return None
+
+    def _save_entry(self, entry: Dict[str, Any]):
+        try:
+            with open(self._entry_path(entry["url"]), "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+        except IOError as e:
+            print(f"Error: Could not save cached catalog for {entry['url']}: {e}")
+
+    def get_cached(self, url: str) -> Optional[Any]:
+        """Get the last parsed catalog for a URL without touching the network"""
+        entry = self._load_entry(url)
+        return entry["data"] if entry else None
+
+    def get_age(self, url: str) -> Optional[float]:
+        """Seconds since the catalog for a URL was last fetched or revalidated"""
+        entry = self._load_entry(url)
+        return time.time() - entry["fetched"] if entry else None
+
+    def fetch(
+        self,
+        url: str,
+        parse: Callable[[httpx.Response], Any],
+        max_age: float = None,
+        headers: Dict[str, str] = None,
+    ) -> Any:
+        """Fetch and parse a catalog, reusing the cached copy when it is unchanged.
+
+        parse receives the streaming response (use iter_text/iter_bytes) and
+        must return something JSON serialisable. If max_age is given and the
+        cached copy is younger than that, the network is skipped entirely. If
+        the request fails and a cached copy exists, the cached copy is returned.
+        Concurrent fetches of the same URL share one request; only the
+        first caller's parse runs.
+        """
+        return lock_manager.single_flight(
+            ("catalog", url), lambda: self._fetch(url, parse, max_age, headers)
+        )
+
+    def _fetch(
+        self,
+        url: str,
+        parse: Callable[[httpx.Response], Any],
+        max_age: float = None,
+        headers: Dict[str, str] = None,
+    ) -> Any:
+        entry = self._load_entry(url)
+        if (
+            entry is not None
+            and max_age is not None
+            and time.time() - entry["fetched"] < max_age
+        ):
+            return entry["data"]
+
+        request_headers = dict(headers or {})
+        if entry is not None:
+            if entry.get("etag"):
+                request_headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                request_headers["If-Modified-Since"] = entry["last_modified"]
+
+        with trace_manager.span("catalog_fetch", url=url) as span:
+            try:
+                with self.client.stream(
+                    "GET",
+                    url,
+                    headers=request_headers,
+                    extensions={"trace": trace_manager.http_trace()},
+                ) as response:
+                    span["status"] = response.status_code
+                    if response.status_code == 304 and entry is not None:
+                        entry["fetched"] = time.time()
+                        self._save_entry(entry)
+                        return entry["data"]
+
+                    response.raise_for_status()
+                    data = parse(response)
+                    span["bytes"] = response.num_bytes_downloaded
+                    self._save_entry(
+                        {
+                            "url": url,
+                            "etag": response.headers.get("ETag"),
+                            "last_modified": response.headers.get("Last-Modified"),
+                            "fetched": time.time(),
+                            "data": data,
+                        }
+                    )
+                    return data
+            except httpx.HTTPError as e:
+                if entry is not None:
+                    print(f"Warning: Using cached catalog for {url}: {e}")
+                    span["status"] = "stale"
+                    return entry["data"]
+                raise
+
+
+# Global catalog cache instance
+catalog_cache = CatalogCache()
@@ -0,0 +1,245 @@
+import os
+import shutil
+import sys
+import threading
+import zipfile
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List, Optional
+from disk_usage_manager import disk_usage_manager, format_size
+from download_manager import download_manager
+from lock_manager import lock_manager, version_key
+from state_manager import BASEDIR, state_manager
+from trace_manager import trace_manager
+from trash_manager import trash_manager
+from usage_manager import usage_manager
+
+COLD_DIR = BASEDIR / "cold"
+# Zstandard when the interpreter has it (3.14+), LZMA otherwise. Both compress
+# every member on its own, so thawing can decompress on several threads.
+COMPRESSION = getattr(zipfile, "ZIP_ZSTANDARD", zipfile.ZIP_LZMA)
+
+
+def rehydrate_command() -> List[str]:
+    """How a shim can ask GWEM to thaw a version (followed by --rehydrate app version)"""
+    if getattr(sys, "frozen", False):
+        return [sys.executable]
+    return [sys.executable, str(Path(__file__).resolve().parent / "main.py")]
+
+
+class ColdStorageManager:
+    """Packs versions that have not been used for a while into compressed archives.
+
+    A frozen version's directory is replaced by COLD_DIR/<app>/<version>.zip
+    and the version is marked cold in apps.json; it stays installed. Setting
+    it active (switch_version, or a shim through --rehydrate) thaws it with
+    the parallel zip extractor first. Versions unused for longer than the
+    "cold_storage_after_days" preference are frozen by freeze_unused();
+    the feature is off while the preference is unset.
+
+    Freezing holds the version's lock and commits under the app lock, so it
+    never races an install, uninstall or switch, in this process or another;
+    thawing happens under the app lock, which _set_active_version holds.
+    """
+
+    def __init__(self):
+        self.cold_dir = COLD_DIR
+        self._thread = None
+
+    def _archive_path(self, app_name: str, version: str) -> Path:
+        return self.cold_dir / app_name / f"{version}.zip"
+
+    def is_cold(self, app_name: str, version: str) -> bool:
+        return version in state_manager.get_app_cold_versions(app_name)
+
+    def freeze(self, app_name: str, version: str) -> int:
+        """Pack an installed, inactive version into cold storage.
+
+        Returns the bytes saved, or 0 if the version was left as it is,
+        including when something else is working on it right now.
+        """
+        with lock_manager.try_hold(version_key(app_name, version)) as free:
+            if not free:
+                print(f"Not freezing {app_name} {version}: it is in use")
+                return 0
+            state_manager.reload_app_state(app_name)
+            install_path = self._freezable_path(app_name, version)
+            if install_path is None:
+                return 0
+
+            archive = self._archive_path(app_name, version)
+            partial = archive.with_name(archive.name + ".partial")
+            with trace_manager.span("freeze", app=app_name, version=version) as span:
+                try:
+                    archive.parent.mkdir(parents=True, exist_ok=True)
+                    expanded, files = self._pack(install_path, partial)
+                except OSError as e:
+                    print(f"Warning: Could not freeze {app_name} {version}: {e}")
+                    partial.unlink(missing_ok=True)
+                    return 0
+                packed = partial.stat().st_size
+                span["bytes"] = expanded
+
+            # Packing took a while; switching to the version meanwhile wins
+            with lock_manager.app_lock(app_name):
+                state_manager.reload_app_state(app_name)
+                if self._freezable_path(app_name, version) is None:
+                    partial.unlink(missing_ok=True)
+                    return 0
+                try:
+                    os.replace(partial, archive)
+                    # Renaming into the trash fails if something still has files open
+                    trash_manager.discard(install_path)
+                except OSError as e:
+                    print(f"Warning: Could not freeze {app_name} {version}: {e}")
+                    partial.unlink(missing_ok=True)
+                    archive.unlink(missing_ok=True)
+                    return 0
+                state_manager.set_app_version_cold(
+                    app_name,
+                    version,
+                    {
+                        "archive": str(archive),
+                        "rehydrate": rehydrate_command(),
+                    },
+                )
+                disk_usage_manager.record_size(app_name, version, packed, files)
+
+        saved = max(0, expanded - packed)
+        print(
+            f"Froze {app_name} {version}: {format_size(expanded)} -> "
+            f"{format_size(packed)}"
+        )
+        return saved
+
+    def _freezable_path(self, app_name: str, version: str) -> Optional[Path]:
+        """The install directory of a version that may be frozen, or None"""
+        if self.is_cold(app_name, version):
+            return None
+        if state_manager.get_app_active_version(app_name) == version:
+            print(f"Not freezing {app_name} {version}: it is the active version")
+            return None
+        install_path = state_manager.get_app_installed_versions(app_name).get(version)
+        if not install_path or not Path(install_path).is_dir():
+            return None
+        return Path(install_path)
+
+    def _pack(self, source: Path, archive: Path):
+        """Zip a directory tree; returns (uncompressed bytes, file count)"""
+        expanded = 0
+        files = 0
+        with zipfile.ZipFile(archive, "w", COMPRESSION) as zip_ref:
+            for root, dirs, names in os.walk(source):
+                relative = Path(root).relative_to(source)
+                if not names and not dirs and relative.parts:
+                    zip_ref.write(root, relative.as_posix() + "/")
+                for name in names:
+                    path = Path(root) / name
+                    zip_ref.write(path, (relative / name).as_posix())
+                    expanded += path.stat().st_size
+                    files += 1
+        return expanded, files
+
+    def thaw(self, app_name: str, version: str) -> bool:
+        """Unpack a cold version back into its install directory.
+
+        Safe to call for versions that are not cold. Returns False if the
+        version could not be restored.
+        """
+        with lock_manager.app_lock(app_name):
+            # A shim may have thawed it from another process meanwhile
+            state_manager.reload_app_state(app_name)
+            entry = state_manager.get_app_cold_versions(app_name).get(version)
+            if entry is None:
+                return True
+            install_path = state_manager.get_app_installed_versions(app_name).get(
+                version
+            )
+            archive = Path(entry["archive"])
+            if not install_path or not archive.exists():
+                print(f"Error: Cold archive of {app_name} {version} is missing")
+                return False
+            install_path = Path(install_path)
+
+            with trace_manager.span("thaw", app=app_name, version=version):
+                if not install_path.exists():
+                    # Extract next to the target and rename, so a half-written
+                    # directory is never mistaken for the version
+                    staging = install_path.with_name(f".{install_path.name}.thaw")
+                    shutil.rmtree(staging, ignore_errors=True)
+                    try:
+                        members = download_manager.extract_zip(archive, staging)
+                        os.replace(staging, install_path)
+                    except (OSError, ValueError, zipfile.BadZipFile) as e:
+                        print(f"Error: Could not thaw {app_name} {version}: {e}")
+                        shutil.rmtree(staging, ignore_errors=True)
+                        return False
+                    disk_usage_manager.record_members(app_name, version, members)
+                else:
+                    disk_usage_manager.record_directory(app_name, version, install_path)
+
+            state_manager.set_app_version_cold(app_name, version, None)
+            archive.unlink(missing_ok=True)
+        print(f"Thawed {app_name} {version}")
+        return True
+
+    def discard(self, app_name: str, version: str):
+        """Delete the cold archive of a version that is being uninstalled"""
+        self._archive_path(app_name, version).unlink(missing_ok=True)
+        state_manager.set_app_version_cold(app_name, version, None)
+
+    def plan_freeze(self, app_name: str, after_days: float) -> List[str]:
+        """Versions of an app that have gone unused for longer than after_days"""
+        cutoff = datetime.now() - timedelta(days=after_days)
+        active_version = state_manager.get_app_active_version(app_name)
+        cold = state_manager.get_app_cold_versions(app_name)
+        shim_usage = usage_manager.get_app_usage(app_name)
+        candidates = []
+        for version in state_manager.get_app_installed_versions(app_name):
+            if version == active_version or version in cold:
+                continue
+            last_used = disk_usage_manager.get_last_used(app_name, version, shim_usage)
+            if last_used is not None and last_used < cutoff:
+                candidates.append(version)
+        return candidates
+
+    def freeze_unused(self) -> int:
+        """Freeze every version unused for longer than the preference allows.
+
+        Returns the bytes saved.
+        """
+        self._remove_orphans()
+        after_days = state_manager.get_preference("cold_storage_after_days")
+        if after_days is None:
+            return 0
+        saved = 0
+        for app_name in list(state_manager.get_installed_apps()):
+            for version in self.plan_freeze(app_name, after_days):
+                saved += self.freeze(app_name, version)
+        if saved:
+            print(f"Cold storage saved {format_size(saved)}")
+        return saved
+
+    def freeze_unused_async(self):
+        """Run freeze_unused on a background thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(
+            target=self.freeze_unused, name="cold-storage", daemon=True
+        )
+        self._thread.start()
+
+    def _remove_orphans(self):
+        """Delete archives of versions that were uninstalled while cold"""
+        if not self.cold_dir.exists():
+            return
+        for partial in self.cold_dir.glob("*/*.partial"):
+            partial.unlink(missing_ok=True)
+        for archive in self.cold_dir.glob("*/*.zip"):
+            app_name, version = archive.parent.name, archive.stem
+            if not self.is_cold(app_name, version):
+                archive.unlink(missing_ok=True)
+
+
+# Global cold storage manager instance
+cold_storage_manager = ColdStorageManager()
@@ -0,0 +1,195 @@
+import json
+import os
+import shutil
+import zipfile
+import zlib
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from cancellation import current_token
+from download_manager import download_manager, DownloadError, member_path
+from state_manager import BASEDIR, state_manager
+from trace_manager import trace_manager
+
+MANIFESTS_DIR = BASEDIR / "manifests"
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+class DeltaManager:
+    """Upgrades between close versions by fetching only the zip members that changed.
+
+    A per-file manifest (CRC32 and size of every member) is recorded when a
+    version is installed. An upgrade reads the new archive's central
+    directory over Range requests, reuses every file whose CRC and size
+    match the installed version (hardlinked or copied), and downloads only
+    the byte ranges of the members that differ. Member names are compared
+    with the version string replaced, so "node-v20.11.0-win-x64/node.exe"
+    matches "node-v20.11.1-win-x64/node.exe".
+    """
+
+    def __init__(self):
+        self.manifests_dir = MANIFESTS_DIR
+
+    def _manifest_path(self, app_name: str, version: str) -> Path:
+        return self.manifests_dir / app_name / f"{version}.json"
+
+    def record_manifest(
+        self,
+        app_name: str,
+        version: str,
+        members: List[zipfile.ZipInfo],
+        extend: bool = False,
+    ):
+        """Remember the CRC32 and size of every file extracted for a version.
+
+        With extend, the members are added to the existing manifest.
+        """
+        manifest = (self.load_manifest(app_name, version) or {}) if extend else {}
+        manifest.update(
+            {
+                info.filename: [info.CRC, info.file_size]
+                for info in members
+                if not info.is_dir()
+            }
+        )
+        path = self._manifest_path(app_name, version)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(manifest, f)
+        except IOError as e:
+            print(f"Warning: Could not save file manifest: {e}")
+
+    def load_manifest(self, app_name: str, version: str) -> Optional[Dict[str, list]]:
+        path = self._manifest_path(app_name, version)
+        if not path.exists():
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            print(f"Warning: Could not load file manifest: {e}")
+            return None
+
+    def remove_manifest(self, app_name: str, version: str = None):
+        if version is None:
+            shutil.rmtree(self.manifests_dir / app_name, ignore_errors=True)
+        else:
+            self._manifest_path(app_name, version).unlink(missing_ok=True)
+
+    def install_delta(
+        self,
+        app_name: str,
+        url: str,
+        base_version: str,
+        base_path: Path,
+        version: str,
+        install_path: Path,
+        select: Callable[[zipfile.ZipInfo], bool] = None,
+    ) -> Tuple[List[zipfile.ZipInfo], Dict[str, Any]]:
+        """Build install_path from base_path plus the changed members of url.
+
+        Only members accepted by select (all by default) are installed.
+        Returns the installed members and stats with the bytes saved.
+        Raises if the server does not accept Range requests or no manifest
+        exists for base_version; the caller then falls back to a full download.
+        """
+        manifest = self.load_manifest(app_name, base_version)
+        if manifest is None:
+            raise DownloadError(f"No file manifest for {app_name} {base_version}")
+
+        with trace_manager.span("delta", url=url) as span:
+            remote = download_manager.open_remote_zip(url)
+            with zipfile.ZipFile(remote) as zip_ref:
+                members = [
+                    info
+                    for info in zip_ref.infolist()
+                    if info.is_dir() or select is None or select(info)
+                ]
+                # The central directory comes from the network; check every name
+                targets = {
+                    info.filename: member_path(install_path, info.filename)
+                    for info in members
+                }
+                reused, changed = self._plan(
+                    members, manifest, base_version, base_path, version
+                )
+                modified = self._reuse_files(reused, targets)
+                changed += modified
+                download_manager.fetch_members(remote, zip_ref, changed)
+                for info in members:
+                    if info.is_dir():
+                        targets[info.filename].mkdir(parents=True, exist_ok=True)
+                    else:
+                        targets[info.filename].parent.mkdir(parents=True, exist_ok=True)
+                with trace_manager.span("extract", files=len(changed)) as extract:
+                    for info in changed:
+                        remote.token.wait_if_paused()
+                        zip_ref.extract(info, install_path)
+                    extract["bytes"] = sum(info.file_size for info in changed)
+
+            stats = {
+                "archive_bytes": remote.size,
+                "downloaded_bytes": remote.bytes_fetched,
+                "saved_bytes": max(0, remote.size - remote.bytes_fetched),
+                "requests": remote.requests,
+                "reused_files": len(reused) - len(modified),
+                "fetched_files": len(changed),
+            }
+            span.update(stats)
+            span["bytes"] = remote.bytes_fetched
+        return members, stats
+
+    def _plan(self, members, manifest, base_version, base_path, version):
+        """Split files into (info, old path) pairs to reuse and members to fetch"""
+        reused = []
+        changed = []
+        for info in members:
+            if info.is_dir():
+                continue
+            old_name = info.filename.replace(version, base_version)
+            old = manifest.get(old_name)
+            old_path = member_path(base_path, old_name)
+            if old == [info.CRC, info.file_size] and old_path.is_file():
+                reused.append((info, old_path))
+            else:
+                changed.append(info)
+        return reused, changed
+
+    def _reuse_files(self, reused, targets: Dict[str, Path]) -> List[zipfile.ZipInfo]:
+        """Hardlink or copy unchanged files; returns the ones that turned out modified.
+
+        targets maps member names to their checked paths under the install.
+        """
+        hardlink = state_manager.get_preference("delta_hardlinks", False)
+        token = current_token()
+        modified = []
+        with trace_manager.span("delta_reuse", files=len(reused)) as span:
+            for info, old_path in reused:
+                token.wait_if_paused()
+                target = targets[info.filename]
+                target.parent.mkdir(parents=True, exist_ok=True)
+                if hardlink and old_path.stat().st_size == info.file_size:
+                    try:
+                        os.link(old_path, target)
+                        continue
+                    except OSError:
+                        pass  # Different volume or no hardlink support; copy instead
+                if not self._copy_verified(old_path, target, info.CRC):
+                    target.unlink(missing_ok=True)
+                    modified.append(info)
+            span["bytes"] = sum(info.file_size for info, _ in reused)
+        return modified
+
+    def _copy_verified(self, source: Path, target: Path, crc: int) -> bool:
+        """Copy a file, checking it still has the CRC32 it was installed with"""
+        actual = 0
+        with open(source, "rb") as src, open(target, "wb") as dst:
+            for chunk in iter(lambda: src.read(COPY_CHUNK_SIZE), b""):
+                actual = zlib.crc32(chunk, actual)
+                dst.write(chunk)
+        shutil.copystat(source, target)
+        return actual == crc
+
+
+# Global delta manager instance
+delta_manager = DeltaManager()
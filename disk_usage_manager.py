@@ -0,0 +1,280 @@
+import json
+import os
+import zipfile
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+from lock_manager import lock_manager
+from state_manager import BASEDIR, state_manager
+from usage_manager import usage_manager
+from versions import parse_version
+
+
+def format_size(num_bytes: int) -> str:
+    """Format a byte count for display"""
+    size = float(num_bytes)
+    for unit in ["B", "KB", "MB", "GB"]:
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+class DiskUsageManager:
+    """Keeps a per app/version size index and applies pruning policies.
+
+    Sizes are recorded once at install time from the archive's uncompressed
+    member sizes, so the UI never has to walk APPS_DIR to show them. Plugin
+    workers record sizes too, so every change is applied to the index on
+    disk under a lock and the file is replaced in one go.
+    """
+
+    def __init__(self):
+        self.index_file = BASEDIR / "sizes.json"
+        self._index = self._load_index()
+
+    def reload(self):
+        """Re-read sizes.json, e.g. after another process wrote it"""
+        self._index = self._load_index()
+
+    def _load_index(self) -> Dict[str, Dict[str, Any]]:
+        """Load the size index from the sizes.json file"""
+        if self.index_file.exists():
+            try:
+                with open(self.index_file, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except (json.JSONDecodeError, IOError) as e:
+                print(f"Warning: Could not load size index: {e}")
+        return {}
+
+    def _update_index(self, change):
+        """Apply change(index) to the latest sizes.json and save it.
+
+        change returns False when it left the index as it was.
+        """
+        try:
+            with lock_manager.hold("sizes.json"):
+                index = self._load_index()
+                if change(index) is not False:
+                    partial = self.index_file.with_name(self.index_file.name + ".tmp")
+                    with open(partial, "w", encoding="utf-8") as f:
+                        json.dump(index, f, indent=2, ensure_ascii=False)
+                    os.replace(partial, self.index_file)
+        except IOError as e:
+            print(f"Error: Could not save size index: {e}")
+            return
+        # Replaced, never changed in place, so readers need no lock
+        self._index = index
+
+    def record_size(self, app_name: str, version: str, size: int, file_count: int):
+        """Record the size of an installed version"""
+
+        def record(index):
+            index.setdefault(app_name, {})[version] = {
+                "bytes": size,
+                "files": file_count,
+            }
+
+        self._update_index(record)
+
+    def record_members(
+        self, app_name: str, version: str, members: List[zipfile.ZipInfo]
+    ):
+        """Record the size of a version from the zip members that were extracted"""
+        members = [info for info in members if not info.is_dir()]
+        self.record_size(
+            app_name,
+            version,
+            sum(info.file_size for info in members),
+            len(members),
+        )
+
+    def record_directory(self, app_name: str, version: str, path) -> int:
+        """Walk an install directory once and record its size"""
+        size = 0
+        file_count = 0
+        for root, _, files in os.walk(path):
+            for name in files:
+                try:
+                    size += os.lstat(os.path.join(root, name)).st_size
+                    file_count += 1
+                except OSError:
+                    continue
+        self.record_size(app_name, version, size, file_count)
+        return size
+
+    def remove(self, app_name: str, version: str = None):
+        """Forget the size of one version, or of every version of an app"""
+
+        def forget(index):
+            if version is None:
+                return index.pop(app_name, None) is not None
+            return index.get(app_name, {}).pop(version, None) is not None
+
+        self._update_index(forget)
+
+    def get_version_size(
+        self, app_name: str, version: str, install_path: str = None
+    ) -> Optional[int]:
+        """Get the size of a version, measuring it once if it predates the index"""
+        entry = self._index.get(app_name, {}).get(version)
+        if entry is not None:
+            return entry["bytes"]
+        if install_path and Path(install_path).exists():
+            return self.record_directory(app_name, version, install_path)
+        return None
+
+    def get_app_sizes(self, app_name: str) -> Dict[str, int]:
+        """Get the size of every installed version of an app"""
+        installed_versions = state_manager.get_app_installed_versions(app_name)
+        sizes = {}
+        for version, install_path in installed_versions.items():
+            size = self.get_version_size(app_name, version, install_path)
+            if size is not None:
+                sizes[version] = size
+        return sizes
+
+    def get_app_size(self, app_name: str) -> int:
+        """Get the total size of all installed versions of an app"""
+        return sum(self.get_app_sizes(app_name).values())
+
+    def get_policy(self, app_name: str) -> Dict[str, Any]:
+        """Get the pruning policy for an app, falling back to the global one.
+
+        Recognised keys: 'keep_latest_per_major', 'max_unused_days' and
+        'max_total_bytes'. Missing keys disable that rule.
+        """
+        policies = state_manager.get_preference("prune_policies", {})
+        policy = dict(policies.get("*", {}))
+        policy.update(policies.get(app_name, {}))
+        return policy
+
+    def set_policy(self, app_name: str, policy: Dict[str, Any]):
+        """Set the pruning policy for an app ('*' for all apps)"""
+        policies = state_manager.get_preference("prune_policies", {})
+        policies[app_name] = policy
+        state_manager.set_preference("prune_policies", policies)
+
+    def plan_prune(
+        self, app_name: str, policy: Dict[str, Any] = None
+    ) -> List[Dict[str, Any]]:
+        """Work out which versions a policy would remove without touching anything.
+
+        Returns a list of { 'version', 'bytes', 'reason' } dicts. The active
+        version is never selected.
+        """
+        if policy is None:
+            policy = self.get_policy(app_name)
+
+        active_version = state_manager.get_app_active_version(app_name)
+        sizes = self.get_app_sizes(app_name)
+        installed = list(state_manager.get_app_installed_versions(app_name).keys())
+        candidates = [version for version in installed if version != active_version]
+        selected: Dict[str, str] = {}
+        # Read the shim usage log once, not once per version compared
+        shim_usage = usage_manager.get_app_usage(app_name)
+
+        keep_latest = policy.get("keep_latest_per_major")
+        if keep_latest is not None:
+            by_major: Dict[Any, List[str]] = {}
+            # The active version counts towards the kept versions of its major
+            for version in installed:
+                by_major.setdefault(parse_version(version).major, []).append(version)
+            for major, versions in by_major.items():
+                versions.sort(key=parse_version, reverse=True)
+                for version in versions[keep_latest:]:
+                    if version == active_version:
+                        continue
+                    selected[version] = (
+                        f"more than {keep_latest} version(s) of major {major}"
+                    )
+
+        max_unused_days = policy.get("max_unused_days")
+        if max_unused_days is not None:
+            cutoff = datetime.now() - timedelta(days=max_unused_days)
+            for version in candidates:
+                if version in selected:
+                    continue
+                last_used = self.get_last_used(app_name, version, shim_usage)
+                if last_used is not None and last_used < cutoff:
+                    selected[version] = f"unused for more than {max_unused_days} days"
+
+        max_total_bytes = policy.get("max_total_bytes")
+        if max_total_bytes is not None:
+            remaining = sum(
+                size for version, size in sizes.items() if version not in selected
+            )
+            # Evict the least recently used versions first
+            for version in sorted(
+                (v for v in candidates if v not in selected),
+                key=lambda v: self.get_last_used(app_name, v, shim_usage)
+                or datetime.min,
+            ):
+                if remaining <= max_total_bytes:
+                    break
+                selected[version] = f"total size above {format_size(max_total_bytes)}"
+                remaining -= sizes.get(version, 0)
+
+        return [
+            {"version": version, "bytes": sizes.get(version, 0), "reason": reason}
+            for version, reason in selected.items()
+        ]
+
+    def format_prune_report(self, app_name: str, plan: List[Dict[str, Any]]) -> str:
+        """Format a prune plan as a human readable dry-run report"""
+        if not plan:
+            return f"Nothing to prune for {app_name}."
+        lines = [f"Pruning {app_name} would remove:"]
+        for entry in plan:
+            lines.append(
+                f"  {entry['version']} ({format_size(entry['bytes'])}): {entry['reason']}"
+            )
+        total = sum(entry["bytes"] for entry in plan)
+        lines.append(f"Space reclaimed: {format_size(total)}")
+        return "\n".join(lines)
+
+    def prune(
+        self,
+        app_instance,
+        policy: Dict[str, Any] = None,
+        dry_run=True,
+        plan: List[Dict[str, Any]] = None,
+    ):
+        """Apply a pruning policy to an app instance. Returns the plan.
+
+        Pass the plan of an earlier dry run to remove exactly the versions it
+        listed, e.g. after the user confirmed them.
+        """
+        if plan is None:
+            plan = self.plan_prune(app_instance.app_name, policy)
+            print(self.format_prune_report(app_instance.app_name, plan))
+        if not dry_run:
+            for entry in plan:
+                app_instance.uninstall(entry["version"])
+        return plan
+
+    def get_last_used(
+        self, app_name: str, version: str, shim_usage: Dict[str, Any] = None
+    ) -> Optional[datetime]:
+        """When a version was last switched to or run through a shim.
+
+        shim_usage is usage_manager.get_app_usage(app_name), for callers
+        asking about many versions; it is read here if not given.
+        """
+        candidates = []
+        timestamp = state_manager.get_app_version_last_used(app_name, version)
+        if timestamp:
+            try:
+                candidates.append(datetime.fromisoformat(timestamp))
+            except ValueError:
+                pass
+        if shim_usage is None:
+            shim_usage = usage_manager.get_app_usage(app_name)
+        shim_entry = shim_usage.get(version)
+        if shim_entry and shim_entry["last_used"]:
+            candidates.append(datetime.fromtimestamp(shim_entry["last_used"]))
+        return max(candidates) if candidates else None
+
+
+# Global disk usage manager instance
+disk_usage_manager = DiskUsageManager()
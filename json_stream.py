@@ -0,0 +1,218 @@
+"""Incremental JSON parsing for large upstream catalogs.
+
+iter_items() walks a JSON document as text chunks arrive and yields the
+values at a path one by one, so a caller can use the first release before
+the response has finished downloading. Objects are built with only the keys
+in keep; everything else (release notes, asset lists, ...) is scanned past
+without being decoded or kept in memory.
+"""
+
+import json
+import re
+from typing import Any, Collection, Iterable, Iterator, List, Tuple
+
+PATH_TOKEN = re.compile(r"\.([^.\[\]]+)|\[(\*|\d+)\]")
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_STRING = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+_SKIPPABLE = re.compile(r'(?:[^"\[\]{}]+|"[^"\\]*(?:\\.[^"\\]*)*")*', re.DOTALL)
+_SCALAR = re.compile(r"[-+0-9.eE]+|true|false|null")
+_LITERALS = {"true": True, "false": False, "null": None}
+# Drop consumed text from the buffer once this much has piled up
+_COMPACT_AT = 64 * 1024
+
+
+def parse_path(path: str) -> List[Tuple[str, str]]:
+    """Split a JSONPath subset ($, .key, [*], [n]) into (key, index) steps"""
+    return PATH_TOKEN.findall(path.lstrip("$"))
+
+
+class _Lexer:
+    """Tokens over a text buffer that is refilled from the chunk iterator"""
+
+    def __init__(self, chunks: Iterable[str]):
+        self.chunks = iter(chunks)
+        self.buffer = ""
+        self.pos = 0
+        self.done = False
+
+    def _fill(self) -> bool:
+        if self.done:
+            return False
+        for chunk in self.chunks:
+            if chunk:
+                if self.pos >= _COMPACT_AT:
+                    self.buffer = self.buffer[self.pos :]
+                    self.pos = 0
+                self.buffer += chunk
+                return True
+        self.done = True
+        return False
+
+    def peek(self) -> str:
+        """The next significant character, or "" at the end of the document"""
+        while True:
+            self.pos = _WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ""
+
+    def peek_value(self) -> str:
+        """Like peek, but the document must not end here"""
+        char = self.peek()
+        if not char:
+            self._error("unexpected end of document")
+        return char
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            self._error(f"expected {char!r}")
+        self.pos += 1
+
+    def raw_string(self) -> str:
+        """Consume a string token and return it still quoted and escaped"""
+        self.peek()
+        while True:
+            match = _STRING.match(self.buffer, self.pos)
+            if match:
+                self.pos = match.end()
+                return match.group()
+            if not self._fill():
+                self._error("unterminated string")
+
+    def scalar(self) -> Any:
+        self.peek()
+        while True:
+            match = _SCALAR.match(self.buffer, self.pos)
+            # A number may continue in the next chunk
+            if match and (match.end() < len(self.buffer) or not self._fill()):
+                self.pos = match.end()
+                token = match.group()
+                if token in _LITERALS:
+                    return _LITERALS[token]
+                return json.loads(token)
+            if not match and not self._fill():
+                self._error("unexpected value")
+
+    def _error(self, message: str):
+        raise ValueError(f"Invalid JSON: {message} at offset {self.pos}")
+
+
+def _decode_string(raw: str) -> str:
+    return raw[1:-1] if "\\" not in raw else json.loads(raw)
+
+
+def _skip_value(lexer: _Lexer):
+    """Consume a value without building it"""
+    char = lexer.peek_value()
+    if char == '"':
+        lexer.raw_string()
+    elif char in "{[":
+        # Only brackets outside strings matter; jump over everything else,
+        # strings included, in one regex call
+        depth = 0
+        while True:
+            lexer.pos = _SKIPPABLE.match(lexer.buffer, lexer.pos).end()
+            if lexer.pos >= len(lexer.buffer) or lexer.buffer[lexer.pos] == '"':
+                # The buffer ends, possibly in the middle of a string
+                if not lexer._fill():
+                    lexer._error("unexpected end of document")
+                continue
+            char = lexer.buffer[lexer.pos]
+            lexer.pos += 1
+            depth += 1 if char in "{[" else -1
+            if depth == 0:
+                return
+    else:
+        lexer.scalar()
+
+
+def _read_value(lexer: _Lexer, keep: Collection[str] = None) -> Any:
+    """Build a value; for an object, only the keys in keep (all if None)"""
+    char = lexer.peek_value()
+    if char == '"':
+        return _decode_string(lexer.raw_string())
+    if char == "{":
+        result = {}
+        for key in _iter_object(lexer):
+            if keep is None or key in keep:
+                result[key] = _read_value(lexer)
+            else:
+                _skip_value(lexer)
+        return result
+    if char == "[":
+        return [_read_value(lexer) for _ in _iter_array(lexer)]
+    return lexer.scalar()
+
+
+def _iter_object(lexer: _Lexer) -> Iterator[str]:
+    """Yield each key of an object; the caller must consume its value"""
+    lexer.expect("{")
+    if lexer.peek() == "}":
+        lexer.pos += 1
+        return
+    while True:
+        key = _decode_string(lexer.raw_string())
+        lexer.expect(":")
+        yield key
+        if lexer.peek() == ",":
+            lexer.pos += 1
+        else:
+            lexer.expect("}")
+            return
+
+
+def _iter_array(lexer: _Lexer) -> Iterator[int]:
+    """Yield each index of an array; the caller must consume its element"""
+    lexer.expect("[")
+    if lexer.peek() == "]":
+        lexer.pos += 1
+        return
+    index = 0
+    while True:
+        yield index
+        index += 1
+        if lexer.peek() == ",":
+            lexer.pos += 1
+        else:
+            lexer.expect("]")
+            return
+
+
+def _walk(lexer: _Lexer, steps, keep) -> Iterator[Any]:
+    if not steps:
+        yield _read_value(lexer, keep)
+        return
+    (key, index), rest = steps[0], steps[1:]
+    char = lexer.peek()
+    if key and char == "{":
+        for name in _iter_object(lexer):
+            if name == key:
+                yield from _walk(lexer, rest, keep)
+            else:
+                _skip_value(lexer)
+    elif not key and char == "[":
+        for position in _iter_array(lexer):
+            if index == "*" or position == int(index):
+                yield from _walk(lexer, rest, keep)
+            else:
+                _skip_value(lexer)
+    else:
+        _skip_value(lexer)
+
+
+def iter_items(
+    chunks: Iterable[str], path: str = "$", keep: Collection[str] = None
+) -> Iterator[Any]:
+    """Yield the values at path as soon as each one has been parsed.
+
+    chunks is any iterable of text, e.g. response.iter_text(). Objects
+    yielded keep only the keys in keep (all keys if None); keep applies to
+    the yielded objects themselves, not to values nested inside them.
+    Raises ValueError on malformed JSON.
+    """
+    lexer = _Lexer(chunks)
+    yield from _walk(lexer, parse_path(path), keep)
+    if lexer.peek() != "":
+        lexer._error("trailing data")
@@ -0,0 +1,191 @@
+import re
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from contextlib import contextmanager
+from typing import Callable, Dict, Hashable, Iterator, TypeVar
+from cancellation import InstallCancelled, current_token
+from state_manager import BASEDIR
+
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+    import fcntl
+
+LOCKS_DIR = BASEDIR / "locks"
+# How often a waiting thread looks at its cancel token
+WAIT_POLL = 0.1
+
+T = TypeVar("T")
+
+
+def version_key(app_name: str, version: str) -> str:
+    return f"{app_name}@{version}"
+
+
+def safe_name(key: str) -> str:
+    """key made safe as a file name; locking it locks the same file"""
+    return re.sub(r"[^\w.@-]", "_", key)
+
+
+def _try_lock_file(f) -> bool:
+    try:
+        if msvcrt:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except OSError:
+        return False
+
+
+def _unlock_file(f):
+    if msvcrt:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class _KeyLock:
+    """A reentrant lock for one key, backed by a lock file for other processes"""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.RLock()
+        self.depth = 0
+        self.file = None
+
+    def acquire(self, cancellable: bool, wait: bool = True) -> bool:
+        token = current_token() if cancellable else None
+        while not self.lock.acquire(timeout=WAIT_POLL if wait else 0):
+            if not wait:
+                return False
+            if token:
+                token.check()
+        if self.depth == 0:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self.file = open(self.path, "a+b")
+                while not _try_lock_file(self.file):
+                    if not wait:
+                        self.file.close()
+                        self.file = None
+                        self.lock.release()
+                        return False
+                    if token:
+                        token.check()
+                    time.sleep(WAIT_POLL)
+            except BaseException:
+                if self.file is not None:
+                    self.file.close()
+                    self.file = None
+                self.lock.release()
+                raise
+        self.depth += 1
+        return True
+
+    def release(self):
+        self.depth -= 1
+        if self.depth == 0:
+            _unlock_file(self.file)
+            self.file.close()
+            self.file = None
+        self.lock.release()
+
+
+class LockManager:
+    """Coordinates operations that must not overlap, within and across processes.
+
+    app_lock() guards an app's state (active version, installed versions)
+    and version_lock() one version's install or uninstall; both are
+    reentrant per thread and also held against other GWEM processes through
+    lock files in LOCKS_DIR. Take a version lock before the app lock, never
+    the other way round.
+
+    single_flight() coalesces identical work in progress: a caller asking
+    for a key that is already being computed waits for that result instead
+    of starting its own.
+    """
+
+    def __init__(self):
+        self._guard = threading.Lock()
+        self._locks: Dict[str, _KeyLock] = {}
+        self._flights: Dict[Hashable, Future] = {}
+
+    def _key_lock(self, key: str) -> _KeyLock:
+        with self._guard:
+            if key not in self._locks:
+                self._locks[key] = _KeyLock(LOCKS_DIR / f"{safe_name(key)}.lock")
+            return self._locks[key]
+
+    @contextmanager
+    def hold(self, key: str, cancellable: bool = False):
+        """Hold the lock for key. A cancellable wait stops with InstallCancelled
+        when the current cancel token is cancelled."""
+        lock = self._key_lock(key)
+        lock.acquire(cancellable)
+        try:
+            yield
+        finally:
+            lock.release()
+
+    @contextmanager
+    def try_hold(self, key: str) -> Iterator[bool]:
+        """Hold the lock for key only if nobody else does; yields whether it did"""
+        lock = self._key_lock(key)
+        held = lock.acquire(cancellable=False, wait=False)
+        try:
+            yield held
+        finally:
+            if held:
+                lock.release()
+
+    def app_lock(self, app_name: str, cancellable: bool = False):
+        return self.hold(app_name, cancellable)
+
+    def version_lock(self, app_name: str, version: str, cancellable: bool = True):
+        return self.hold(version_key(app_name, version), cancellable)
+
+    def single_flight(self, key: Hashable, function: Callable[[], T]) -> T:
+        """Run function, or share the result of the same key already running.
+
+        Followers get the leader's return value or exception. If the leader
+        was cancelled through its own token, a follower that was not runs
+        function itself.
+        """
+        token = current_token()
+        while True:
+            with self._guard:
+                future = self._flights.get(key)
+                leader = future is None
+                if leader:
+                    future = self._flights[key] = Future()
+
+            if leader:
+                try:
+                    result = function()
+                except BaseException as e:
+                    future.set_exception(e)
+                    raise
+                else:
+                    future.set_result(result)
+                    return result
+                finally:
+                    with self._guard:
+                        del self._flights[key]
+
+            try:
+                while True:
+                    try:
+                        return future.result(timeout=WAIT_POLL)
+                    except FutureTimeout:
+                        token.check()
+            except InstallCancelled:
+                token.check()
+
+
+# Global lock manager instance
+lock_manager = LockManager()
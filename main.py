@@ -6,7 +6,16 @@ from widgets.categories.CodeEditors import CodeEditors
 from widgets.categories.Plugins import Plugins
 from widgets.categories.GameEngines import GameEngines
 from state_manager import state_manager, PATH_DIR
+from trash_manager import trash_manager
+from plugin_host import plugin_host
+from update_manager import update_manager
+from cold_storage_manager import cold_storage_manager
+from peer_cache_manager import peer_cache_manager
+from staging_manager import staging_manager
+from stall_watchdog import stall_watchdog, is_enabled as stall_watchdog_enabled
+import multiprocessing
 import os
+import sys
 
 styles = """
 QMainWindow {
@@ -304,9 +313,18 @@ class MainWindow(QtWidgets.QMainWindow):
 
 
 if __name__ == "__main__":
+    # Plugin workers are spawned from the frozen executable too
+    multiprocessing.freeze_support()
+    # Shims run "GWEM --rehydrate <app> <version>" to thaw a cold version
+    if len(sys.argv) == 4 and sys.argv[1] == "--rehydrate":
+        sys.exit(0 if cold_storage_manager.thaw(sys.argv[2], sys.argv[3]) else 1)
     PATH_DIR.mkdir(parents=True, exist_ok=True)
+    trash_manager.recover()
+    staging_manager.recover()
 
     app = QtWidgets.QApplication([])
+    if stall_watchdog_enabled():
+        stall_watchdog.start()
 
     if str(PATH_DIR) not in os.environ.get("PATH", ""):
         print(os.environ.get("PATH", ""))
@@ -325,5 +343,12 @@ if __name__ == "__main__":
     window = MainWindow()
     window.setWindowIcon(icon)
     window.show()
+    update_manager.start()
+    peer_cache_manager.start()
+    cold_storage_manager.freeze_unused_async()
 
     app.exec()
+    update_manager.stop()
+    peer_cache_manager.stop()
+    stall_watchdog.stop()
+    plugin_host.shutdown()
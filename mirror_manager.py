@@ -0,0 +1,152 @@
+import json
+import threading
+import time
+from typing import Any, Dict, List
+import httpx
+from state_manager import BASEDIR, state_manager
+
+# Bytes fetched from each mirror to estimate its throughput
+PROBE_BYTES = 256 * 1024
+PROBE_TIMEOUT = 5.0
+DEFAULT_PROBE_INTERVAL = 24 * 60 * 60
+
+
+class MirrorManager:
+    """Ranks the mirrors of a provider by measured latency and throughput.
+
+    A provider lists base URLs that serve the same file tree. The first
+    time an archive is needed, and again once the results are older than
+    the "mirror_probe_interval" preference (seconds), every mirror is
+    probed in parallel: a HEAD for latency, then a ranged GET of the first
+    PROBE_BYTES of the same file for throughput. Results are kept per
+    provider in mirrors.json. Mirrors only serve archives; catalogs and
+    checksums keep coming from the origin, so a mirror cannot change what
+    gets verified.
+    """
+
+    def __init__(self):
+        self.mirrors_file = BASEDIR / "mirrors.json"
+        self._results = self._load_results()
+        self._lock = threading.Lock()
+
+    def _load_results(self) -> Dict[str, Dict[str, Any]]:
+        if self.mirrors_file.exists():
+            try:
+                with open(self.mirrors_file, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except (json.JSONDecodeError, IOError) as e:
+                print(f"Warning: Could not load mirror results: {e}")
+        return {}
+
+    def _save_results(self):
+        try:
+            with open(self.mirrors_file, "w", encoding="utf-8") as f:
+                json.dump(self._results, f, indent=2)
+        except IOError as e:
+            print(f"Error: Could not save mirror results: {e}")
+
+    def mirror_urls(self, name: str, mirrors: List[str], url: str) -> List[str]:
+        """Every mirror's copy of url (which starts with mirrors[0]), fastest first"""
+        if len(mirrors) < 2 or not url.startswith(mirrors[0]):
+            return [url]
+        path = url[len(mirrors[0]) :]
+        return [base + path for base in self.order(name, mirrors, path)]
+
+    def order(self, name: str, mirrors: List[str], path: str) -> List[str]:
+        """Mirror base URLs fastest first, probing with path if results are stale"""
+        interval = state_manager.get_preference(
+            "mirror_probe_interval", DEFAULT_PROBE_INTERVAL
+        )
+        with self._lock:
+            entry = self._results.get(name)
+        if (
+            entry is None
+            or set(entry["results"]) != set(mirrors)
+            or time.time() - entry["probed"] > interval
+        ):
+            entry = {"probed": time.time(), "results": self.probe(mirrors, path)}
+            with self._lock:
+                self._results[name] = entry
+                self._save_results()
+            print(f"Mirrors for {name}: {self.format_results(mirrors, entry)}")
+
+        results = entry["results"]
+        # Unreachable mirrors last, otherwise by estimated time for the probe;
+        # ties keep the configured order
+        return sorted(
+            mirrors,
+            key=lambda base: (
+                "error" in results[base],
+                results[base].get("score", 0),
+            ),
+        )
+
+    def probe(self, mirrors: List[str], path: str) -> Dict[str, Dict[str, Any]]:
+        """Measure every mirror in parallel"""
+        results = {}
+
+        def measure(base: str):
+            results[base] = self._probe_one(base + path)
+
+        threads = [
+            threading.Thread(target=measure, args=(base,), name="mirror-probe")
+            for base in mirrors
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return {base: results[base] for base in mirrors}
+
+    def _probe_one(self, url: str) -> Dict[str, Any]:
+        try:
+            with httpx.Client(follow_redirects=True, timeout=PROBE_TIMEOUT) as client:
+                started = time.perf_counter()
+                response = client.head(url)
+                response.raise_for_status()
+                latency = time.perf_counter() - started
+
+                started = time.perf_counter()
+                received = 0
+                with client.stream(
+                    "GET", url, headers={"Range": f"bytes=0-{PROBE_BYTES - 1}"}
+                ) as response:
+                    response.raise_for_status()
+                    for chunk in response.iter_bytes():
+                        received += len(chunk)
+                        if received >= PROBE_BYTES:
+                            break
+                elapsed = max(time.perf_counter() - started, 1e-6)
+        except httpx.HTTPError as e:
+            return {"error": str(e) or type(e).__name__}
+
+        throughput = received / elapsed
+        return {
+            "latency_ms": round(latency * 1000, 1),
+            "mb_per_s": round(throughput / 1024 / 1024, 2),
+            # Time to set up a request and fetch the probe, lower is better
+            "score": round(latency + PROBE_BYTES / max(throughput, 1), 4),
+        }
+
+    def format_results(self, mirrors: List[str], entry: Dict[str, Any]) -> str:
+        parts = []
+        for base in mirrors:
+            result = entry["results"][base]
+            if "error" in result:
+                parts.append(f"{base} unreachable")
+            else:
+                parts.append(
+                    f"{base} {result['latency_ms']:.0f} ms, "
+                    f"{result['mb_per_s']:.1f} MB/s"
+                )
+        return "; ".join(parts)
+
+    def forget(self, name: str):
+        """Drop the results of a provider so the next download probes again"""
+        with self._lock:
+            if self._results.pop(name, None) is not None:
+                self._save_results()
+
+
+# Global mirror manager instance
+mirror_manager = MirrorManager()
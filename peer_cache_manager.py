@@ -0,0 +1,302 @@
+import hashlib
+import http.server
+import os
+import re
+import secrets
+import shutil
+import socket
+import threading
+import time
+from pathlib import Path
+from typing import List, Tuple
+import httpx
+from cancellation import current_token
+from state_manager import state_manager, CACHE_DIR
+
+# Verified archives shared with peers, named by their sha256
+PEER_CACHE_DIR = CACHE_DIR / "peer"
+DEFAULT_PORT = 47651
+DISCOVERY_PORT = 47650
+DISCOVERY_MAGIC = b"GWEM-PEER"
+# How long a broadcast waits for answers, and how long the answers are reused
+DISCOVERY_TIMEOUT = 0.5
+DISCOVERY_INTERVAL = 5 * 60
+PEER_TIMEOUT = 2.0
+DEFAULT_MAX_SIZE_MB = 4096
+CHUNK_SIZE = 256 * 1024
+SHA256_NAME = re.compile(r"[0-9a-f]{64}")
+
+
+class PeerCacheManager:
+    """Shares verified archives between GWEM instances on the local network.
+
+    Opt-in through the "peer_cache" preference. Every archive that
+    download_manager has verified against an upstream checksum is kept in
+    PEER_CACHE_DIR and served at http://<host>:<port>/archives/<sha256>,
+    port from "peer_cache_port". Before downloading an archive whose
+    checksum is known, the local cache and then the peers are asked for it:
+    those listed in "peer_cache_peers" ("host:port") and, unless
+    "peer_cache_broadcast" is off, those answering a UDP broadcast. A copy
+    from a peer is only used if it hashes to the upstream checksum, so peers
+    save bandwidth but cannot change what gets installed. The cache is
+    trimmed to "peer_cache_max_mb", least recently used first.
+    """
+
+    def __init__(self):
+        self.instance_id = secrets.token_hex(8).encode()
+        self._server = None
+        self._responder = None
+        self._stopping = threading.Event()
+        self._discovered: List[str] = []
+        self._discovered_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(state_manager.get_preference("peer_cache", False))
+
+    @property
+    def port(self) -> int:
+        return int(state_manager.get_preference("peer_cache_port", DEFAULT_PORT))
+
+    def path_for(self, sha256: str) -> Path:
+        return PEER_CACHE_DIR / sha256.lower()
+
+    def start(self):
+        """Serve the cache and answer discovery broadcasts, if enabled"""
+        if not self.enabled or self._server is not None:
+            return
+        PEER_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        try:
+            self._server = http.server.ThreadingHTTPServer(
+                ("", self.port), self._make_handler()
+            )
+        except OSError as e:
+            print(f"Warning: Could not serve the peer cache on port {self.port}: {e}")
+            return
+        self._server.daemon_threads = True
+        self._stopping.clear()
+        threading.Thread(
+            target=self._server.serve_forever, name="peer-cache", daemon=True
+        ).start()
+        if state_manager.get_preference("peer_cache_broadcast", True):
+            self._responder = threading.Thread(
+                target=self._answer_discovery, name="peer-discovery", daemon=True
+            )
+            self._responder.start()
+        print(f"Sharing archive cache with peers on port {self.port}")
+
+    def stop(self):
+        self._stopping.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self._responder is not None:
+            self._responder.join(timeout=DISCOVERY_TIMEOUT * 2)
+            self._responder = None
+
+    def _make_handler(self):
+        manager = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, head_only: bool):
+                name = self.path.removeprefix("/archives/")
+                path = manager.path_for(name)
+                if not SHA256_NAME.fullmatch(name) or not path.is_file():
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                # Serving counts as a use for the least recently used trim
+                os.utime(path)
+                self.send_response(200)
+                self.send_header("Content-Type", "application/octet-stream")
+                self.send_header("Content-Length", str(path.stat().st_size))
+                self.end_headers()
+                if not head_only:
+                    with open(path, "rb") as f:
+                        shutil.copyfileobj(f, self.wfile, CHUNK_SIZE)
+
+            def do_GET(self):
+                self._send(head_only=False)
+
+            def do_HEAD(self):
+                self._send(head_only=True)
+
+        return Handler
+
+    def _discovery_socket(self) -> socket.socket:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if hasattr(socket, "SO_REUSEPORT"):
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        return sock
+
+    def _answer_discovery(self):
+        try:
+            sock = self._discovery_socket()
+            sock.bind(("", DISCOVERY_PORT))
+        except OSError as e:
+            print(f"Warning: Peer discovery unavailable: {e}")
+            return
+        sock.settimeout(DISCOVERY_TIMEOUT)
+        with sock:
+            while not self._stopping.is_set():
+                try:
+                    data, address = sock.recvfrom(256)
+                except socket.timeout:
+                    continue
+                except OSError:
+                    return
+                magic, _, sender = data.partition(b"?")
+                if magic == DISCOVERY_MAGIC and sender != self.instance_id:
+                    reply = DISCOVERY_MAGIC + b" " + str(self.port).encode()
+                    try:
+                        sock.sendto(reply, address)
+                    except OSError:
+                        pass
+
+    def discover(self) -> List[str]:
+        """Broadcast for peers and collect the "host:port" of those answering"""
+        peers = []
+        try:
+            with self._discovery_socket() as sock:
+                sock.settimeout(DISCOVERY_TIMEOUT)
+                sock.sendto(
+                    DISCOVERY_MAGIC + b"?" + self.instance_id,
+                    ("<broadcast>", DISCOVERY_PORT),
+                )
+                deadline = time.monotonic() + DISCOVERY_TIMEOUT
+                while time.monotonic() < deadline:
+                    try:
+                        data, (host, _) = sock.recvfrom(256)
+                    except socket.timeout:
+                        break
+                    magic, _, port = data.partition(b" ")
+                    if magic == DISCOVERY_MAGIC and port.isdigit():
+                        peer = f"{host}:{int(port)}"
+                        if peer not in peers:
+                            peers.append(peer)
+        except OSError as e:
+            print(f"Warning: Peer discovery failed: {e}")
+        return peers
+
+    def peers(self) -> List[str]:
+        """Configured peers, then discovered ones (rediscovered now and then)"""
+        peers = list(state_manager.get_preference("peer_cache_peers", []))
+        if state_manager.get_preference("peer_cache_broadcast", True):
+            with self._lock:
+                if time.monotonic() - self._discovered_at > DISCOVERY_INTERVAL:
+                    self._discovered = self.discover()
+                    self._discovered_at = time.monotonic()
+                discovered = self._discovered
+            peers += [peer for peer in discovered if peer not in peers]
+        return peers
+
+    def fetch(self, sha256: str, destination: Path) -> bool:
+        """Fill destination from the local cache or a peer; False if none has it"""
+        if not self.enabled:
+            return False
+        local = self.path_for(sha256)
+        if local.is_file() and self._hash(local) == sha256.lower():
+            shutil.copyfile(local, destination)
+            os.utime(local)
+            print(f"Using cached archive {sha256[:12]}")
+            return True
+        for peer in self.peers():
+            found, received = self._fetch_from(peer, sha256, destination)
+            if found:
+                print(f"Downloaded {received} bytes from peer {peer}")
+                return True
+        return False
+
+    def _fetch_from(
+        self, peer: str, sha256: str, destination: Path
+    ) -> Tuple[bool, int]:
+        token = current_token()
+        digest = hashlib.sha256()
+        received = 0
+        try:
+            with httpx.stream(
+                "GET",
+                f"http://{peer}/archives/{sha256.lower()}",
+                timeout=PEER_TIMEOUT,
+            ) as response:
+                if response.status_code != 200:
+                    return False, 0
+                with open(destination, "wb") as f:
+                    for chunk in response.iter_bytes(CHUNK_SIZE):
+                        token.check()
+                        f.write(chunk)
+                        digest.update(chunk)
+                        received += len(chunk)
+        except httpx.HTTPError as e:
+            print(f"Warning: Peer {peer} unavailable: {e}")
+            destination.unlink(missing_ok=True)
+            return False, 0
+        if digest.hexdigest() != sha256.lower():
+            print(f"Warning: Peer {peer} sent an archive not matching {sha256[:12]}")
+            destination.unlink(missing_ok=True)
+            return False, 0
+        return True, received
+
+    def store(self, path: Path, sha256: str):
+        """Keep a copy of an archive verified against sha256 for peers"""
+        if not self.enabled:
+            return
+        target = self.path_for(sha256)
+        if target.exists():
+            os.utime(target)
+            return
+        PEER_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        partial = target.with_name(target.name + ".part")
+        try:
+            try:
+                # The archive is deleted after extracting; a hard link keeps it
+                os.link(path, partial)
+            except OSError:
+                shutil.copyfile(path, partial)
+            os.replace(partial, target)
+        except OSError as e:
+            print(f"Warning: Could not add archive to the peer cache: {e}")
+            partial.unlink(missing_ok=True)
+            return
+        self.trim()
+
+    def trim(self):
+        """Delete least recently used archives until under peer_cache_max_mb"""
+        limit = (
+            state_manager.get_preference("peer_cache_max_mb", DEFAULT_MAX_SIZE_MB)
+            * 1024
+            * 1024
+        )
+        entries = [
+            (entry.stat().st_mtime, entry.stat().st_size, entry)
+            for entry in PEER_CACHE_DIR.iterdir()
+            if SHA256_NAME.fullmatch(entry.name)
+        ]
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries, key=lambda item: item[0]):
+            if total <= limit:
+                break
+            entry.unlink(missing_ok=True)
+            total -= size
+
+    @staticmethod
+    def _hash(path: Path) -> str:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+
+# Global peer cache manager instance
+peer_cache_manager = PeerCacheManager()
@@ -0,0 +1,401 @@
+"""Runs plugin code in worker processes.
+
+Plugins make network calls and write files; running them in the GUI process
+means a hung request or a crash takes GWEM down with it. PluginHost keeps a
+small pool of worker processes that import plugins on demand and answer calls
+over a pipe. Every call has a timeout and can be cancelled; a worker that
+times out, is cancelled or dies is killed and replaced on the next call.
+"""
+
+import itertools
+import multiprocessing
+import queue
+import threading
+import time
+import traceback
+from concurrent.futures import CancelledError, Future, wait
+from typing import Any, Dict, Optional
+from cancellation import current_token
+
+# Per-call timeouts in seconds; None waits forever
+DEFAULT_TIMEOUT = 60
+CATALOG_TIMEOUT = 30
+INSTALL_TIMEOUT = 30 * 60
+POLL_INTERVAL = 0.05
+
+
+class PluginCallError(Exception):
+    """A plugin call failed; remote_traceback holds the worker's traceback"""
+
+    def __init__(self, message: str, remote_traceback: str = ""):
+        super().__init__(message)
+        self.remote_traceback = remote_traceback
+
+
+class PluginCallTimeout(PluginCallError):
+    """A plugin call did not finish within its timeout"""
+
+
+def _worker_main(conn):
+    """Worker process loop: one request in, one response out"""
+    from plugin_manager import plugin_manager
+    from state_manager import state_manager
+    from disk_usage_manager import disk_usage_manager
+
+    while True:
+        try:
+            request = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            return
+        if request is None:
+            return
+
+        try:
+            # The GUI and other workers may have written state since the last call
+            state_manager.reload()
+            disk_usage_manager.reload()
+            # Picks up edited plugins without restarting the worker
+            plugin_manager.refresh_plugins()
+
+            app = plugin_manager.get_app(request["plugin"], request["class"])
+            if hasattr(app, "_load_state"):
+                app._load_state()
+            result = getattr(app, request["method"])(
+                *request["args"], **request["kwargs"]
+            )
+            response = {"id": request["id"], "ok": True, "result": result}
+        except Exception as e:
+            response = {
+                "id": request["id"],
+                "ok": False,
+                "error": f"{type(e).__name__}: {e}",
+                "traceback": traceback.format_exc(),
+            }
+
+        try:
+            conn.send(response)
+        except Exception as e:
+            conn.send(
+                {
+                    "id": request["id"],
+                    "ok": False,
+                    "error": f"Could not return result of {request['method']}: {e}",
+                    "traceback": "",
+                }
+            )
+
+
+class PluginCall(Future):
+    """A pending plugin call. cancel() also works while the call is running."""
+
+    def __init__(self, request: Dict[str, Any], timeout: Optional[float]):
+        super().__init__()
+        self.request = request
+        self.timeout = timeout
+        self._cancel_requested = threading.Event()
+
+    def cancel(self) -> bool:
+        if super().cancel():
+            return True
+        if self.done():
+            return False
+        # Running: the worker owning this call kills its process
+        self._cancel_requested.set()
+        return True
+
+
+class _PluginWorker:
+    """One worker process and the thread that feeds it calls"""
+
+    def __init__(self, host: "PluginHost", calls: queue.Queue, index: int):
+        self.host = host
+        self.calls = calls
+        self.process = None
+        self.conn = None
+        self.idle = False
+        self.thread = threading.Thread(
+            target=self._run, name=f"plugin-worker-{index}", daemon=True
+        )
+        self.thread.start()
+
+    def _ensure_process(self):
+        if self.process is not None and self.process.is_alive():
+            return
+        self.kill()
+        parent_conn, child_conn = self.host.context.Pipe()
+        self.process = self.host.context.Process(
+            target=_worker_main, args=(child_conn,), daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.conn = parent_conn
+
+    def kill(self):
+        if self.process is not None:
+            self.process.kill()
+            self.process.join()
+            self.conn.close()
+        self.process = None
+        self.conn = None
+
+    def _stop(self):
+        """Let the process exit on its own, killing it if it does not"""
+        if self.process is None:
+            return
+        try:
+            self.conn.send(None)
+            self.process.join(5)
+        except OSError:
+            pass
+        self.kill()
+
+    def _run(self):
+        while True:
+            self.idle = True
+            call = self.calls.get()
+            self.idle = False
+            if call is None:
+                self._stop()
+                return
+            if not call.set_running_or_notify_cancel():
+                continue
+
+            try:
+                self._ensure_process()
+                self.conn.send(call.request)
+                self._finish(call)
+            except Exception as e:
+                self.kill()
+                call.set_exception(PluginCallError(f"Plugin worker failed: {e}"))
+
+    def _finish(self, call: PluginCall):
+        """Wait for the response to a call, enforcing its timeout and cancellation"""
+        method = call.request["method"]
+        deadline = None if call.timeout is None else time.monotonic() + call.timeout
+        while not self.conn.poll(POLL_INTERVAL):
+            if call._cancel_requested.is_set():
+                self.kill()
+                call.set_exception(CancelledError())
+                return
+            if deadline is not None and time.monotonic() > deadline:
+                self.kill()
+                call.set_exception(
+                    PluginCallTimeout(f"{method} timed out after {call.timeout}s")
+                )
+                return
+
+        try:
+            response = self.conn.recv()
+        except EOFError:
+            self.process.join(1)
+            exit_code = self.process.exitcode
+            self.kill()
+            call.set_exception(
+                PluginCallError(f"Plugin worker exited during {method} ({exit_code})")
+            )
+            return
+
+        if response["ok"]:
+            call.set_result(response["result"])
+        else:
+            call.set_exception(
+                PluginCallError(response["error"], response["traceback"])
+            )
+
+
+class PluginHost:
+    """A pool of plugin worker processes, started on demand"""
+
+    def __init__(self, max_workers: int = 2):
+        self.max_workers = max_workers
+        self.context = multiprocessing.get_context("spawn")
+        self._calls = queue.Queue()
+        self._workers = []
+        self._apps = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def submit(
+        self,
+        plugin_name: str,
+        class_name: str,
+        method: str,
+        *args,
+        timeout: Optional[float] = DEFAULT_TIMEOUT,
+        **kwargs,
+    ) -> PluginCall:
+        """Call a method of a plugin app in a worker and return a future for it"""
+        call = PluginCall(
+            {
+                "id": next(self._ids),
+                "plugin": plugin_name,
+                "class": class_name,
+                "method": method,
+                "args": args,
+                "kwargs": kwargs,
+            },
+            timeout,
+        )
+        with self._lock:
+            # Start another worker only when all existing ones are busy
+            if len(self._workers) < self.max_workers and not any(
+                worker.idle for worker in self._workers
+            ):
+                self._workers.append(
+                    _PluginWorker(self, self._calls, len(self._workers))
+                )
+            self._calls.put(call)
+        return call
+
+    def call(self, plugin_name: str, class_name: str, method: str, *args, **kwargs):
+        """Call a method of a plugin app in a worker and wait for the result"""
+        return self.submit(plugin_name, class_name, method, *args, **kwargs).result()
+
+    def get_app(self, plugin_name: str, app_manifest: Dict[str, Any]):
+        """Get the in-process stand-in for an app a plugin provides"""
+        key = (plugin_name, app_manifest["class"])
+        if key not in self._apps:
+            self._apps[key] = RemotePluginApp(self, plugin_name, app_manifest)
+        return self._apps[key]
+
+    def forget(self, plugin_name: str):
+        """Drop the stand-ins for a plugin's apps, e.g. after its manifest changed"""
+        with self._lock:
+            for key in [key for key in self._apps if key[0] == plugin_name]:
+                del self._apps[key]
+
+    def shutdown(self):
+        """Stop all workers once their queued calls are done; new calls start fresh ones"""
+        with self._lock:
+            calls, workers = self._calls, self._workers
+            self._calls = queue.Queue()
+            self._workers = []
+            self._apps.clear()
+        for _ in workers:
+            calls.put(None)
+
+
+def wait_for_call(call: PluginCall):
+    """Wait for a call, killing it when the current install is cancelled.
+
+    On the Qt main thread the window keeps repainting, but user input waits
+    until the call is done, so no slot can start another call inside this one.
+    Raises InstallCancelled once the worker has stopped.
+    """
+    from PySide6 import QtCore
+
+    token = current_token()
+    app = QtCore.QCoreApplication.instance()
+    on_main_thread = (
+        app is not None and threading.current_thread() is threading.main_thread()
+    )
+    while not call.done():
+        if token.cancelled and call.cancel():
+            # The worker kills its process; wait so nothing writes during rollback
+            wait([call])
+            if call.cancelled() or isinstance(call.exception(), CancelledError):
+                token.check()
+            break
+        wait([call], timeout=POLL_INTERVAL)
+        if on_main_thread:
+            app.processEvents(
+                QtCore.QEventLoop.ProcessEventsFlag.ExcludeUserInputEvents
+            )
+    return call.result()
+
+
+class RemotePluginApp:
+    """Stand-in for a plugin app whose methods run in the plugin host.
+
+    State is read from apps.json in this process, so drawing the UI never
+    waits on a worker.
+    """
+
+    def __init__(self, host: PluginHost, plugin_name: str, app_manifest: Dict):
+        self.host = host
+        self.plugin_name = plugin_name
+        self.class_name = app_manifest["class"]
+        self.app_name = app_manifest.get("app_name") or self.class_name.lower()
+        self.display_name = app_manifest["display_name"]
+        self.description = app_manifest["description"]
+        self.managed = app_manifest["managed"]
+        self._load_state()
+
+    def _load_state(self):
+        """Load the app state from storage"""
+        from state_manager import state_manager
+
+        self.is_installed = state_manager.is_app_installed(self.app_name)
+        self.version = state_manager.get_app_version(self.app_name)
+        self.active_version = state_manager.get_app_active_version(self.app_name)
+        self.installed_versions = state_manager.get_app_installed_versions(
+            self.app_name
+        )
+
+    def _call(self, method: str, *args, timeout=DEFAULT_TIMEOUT, writes_state=True):
+        call = self.host.submit(
+            self.plugin_name, self.class_name, method, *args, timeout=timeout
+        )
+        try:
+            return wait_for_call(call)
+        finally:
+            if writes_state:
+                from state_manager import state_manager
+                from disk_usage_manager import disk_usage_manager
+
+                state_manager.reload()
+                disk_usage_manager.reload()
+                self._load_state()
+
+    def list_installed_versions(self):
+        """Get list of installed versions"""
+        return list(self.installed_versions.keys())
+
+    def get_active_version(self):
+        """Get the currently active version"""
+        return self.active_version
+
+    def get_available_versions(self):
+        """Get available versions from the plugin, or [] if it fails or hangs"""
+        try:
+            return self._call(
+                "get_available_versions", timeout=CATALOG_TIMEOUT, writes_state=False
+            )
+        except (PluginCallError, CancelledError) as e:
+            print(f"Failed to fetch {self.display_name} versions: {e}")
+            return []
+
+    def install(self, version: str = None):
+        """Install a version, asking for one here since workers have no UI"""
+        if not self.managed:
+            return self._call("install", timeout=INSTALL_TIMEOUT)
+
+        if version is None:
+            from widgets.version_selector_dialog import VersionSelectorDialog
+
+            available_versions = self.get_available_versions()
+            if not available_versions:
+                print("No versions available for installation.")
+                return
+
+            version = VersionSelectorDialog.select_version(
+                self.display_name, available_versions, app_key=self.app_name
+            )
+            if not version:
+                print("Installation cancelled.")
+                return
+
+        return self._call("install", version, timeout=INSTALL_TIMEOUT)
+
+    def uninstall(self, version: str = None):
+        return self._call("uninstall", version)
+
+    def switch_version(self, version: str):
+        return self._call("switch_version", version)
+
+    def _update_shims_for_version(self, version: str):
+        return self._call("_update_shims_for_version", version)
+
+
+# Global plugin host instance
+plugin_host = PluginHost()
@@ -1,121 +1,478 @@
+import ast
+import hashlib
+import json
 import os
 import sys
 import importlib.util
 from pathlib import Path
-from typing import Dict, List, Any
-from state_manager import PLUGINS_DIR
+from typing import Dict, List, Any, Optional
+from state_manager import BASEDIR, PLUGINS_DIR
 
 # Import the base classes so plugins can inherit from them
-import sys
-
 sys.path.append(str(Path(__file__).parent))
 from apps.Apps import ManagedApp, NonManagedApp
 
+PLUGIN_INDEX_FILE = BASEDIR / "plugins_index.json"
+PLUGIN_INDEX_VERSION = 2
+BASE_CLASS_NAMES = ("ManagedApp", "NonManagedApp", "ProviderApp")
+MANAGED_BASE_CLASS_NAMES = ("ManagedApp", "ProviderApp")
+# Base classes known without importing anything: name -> managed
+KNOWN_BASES = {name: name in MANAGED_BASE_CLASS_NAMES for name in BASE_CLASS_NAMES}
+DEFAULT_CATEGORY = "Plugins"
+
+
+def _literal_string(node) -> Optional[str]:
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    return None
+
+
+def _unresolved_bases(node: ast.ClassDef, local_classes) -> List[str]:
+    """Bases of a class that are neither app base classes nor defined in its file"""
+    return [
+        ast.unparse(base)
+        for base in node.bases
+        if not (
+            isinstance(base, ast.Name)
+            and (
+                base.id in KNOWN_BASES
+                or base.id in local_classes
+                or base.id == "object"
+            )
+        )
+    ]
+
+
+def _scan_app_class(
+    node: ast.ClassDef, known_bases: Dict[str, bool]
+) -> Optional[Dict[str, Any]]:
+    """Describe an app class from its source without executing it.
+
+    Mirrors the old runtime check: the class needs an install method and at
+    least one of display_name, app_name or description. known_bases maps
+    the app classes it may inherit from to whether they are managed.
+    """
+    bases = [
+        base.id
+        for base in node.bases
+        if isinstance(base, ast.Name) and base.id in known_bases
+    ]
+    inherits_app = bool(bases)
+
+    attributes = {}
+    methods = set()
+    managed = any(known_bases[base] for base in bases)
+    for statement in node.body:
+        if isinstance(statement, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            methods.add(statement.name)
+        elif isinstance(statement, ast.Assign) and len(statement.targets) == 1:
+            target = statement.targets[0]
+            value = _literal_string(statement.value)
+            if isinstance(target, ast.Name) and value is not None:
+                attributes[target.id] = value
+
+    # Instance attributes set as self.<name> = "..." (app_name usually lives in __init__)
+    for child in ast.walk(node):
+        if not isinstance(child, ast.Assign):
+            continue
+        for target in child.targets:
+            if (
+                isinstance(target, ast.Attribute)
+                and isinstance(target.value, ast.Name)
+                and target.value.id == "self"
+            ):
+                if target.attr == "is_installed":
+                    managed = True
+                value = _literal_string(child.value)
+                if value is not None and target.attr not in attributes:
+                    attributes[target.attr] = value
+
+    has_install = "install" in methods or inherits_app
+    has_app_attributes = any(
+        key in attributes for key in ("display_name", "app_name", "description")
+    )
+    if not (has_install and has_app_attributes):
+        return None
+
+    return {
+        "class": node.name,
+        "display_name": attributes.get("display_name")
+        or attributes.get("app_name")
+        or node.name,
+        "description": attributes.get("description", ""),
+        "app_name": attributes.get("app_name"),
+        "managed": managed,
+    }
+
+
+def scan_plugin_source(source: str, plugin_name: str) -> Dict[str, Any]:
+    """Build a plugin manifest from source code without importing it.
+
+    A plugin may declare a module-level PLUGIN_MANIFEST dict literal with
+    name, category, description and provides; anything it leaves out is
+    filled in from the app classes found in the file. Classes whose bases
+    come from other modules cannot be checked here and are listed under
+    "unresolved" for PluginManager to check by importing the file.
+    """
+    tree = ast.parse(source, filename=plugin_name)
+    declared = {}
+    provides = []
+    unresolved = []
+    known_bases = dict(KNOWN_BASES)
+    local_classes = {node.name for node in tree.body if isinstance(node, ast.ClassDef)}
+
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(
+            isinstance(target, ast.Name) and target.id == "PLUGIN_MANIFEST"
+            for target in node.targets
+        ):
+            try:
+                declared = ast.literal_eval(node.value)
+            except ValueError:
+                print(
+                    f"Warning: PLUGIN_MANIFEST in plugin {plugin_name} is not a literal"
+                )
+        elif (
+            isinstance(node, ast.ClassDef)
+            and node.name not in BASE_CLASS_NAMES
+            and not node.name.startswith("_")
+        ):
+            app = _scan_app_class(node, known_bases)
+            if app:
+                provides.append(app)
+                known_bases[node.name] = app["managed"]
+            elif _unresolved_bases(node, local_classes):
+                unresolved.append(node.name)
+
+    # Declared entries override what was found in the source, matched by class
+    scanned = {app["class"]: app for app in provides}
+    for declared_app in declared.get("provides", []):
+        class_name = declared_app.get("class")
+        if class_name in scanned:
+            scanned[class_name].update(declared_app)
+        elif class_name:
+            provides.append(
+                {
+                    "display_name": class_name,
+                    "description": "",
+                    "app_name": None,
+                    "managed": False,
+                    **declared_app,
+                }
+            )
+
+    return {
+        "name": declared.get("name", plugin_name),
+        "category": declared.get("category", DEFAULT_CATEGORY),
+        "description": declared.get("description", ""),
+        "provides": provides,
+        "unresolved": [name for name in unresolved if name not in scanned],
+    }
+
+
+def _import_plugin(plugin_file: Path):
+    """Execute a plugin file as a module and return it"""
+    plugin_name = plugin_file.stem
+
+    # Add plugins directory to Python path
+    if str(PLUGINS_DIR) not in sys.path:
+        sys.path.insert(0, str(PLUGINS_DIR))
+
+    # Load the module dynamically
+    spec = importlib.util.spec_from_file_location(plugin_name, plugin_file)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"Could not load plugin spec for {plugin_name}")
+
+    module = importlib.util.module_from_spec(spec)
+
+    # Add the current working directory to sys.path temporarily for plugin imports
+    original_path = sys.path.copy()
+    try:
+        # Add the main GWEM directory to path so plugins can import GWEM modules
+        gwem_dir = Path(__file__).parent
+        if str(gwem_dir) not in sys.path:
+            sys.path.insert(0, str(gwem_dir))
+
+        spec.loader.exec_module(module)
+    finally:
+        # Restore original path
+        sys.path = original_path
+    return module
+
+
+def _inspect_app_class(cls: type) -> Optional[Dict[str, Any]]:
+    """The runtime version of _scan_app_class, for classes it could not resolve"""
+    has_install = callable(getattr(cls, "install", None))
+    has_app_attributes = any(
+        hasattr(cls, key) for key in ("display_name", "app_name", "description")
+    )
+    if not (has_install and has_app_attributes):
+        return None
+
+    def string(key):
+        value = getattr(cls, key, None)
+        return value if isinstance(value, str) else None
+
+    return {
+        "class": cls.__name__,
+        "display_name": string("display_name") or string("app_name") or cls.__name__,
+        "description": string("description") or "",
+        "app_name": string("app_name"),
+        "managed": issubclass(cls, ManagedApp),
+    }
+
 
 class PluginManager:
+    """Discovers plugins from a cached manifest index and imports them on demand.
+
+    Discovery only stats the files in PLUGINS_DIR; a plugin's source is read
+    and scanned again only when its mtime or size changed, and it is imported
+    only when one of its apps is first needed.
+    """
+
     def __init__(self):
         self.plugins = {}
         self.plugin_instances = {}
+        self.manifests = {}
+        self.digests = {}
         self._ensure_plugins_directory()
-        self._load_plugins()
+        self.discover_plugins()
 
     def _ensure_plugins_directory(self):
         """Ensure the plugins directory exists"""
         PLUGINS_DIR.mkdir(parents=True, exist_ok=True)
 
-    def _load_plugins(self):
-        """Load all Python plugins from the plugins directory"""
+    def _load_index(self) -> Dict[str, Any]:
+        if not PLUGIN_INDEX_FILE.exists():
+            return {}
+        try:
+            with open(PLUGIN_INDEX_FILE, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            if index.get("version") != PLUGIN_INDEX_VERSION:
+                return {}
+            return index.get("plugins", {})
+        except (json.JSONDecodeError, IOError) as e:
+            print(f"Warning: Could not load plugin index: {e}")
+            return {}
+
+    def _save_index(self, plugins: Dict[str, Any]):
+        # The GUI and plugin host workers all save it; readers never see half a file
+        partial = PLUGIN_INDEX_FILE.with_name(
+            f"{PLUGIN_INDEX_FILE.name}.{os.getpid()}.tmp"
+        )
+        try:
+            with open(partial, "w", encoding="utf-8") as f:
+                json.dump(
+                    {"version": PLUGIN_INDEX_VERSION, "plugins": plugins}, f, indent=2
+                )
+            os.replace(partial, PLUGIN_INDEX_FILE)
+        except IOError as e:
+            print(f"Error: Could not save plugin index: {e}")
+            partial.unlink(missing_ok=True)
+
+    def _index_plugin(
+        self, plugin_file: Path, cached: Optional[Dict[str, Any]]
+    ) -> Optional[Dict[str, Any]]:
+        """Index entry for a plugin file, reusing the cached one when unchanged"""
+        stat = plugin_file.stat()
+        if (
+            cached
+            and cached.get("mtime_ns") == stat.st_mtime_ns
+            and cached.get("size") == stat.st_size
+        ):
+            return cached
+
+        source = plugin_file.read_bytes()
+        digest = hashlib.sha1(source).hexdigest()
+        if cached and cached.get("sha1") == digest:
+            # Touched but not edited
+            return {**cached, "mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+        entry = {
+            "file_path": str(plugin_file),
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "sha1": digest,
+            "manifest": None,
+            "error": None,
+        }
+        try:
+            entry["manifest"] = scan_plugin_source(
+                source.decode("utf-8"), plugin_file.stem
+            )
+        except (SyntaxError, UnicodeDecodeError, ValueError) as e:
+            entry["error"] = str(e)
+            return entry
+
+        if entry["manifest"]["unresolved"]:
+            # Only when the file changed; the result is kept in the index
+            try:
+                self._inspect_unresolved(plugin_file, entry["manifest"])
+            except Exception as e:
+                entry["error"] = f"Could not import to check its classes: {e}"
+        return entry
+
+    def _inspect_unresolved(self, plugin_file: Path, manifest: Dict[str, Any]):
+        """Import a plugin to check the classes whose bases live elsewhere"""
+        module = _import_plugin(plugin_file)
+        for class_name in manifest["unresolved"]:
+            cls = getattr(module, class_name, None)
+            app = _inspect_app_class(cls) if isinstance(cls, type) else None
+            if app:
+                manifest["provides"].append(app)
+
+    def discover_plugins(self):
+        """Refresh the manifest index from the plugins directory without importing anything"""
+        self.manifests = {}
+        self.digests = {}
         if not PLUGINS_DIR.exists():
             return
 
-        # Add plugins directory to Python path
-        if str(PLUGINS_DIR) not in sys.path:
-            sys.path.insert(0, str(PLUGINS_DIR))
-
-        # Find all Python files in the plugins directory
-        for plugin_file in PLUGINS_DIR.glob("*.py"):
+        index = self._load_index()
+        updated = {}
+        for plugin_file in sorted(PLUGINS_DIR.glob("*.py")):
             if plugin_file.name.startswith("__"):
                 continue  # Skip __init__.py and __pycache__ files
 
+            plugin_name = plugin_file.stem
             try:
-                self._load_plugin(plugin_file)
-            except Exception as e:
-                print(f"Warning: Failed to load plugin {plugin_file.name}: {e}")
+                entry = self._index_plugin(plugin_file, index.get(plugin_name))
+            except OSError as e:
+                print(f"Warning: Failed to read plugin {plugin_file.name}: {e}")
+                continue
 
-    def _load_plugin(self, plugin_file: Path):
-        """Load a single plugin file"""
-        plugin_name = plugin_file.stem
+            updated[plugin_name] = entry
+            self.digests[plugin_name] = entry["sha1"]
+            if entry["error"]:
+                print(
+                    f"Warning: Failed to scan plugin {plugin_file.name}: {entry['error']}"
+                )
+            elif not entry["manifest"]["provides"]:
+                print(f"Warning: No valid app classes found in plugin {plugin_name}")
+            else:
+                self.manifests[plugin_name] = entry["manifest"]
+
+        if updated != index:
+            self._save_index(updated)
+
+    def refresh_plugins(self) -> Dict[str, List[str]]:
+        """Pick up added, edited and removed plugin files, reloading only those.
+
+        Edited plugins that were already imported are re-executed and their
+        live app instances are switched to the new classes in place, so any
+        state they hold survives. Returns the names of the added, changed and
+        removed plugins.
+        """
+        old_manifests = self.manifests
+        old_digests = self.digests
+        self.discover_plugins()
+
+        changes = {"added": [], "changed": [], "removed": []}
+        for plugin_name in old_manifests.keys() - self.manifests.keys():
+            changes["removed"].append(plugin_name)
+            self._forget_plugin(plugin_name)
+        for plugin_name, manifest in self.manifests.items():
+            if plugin_name not in old_manifests:
+                changes["added"].append(plugin_name)
+            elif self.digests[plugin_name] != old_digests.get(plugin_name):
+                changes["changed"].append(plugin_name)
+                if plugin_name in self.plugins:
+                    self._reload_plugin(plugin_name)
 
-        # Load the module dynamically
-        spec = importlib.util.spec_from_file_location(plugin_name, plugin_file)
-        if spec is None or spec.loader is None:
-            raise ImportError(f"Could not load plugin spec for {plugin_name}")
+        for names in changes.values():
+            names.sort()
+        return changes
 
-        module = importlib.util.module_from_spec(spec)
+    def _forget_plugin(self, plugin_name: str):
+        self.plugins.pop(plugin_name, None)
+        for key in [key for key in self.plugin_instances if key[0] == plugin_name]:
+            del self.plugin_instances[key]
 
-        # Add the current working directory to sys.path temporarily for plugin imports
-        original_path = sys.path.copy()
+    def _reload_plugin(self, plugin_name: str):
+        """Re-execute an imported plugin and move its app instances to the new classes"""
+        old_info = self.plugins.pop(plugin_name)
         try:
-            # Add the main GWEM directory to path so plugins can import GWEM modules
-            gwem_dir = Path(__file__).parent
-            if str(gwem_dir) not in sys.path:
-                sys.path.insert(0, str(gwem_dir))
+            self._load_plugin(old_info["file_path"])
+        except Exception as e:
+            # Keep running the previous version until the file is fixed
+            print(f"Warning: Failed to reload plugin {plugin_name}: {e}")
+            self.plugins[plugin_name] = old_info
+            return
+
+        new_classes = {
+            cls.__name__: cls for cls in self.plugins[plugin_name]["classes"]
+        }
+        for key in [key for key in self.plugin_instances if key[0] == plugin_name]:
+            new_class = new_classes.get(key[1])
+            if new_class is None:
+                del self.plugin_instances[key]
+            else:
+                self.plugin_instances[key].__class__ = new_class
+
+    def get_plugin_manifests(self) -> Dict[str, Dict[str, Any]]:
+        """Manifests of all discovered plugins, keyed by plugin name"""
+        return self.manifests
 
-            spec.loader.exec_module(module)
-        finally:
-            # Restore original path
-            sys.path = original_path
+    def load_plugin(self, plugin_name: str) -> Dict[str, Any]:
+        """Import a plugin module if it has not been imported yet"""
+        if plugin_name not in self.plugins:
+            plugin_file = PLUGINS_DIR / f"{plugin_name}.py"
+            if plugin_name not in self.manifests or not plugin_file.exists():
+                raise ImportError(f"Unknown plugin {plugin_name}")
+            self._load_plugin(plugin_file)
+        return self.plugins[plugin_name]
 
-        # Look for classes that might be app classes
+    def _load_plugin(self, plugin_file: Path):
+        """Load a single plugin file"""
+        plugin_name = plugin_file.stem
+        module = _import_plugin(plugin_file)
+
+        # Only the classes the manifest names are app classes
         plugin_classes = []
-        for attr_name in dir(module):
-            attr = getattr(module, attr_name)
-            if (
-                isinstance(attr, type)
-                and attr_name
-                not in ["ManagedApp", "NonManagedApp"]  # Exclude the base classes
-                and not attr_name.startswith("_")
-            ):  # Exclude private classes
-
-                # Check if it has the methods/attributes we expect for an app
-                has_install = hasattr(attr, "install") and callable(
-                    getattr(attr, "install")
-                )
-                has_app_attributes = (
-                    hasattr(attr, "display_name")
-                    or hasattr(attr, "app_name")
-                    or hasattr(attr, "description")
+        for app in self.manifests[plugin_name]["provides"]:
+            attr = getattr(module, app["class"], None)
+            if isinstance(attr, type):
+                plugin_classes.append(attr)
+            else:
+                print(
+                    f"Warning: Plugin {plugin_name} does not define class {app['class']}"
                 )
 
-                if has_install and has_app_attributes:
-                    plugin_classes.append(attr)
+        self.plugins[plugin_name] = {
+            "module": module,
+            "classes": plugin_classes,
+            "file_path": plugin_file,
+        }
+        print(f"Loaded plugin: {plugin_name} with {len(plugin_classes)} app class(es)")
 
-        if plugin_classes:
-            self.plugins[plugin_name] = {
-                "module": module,
-                "classes": plugin_classes,
-                "file_path": plugin_file,
-            }
-            print(
-                f"Loaded plugin: {plugin_name} with {len(plugin_classes)} app class(es)"
-            )
-        else:
-            print(f"Warning: No valid app classes found in plugin {plugin_name}")
+    def get_app(self, plugin_name: str, class_name: str) -> Any:
+        """Get the app instance for a manifest entry, importing its plugin on first use"""
+        key = (plugin_name, class_name)
+        if key not in self.plugin_instances:
+            plugin_info = self.load_plugin(plugin_name)
+            for app_class in plugin_info["classes"]:
+                if app_class.__name__ == class_name:
+                    self.plugin_instances[key] = app_class()
+                    break
+            else:
+                raise ImportError(f"Plugin {plugin_name} has no app class {class_name}")
+        return self.plugin_instances[key]
 
     def get_plugin_apps(self) -> Dict[str, List[Any]]:
-        """Get all plugin app instances, organized by plugin name"""
+        """Get all plugin app instances, organized by plugin name.
+
+        This imports every plugin; the UI uses the manifests and get_app instead.
+        """
         plugin_apps = {}
 
-        for plugin_name, plugin_info in self.plugins.items():
+        for plugin_name, manifest in self.manifests.items():
             apps = []
-            for app_class in plugin_info["classes"]:
+            for app in manifest["provides"]:
                 try:
-                    # Create instance of the app class
-                    app_instance = app_class()
-                    apps.append(app_instance)
+                    apps.append(self.get_app(plugin_name, app["class"]))
                 except Exception as e:
                     print(
-                        f"Warning: Failed to instantiate {app_class.__name__} from plugin {plugin_name}: {e}"
+                        f"Warning: Failed to instantiate {app['class']} from plugin {plugin_name}: {e}"
                     )
 
             if apps:
@@ -134,8 +491,10 @@ class PluginManager:
         return all_apps
 
     def reload_plugins(self):
-        """Reload all plugins"""
+        """Forget imported plugins and rediscover them"""
         # Clear existing plugins
+        for plugin_name in self.plugins:
+            sys.modules.pop(plugin_name, None)
         self.plugins.clear()
         self.plugin_instances.clear()
 
@@ -143,17 +502,19 @@ class PluginManager:
         if str(PLUGINS_DIR) in sys.path:
             sys.path.remove(str(PLUGINS_DIR))
 
-        # Reload plugins
-        self._load_plugins()
+        self.discover_plugins()
 
     def get_plugin_info(self) -> Dict[str, Dict[str, Any]]:
-        """Get information about all loaded plugins"""
+        """Get information about all discovered plugins"""
         info = {}
-        for plugin_name, plugin_data in self.plugins.items():
+        for plugin_name, manifest in self.manifests.items():
             info[plugin_name] = {
-                "file_path": str(plugin_data["file_path"]),
-                "classes": [cls.__name__ for cls in plugin_data["classes"]],
-                "class_count": len(plugin_data["classes"]),
+                "file_path": str(PLUGINS_DIR / f"{plugin_name}.py"),
+                "name": manifest["name"],
+                "category": manifest["category"],
+                "classes": [app["class"] for app in manifest["provides"]],
+                "class_count": len(manifest["provides"]),
+                "loaded": plugin_name in self.plugins,
             }
         return info
 
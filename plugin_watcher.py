@@ -0,0 +1,123 @@
+"""Watches the plugins directory and reports when plugin files change.
+
+Both watchers run their callback on the Qt event loop. NativePluginWatcher
+uses QFileSystemWatcher (ReadDirectoryChangesW on Windows, inotify on Linux);
+PollingPluginWatcher compares file mtimes on a timer and is the fallback when
+native watching is unavailable.
+"""
+
+from pathlib import Path
+from typing import Callable, Dict, Tuple
+from PySide6 import QtCore
+
+# Editors save in several steps; wait for them to settle before reloading
+DEBOUNCE_MS = 300
+POLL_INTERVAL_MS = 1000
+
+
+class PluginWatcher(QtCore.QObject):
+    """Calls on_change (debounced) when a *.py file in a directory may have changed"""
+
+    def __init__(self, directory: Path, on_change: Callable[[], None], parent=None):
+        super().__init__(parent)
+        self.directory = Path(directory)
+        self.on_change = on_change
+        self._debounce = QtCore.QTimer(self)
+        self._debounce.setSingleShot(True)
+        self._debounce.setInterval(DEBOUNCE_MS)
+        self._debounce.timeout.connect(self.on_change)
+
+    def start(self):
+        raise NotImplementedError
+
+    def stop(self):
+        self._debounce.stop()
+
+    def _changed(self, *args):
+        self._debounce.start()
+
+
+class NativePluginWatcher(PluginWatcher):
+    """Watches with the OS change notifications via QFileSystemWatcher"""
+
+    def __init__(self, directory: Path, on_change: Callable[[], None], parent=None):
+        super().__init__(directory, on_change, parent)
+        self._watcher = QtCore.QFileSystemWatcher(self)
+        self._watcher.directoryChanged.connect(self._directory_changed)
+        self._watcher.fileChanged.connect(self._changed)
+
+    def start(self):
+        if not self._watcher.addPath(str(self.directory)):
+            raise OSError(f"Could not watch {self.directory}")
+        self._watch_files()
+
+    def stop(self):
+        super().stop()
+        paths = self._watcher.files() + self._watcher.directories()
+        if paths:
+            self._watcher.removePaths(paths)
+
+    def _watch_files(self):
+        # Directory notifications cover adds and removes; edits need file watches.
+        # Files replaced by an atomic save drop out of the watch list, so re-add.
+        files = [str(path) for path in self.directory.glob("*.py")]
+        watched = set(self._watcher.files())
+        missing = [path for path in files if path not in watched]
+        if missing:
+            self._watcher.addPaths(missing)
+
+    def _directory_changed(self, path: str):
+        self._watch_files()
+        self._changed()
+
+
+class PollingPluginWatcher(PluginWatcher):
+    """Compares (mtime, size) of the plugin files on a timer"""
+
+    def __init__(self, directory: Path, on_change: Callable[[], None], parent=None):
+        super().__init__(directory, on_change, parent)
+        self._snapshot = {}
+        self._timer = QtCore.QTimer(self)
+        self._timer.setInterval(POLL_INTERVAL_MS)
+        self._timer.timeout.connect(self._poll)
+
+    def _take_snapshot(self) -> Dict[str, Tuple[int, int]]:
+        snapshot = {}
+        for path in self.directory.glob("*.py"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            snapshot[path.name] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def start(self):
+        self._snapshot = self._take_snapshot()
+        self._timer.start()
+
+    def stop(self):
+        super().stop()
+        self._timer.stop()
+
+    def _poll(self):
+        snapshot = self._take_snapshot()
+        if snapshot != self._snapshot:
+            self._snapshot = snapshot
+            self._changed()
+
+
+def create_plugin_watcher(
+    directory: Path, on_change: Callable[[], None], parent=None
+) -> PluginWatcher:
+    """Start the native watcher, falling back to polling if it cannot watch"""
+    watcher = NativePluginWatcher(directory, on_change, parent)
+    try:
+        watcher.start()
+        return watcher
+    except OSError as e:
+        print(f"Warning: Falling back to polling for plugin changes: {e}")
+        watcher.deleteLater()
+
+    watcher = PollingPluginWatcher(directory, on_change, parent)
+    watcher.start()
+    return watcher
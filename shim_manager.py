@@ -92,6 +92,23 @@ try {{
         exit 1
     }}
     
+    # Ask GWEM to unpack the version first if it was moved to cold storage
+    if ($appInfo.cold -and $appInfo.cold.PSObject.Properties.Name -contains $activeVersion) {{
+        $rehydrate = @($appInfo.cold.$activeVersion.rehydrate)
+        $rehydrateArgs = @($rehydrate | Select-Object -Skip 1) + @("--rehydrate", "{app_name}", $activeVersion)
+        & $rehydrate[0] @rehydrateArgs | Out-Null
+        if ($LASTEXITCODE -ne 0) {{
+            Write-Error "{app_name} $activeVersion could not be restored from cold storage"
+            exit 1
+        }}
+    }}
+    
+    # Record usage locally for GWEM (app, version, unix time); never fail over it
+    try {{
+        $usageLine = "{app_name}`t$activeVersion`t$([DateTimeOffset]::UtcNow.ToUnixTimeSeconds())`n"
+        [System.IO.File]::AppendAllText((Join-Path $gwemDir "usage.log"), $usageLine)
+    }} catch {{}}
+    
     # Construct the path to the executable
     $executablePath = $installPath"""
 
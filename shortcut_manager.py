@@ -206,6 +206,12 @@ try {{
     
     Write-Host "Install path: $installPath" -ForegroundColor Green
     
+    # Record usage locally for GWEM (app, version, unix time); never fail over it
+    try {{
+        $usageLine = "{app_name}`t$activeVersion`t$([DateTimeOffset]::UtcNow.ToUnixTimeSeconds())`n"
+        [System.IO.File]::AppendAllText((Join-Path $gwemDir "usage.log"), $usageLine)
+    }} catch {{}}
+    
     # Construct the path to the executable
     $executablePath = $installPath"""
 
@@ -0,0 +1,68 @@
+import os
+import secrets
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+from lock_manager import lock_manager, safe_name, version_key
+from state_manager import BASEDIR
+from trash_manager import trash_manager
+
+# Versions being extracted; same volume as APPS_DIR so committing is a rename
+STAGING_DIR = BASEDIR / "staging"
+
+
+class StagingManager:
+    """Builds version directories off to the side and moves them in with one rename.
+
+    An install extracts into a fresh directory under STAGING_DIR and only
+    renames it to its install path once everything has been written and
+    verified, so a version directory is either complete or absent. Staging
+    directories are named after the version lock their install holds;
+    recover() removes those whose lock is free, i.e. left behind by a crash.
+    """
+
+    @contextmanager
+    def stage(self, app_name: str, version: str, install_path: Path) -> Iterator[Path]:
+        """Yield a staging directory that replaces install_path on a clean exit.
+
+        If the block raises, the staging directory is discarded and
+        install_path is left as it was.
+        """
+        STAGING_DIR.mkdir(parents=True, exist_ok=True)
+        name = safe_name(version_key(app_name, version))
+        staging = STAGING_DIR / f"{name}+{secrets.token_hex(4)}"
+        try:
+            yield staging
+            self.commit(staging, Path(install_path))
+        except BaseException:
+            trash_manager.discard_quietly(staging)
+            raise
+
+    def commit(self, staging: Path, install_path: Path):
+        """Move a finished staging directory to install_path"""
+        install_path.parent.mkdir(parents=True, exist_ok=True)
+        # A directory no version points at, e.g. from before staging existed
+        trash_manager.discard(install_path)
+        if not staging.exists():
+            # Nothing was extracted (an empty selection); still create the version
+            staging.mkdir()
+        os.replace(staging, install_path)
+
+    def recover(self) -> int:
+        """Discard staging directories of installs that are no longer running"""
+        if not STAGING_DIR.exists():
+            return 0
+        stale = 0
+        for entry in STAGING_DIR.iterdir():
+            key = entry.name.rpartition("+")[0]
+            with lock_manager.try_hold(key) as free:
+                if free:
+                    trash_manager.discard(entry)
+                    stale += 1
+        if stale:
+            print(f"Removed {stale} unfinished install(s)")
+        return stale
+
+
+# Global staging manager instance
+staging_manager = StagingManager()
@@ -0,0 +1,177 @@
+"""Detects stalls of the Qt main loop and records where they happened.
+
+A timer on the main loop bumps a heartbeat; a watchdog thread checks it and,
+when the loop has not run for longer than the threshold, grabs the main
+thread's stack with sys._current_frames. Stalls are appended to stalls.log
+with the slot that was running, and a worst-offenders summary is written when
+the session ends. Enabled with the "debug_stalls" preference or GWEM_DEBUG=1.
+"""
+
+import os
+import sys
+import threading
+import time
+import traceback
+from typing import Dict, List, Optional
+from PySide6 import QtCore
+from state_manager import state_manager, BASEDIR
+
+STALLS_LOG = BASEDIR / "stalls.log"
+DEFAULT_THRESHOLD_MS = 250
+HEARTBEAT_MS = 50
+# Lines that hand control back to Qt; the frame after the last one is the slot
+EVENT_LOOP_CALLS = (".exec(", ".exec_(", "processEvents(", "wait_for_call(")
+
+
+def is_enabled() -> bool:
+    return os.environ.get("GWEM_DEBUG") == "1" or bool(
+        state_manager.get_preference("debug_stalls", False)
+    )
+
+
+def find_slot(stack: List[traceback.FrameSummary]) -> str:
+    """Name the function Qt called into, given the stack outermost first"""
+    slot_index = 0
+    for index, frame in enumerate(stack):
+        if frame.line and any(call in frame.line for call in EVENT_LOOP_CALLS):
+            slot_index = index + 1
+    if slot_index >= len(stack):
+        return "<event loop>"
+    frame = stack[slot_index]
+    return f"{os.path.basename(frame.filename)}:{frame.lineno} {frame.name}"
+
+
+class StallWatchdog:
+    """Watches the main loop heartbeat from a background thread"""
+
+    def __init__(self):
+        self.threshold = DEFAULT_THRESHOLD_MS / 1000
+        self.offenders: Dict[str, Dict[str, float]] = {}
+        self._main_thread_id = threading.main_thread().ident
+        self._last_beat = time.perf_counter()
+        self._timer: Optional[QtCore.QTimer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self, threshold_ms: float = None):
+        """Start watching; call from the main thread once QApplication exists"""
+        if self.running:
+            return
+        if threshold_ms is None:
+            threshold_ms = state_manager.get_preference(
+                "stall_threshold_ms", DEFAULT_THRESHOLD_MS
+            )
+        self.threshold = threshold_ms / 1000
+        self._main_thread_id = threading.get_ident()
+        self._last_beat = time.perf_counter()
+
+        self._timer = QtCore.QTimer()
+        self._timer.setInterval(HEARTBEAT_MS)
+        self._timer.timeout.connect(self._beat)
+        self._timer.start()
+
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._watch, name="stall-watchdog", daemon=True
+        )
+        self._thread.start()
+        self._log(
+            f"=== Session started {time.strftime('%Y-%m-%d %H:%M:%S')}, "
+            f"threshold {threshold_ms:g} ms ==="
+        )
+
+    def stop(self):
+        """Stop watching and append the worst-offenders summary to the log"""
+        if not self.running:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self._timer.stop()
+        self._timer = None
+        self._log(self.format_summary())
+
+    def _beat(self):
+        self._last_beat = time.perf_counter()
+
+    def _watch(self):
+        poll = min(self.threshold / 4, HEARTBEAT_MS / 1000)
+        stall = None
+        while not self._stop.wait(poll):
+            last_beat = self._last_beat
+            blocked = time.perf_counter() - last_beat
+            if stall is not None and last_beat != stall["beat"]:
+                # The loop ran again; the stall lasted until that beat
+                self._finish(stall, last_beat - stall["beat"] - HEARTBEAT_MS / 1000)
+                stall = None
+            elif stall is None and blocked > self.threshold:
+                stall = self._capture(last_beat)
+
+    def _capture(self, last_beat: float) -> Optional[Dict]:
+        frame = sys._current_frames().get(self._main_thread_id)
+        if frame is None:
+            return None
+        stack = traceback.extract_stack(frame)
+        return {
+            "beat": last_beat,
+            "slot": find_slot(stack),
+            "stack": "".join(traceback.format_list(stack)),
+            "at": time.strftime("%H:%M:%S"),
+        }
+
+    def _finish(self, stall: Dict, duration: float):
+        duration_ms = max(duration, self.threshold) * 1000
+        with self._lock:
+            offender = self.offenders.setdefault(
+                stall["slot"], {"count": 0, "total_ms": 0.0, "max_ms": 0.0}
+            )
+            offender["count"] += 1
+            offender["total_ms"] += duration_ms
+            offender["max_ms"] = max(offender["max_ms"], duration_ms)
+        print(f"Warning: Main loop stalled {duration_ms:.0f} ms in {stall['slot']}")
+        self._log(
+            f"[{stall['at']}] Main loop stalled {duration_ms:.0f} ms in {stall['slot']}\n"
+            f"{stall['stack']}"
+        )
+
+    def summary(self) -> List[Dict]:
+        """Slots that blocked the loop, by total time blocked"""
+        with self._lock:
+            rows = [
+                {
+                    "slot": slot,
+                    "count": stats["count"],
+                    "total_ms": round(stats["total_ms"], 1),
+                    "max_ms": round(stats["max_ms"], 1),
+                }
+                for slot, stats in self.offenders.items()
+            ]
+        return sorted(rows, key=lambda row: row["total_ms"], reverse=True)
+
+    def format_summary(self) -> str:
+        rows = self.summary()
+        if not rows:
+            return "=== No stalls this session ==="
+        lines = ["=== Worst offenders this session ==="]
+        for row in rows:
+            lines.append(
+                f"{row['total_ms']:>9.0f} ms total  {row['count']:>3}x  "
+                f"max {row['max_ms']:.0f} ms  {row['slot']}"
+            )
+        return "\n".join(lines)
+
+    def _log(self, message: str):
+        try:
+            with open(STALLS_LOG, "a", encoding="utf-8") as f:
+                f.write(message + "\n")
+        except IOError as e:
+            print(f"Warning: Could not write stall log: {e}")
+
+
+# Global stall watchdog instance
+stall_watchdog = StallWatchdog()
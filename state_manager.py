@@ -8,6 +8,8 @@ APPS_DIR = BASEDIR / "apps"
 TEMP_PATH = BASEDIR / "temp"
 PATH_DIR = BASEDIR / "path"
 PLUGINS_DIR = BASEDIR / "plugins"
+TRASH_DIR = BASEDIR / "trash"
+CACHE_DIR = BASEDIR / "cache"
 
 
 class StateManager:
@@ -26,6 +28,13 @@ class StateManager:
         TEMP_PATH.mkdir(parents=True, exist_ok=True)
         PATH_DIR.mkdir(parents=True, exist_ok=True)
         PLUGINS_DIR.mkdir(parents=True, exist_ok=True)
+        TRASH_DIR.mkdir(parents=True, exist_ok=True)
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+
+    def reload(self):
+        """Re-read apps.json and preferences.json, e.g. after another process wrote them"""
+        self._apps_state = self._load_apps_state()
+        self._preferences = self._load_preferences()
 
     def _load_apps_state(self) -> Dict[str, Any]:
         """Load apps state from the apps.json file"""
@@ -61,14 +70,41 @@ class StateManager:
         self._save_preferences(default_preferences)
         return default_preferences
 
-    def _save_apps_state(self):
-        """Save current apps state to the apps.json file"""
+    def _save_apps_state(self, app_name: str = None):
+        """Save current apps state to the apps.json file.
+
+        With app_name, only that app's entry replaces the one on disk, so
+        changes other GWEM processes made to other apps are kept.
+        """
+        from lock_manager import lock_manager
+
         try:
-            with open(self.apps_file, "w", encoding="utf-8") as f:
-                json.dump(self._apps_state, f, indent=2, ensure_ascii=False)
+            with lock_manager.hold("apps.json"):
+                if app_name is not None:
+                    on_disk = self._load_apps_state()
+                    if app_name in self._apps_state:
+                        on_disk[app_name] = self._apps_state[app_name]
+                    else:
+                        on_disk.pop(app_name, None)
+                    self._apps_state = on_disk
+                partial = self.apps_file.with_name(self.apps_file.name + ".tmp")
+                with open(partial, "w", encoding="utf-8") as f:
+                    json.dump(self._apps_state, f, indent=2, ensure_ascii=False)
+                os.replace(partial, self.apps_file)
         except IOError as e:
             print(f"Error: Could not save apps state file: {e}")
 
+    def reload_app_state(self, app_name: str):
+        """Re-read one app's entry from apps.json, e.g. after another process changed it"""
+        from lock_manager import lock_manager
+
+        with lock_manager.hold("apps.json"):
+            on_disk = self._load_apps_state()
+        if app_name in on_disk:
+            self._apps_state[app_name] = on_disk[app_name]
+        else:
+            self._apps_state.pop(app_name, None)
+
     def _save_preferences(self, preferences: Dict[str, Any] = None):
         """Save preferences to the preferences.json file"""
         if preferences is None:
@@ -90,7 +126,7 @@ class StateManager:
     def set_app_state(self, app_name: str, state: Dict[str, Any]):
         """Set the state for a specific app"""
         self._apps_state[app_name] = state
-        self._save_apps_state()
+        self._save_apps_state(app_name)
 
     def is_app_installed(self, app_name: str) -> bool:
         """Check if an app is marked as installed"""
@@ -171,8 +207,14 @@ class StateManager:
     def set_app_active_version(self, app_name: str, version: str):
         """Set the active version of an app"""
         app_state = self.get_app_state(app_name)
+        now = self._get_current_timestamp()
+        last_used = app_state.setdefault("last_used", {})
+        previous_version = app_state.get("active_version")
+        if previous_version:
+            last_used[previous_version] = now
+        last_used[version] = now
         app_state["active_version"] = version
-        app_state["last_version_change"] = self._get_current_timestamp()
+        app_state["last_version_change"] = now
         self.set_app_state(app_name, app_state)
 
     def get_app_installed_versions(self, app_name: str) -> Dict[str, str]:
@@ -187,6 +229,51 @@ class StateManager:
             app_state["installed_versions"] = {}
         app_state["installed_versions"][version] = install_path
         app_state["last_install"] = self._get_current_timestamp()
+        app_state.setdefault("last_used", {})[version] = app_state["last_install"]
+        self.set_app_state(app_name, app_state)
+
+    def get_app_version_last_used(self, app_name: str, version: str) -> str:
+        """Get when a version was last made active, deactivated or installed"""
+        app_state = self.get_app_state(app_name)
+        return app_state.get("last_used", {}).get(version, "")
+
+    def get_app_version_components(self, app_name: str, version: str):
+        """Components installed for a version, or None if it is a full install"""
+        app_state = self.get_app_state(app_name)
+        return app_state.get("components", {}).get(version)
+
+    def set_app_version_components(self, app_name: str, version: str, components):
+        """Record which optional components a version has (None for all of them)"""
+        app_state = self.get_app_state(app_name)
+        if components is None:
+            app_state.get("components", {}).pop(version, None)
+        else:
+            app_state.setdefault("components", {})[version] = sorted(components)
+        self.set_app_state(app_name, app_state)
+
+    def get_app_version_build(self, app_name: str, version: str) -> str:
+        """Which build of a version was installed, for apps with several per version"""
+        return self.get_app_state(app_name).get("builds", {}).get(version, "")
+
+    def set_app_version_build(self, app_name: str, version: str, build: str):
+        """Record which build of a version was installed"""
+        app_state = self.get_app_state(app_name)
+        app_state.setdefault("builds", {})[version] = build
+        self.set_app_state(app_name, app_state)
+
+    def get_app_cold_versions(self, app_name: str) -> Dict[str, Dict[str, Any]]:
+        """Get { version: { 'archive', 'rehydrate' } } for versions in cold storage"""
+        return self.get_app_state(app_name).get("cold", {})
+
+    def set_app_version_cold(self, app_name: str, version: str, entry):
+        """Mark a version as packed into cold storage (None when it is unpacked)"""
+        app_state = self.get_app_state(app_name)
+        if entry is None:
+            if version not in app_state.get("cold", {}):
+                return
+            del app_state["cold"][version]
+        else:
+            app_state.setdefault("cold", {})[version] = entry
         self.set_app_state(app_name, app_state)
 
     def remove_app_version(self, app_name: str, version: str):
@@ -197,14 +284,21 @@ class StateManager:
             and version in app_state["installed_versions"]
         ):
             del app_state["installed_versions"][version]
+            app_state.get("last_used", {}).pop(version, None)
+            app_state.get("components", {}).pop(version, None)
+            app_state.get("builds", {}).pop(version, None)
+            app_state.get("cold", {}).pop(version, None)
             app_state["last_uninstall"] = self._get_current_timestamp()
             self.set_app_state(app_name, app_state)
 
     def remove_app_completely(self, app_name: str):
         """Completely remove an app from the state"""
+        from usage_manager import usage_manager
+
         if app_name in self._apps_state:
             del self._apps_state[app_name]
-            self._save_apps_state()
+            self._save_apps_state(app_name)
+        usage_manager.forget(app_name)
 
 
 state_manager = StateManager()
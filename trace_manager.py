@@ -0,0 +1,245 @@
+import contextvars
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+from state_manager import BASEDIR
+
+TRACES_DIR = BASEDIR / "traces"
+MAX_TRACE_FILES = 20
+MAX_SAMPLES = 200
+
+T = TypeVar("T")
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * fraction // 1))
+    return ordered[int(rank) - 1]
+
+
+class _Collector:
+    """The events of one trace() and the names of the threads that made them"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.events: List[Dict[str, Any]] = []
+        self.thread_names: Dict[int, str] = {}
+
+
+# The trace the current thread (or task) records into, if any
+_collector: contextvars.ContextVar[Optional[_Collector]] = contextvars.ContextVar(
+    "trace_collector", default=None
+)
+
+
+class TraceManager:
+    """Records timed spans for install phases.
+
+    Spans opened inside trace() are written out as a Chrome trace-event
+    JSON file (open it in chrome://tracing or ui.perfetto.dev) when the trace
+    ends. Each trace collects only the spans of its own thread, and of the
+    worker threads it starts through bind(), so traces running at the same
+    time stay apart. Every span, traced or not, also feeds a rolling
+    per-phase sample window in metrics.json used for p50/p95 and throughput.
+    """
+
+    def __init__(self):
+        self.metrics_file = BASEDIR / "metrics.json"
+        self._lock = threading.Lock()
+        self._metrics = self._load_metrics()
+
+    def _load_metrics(self) -> Dict[str, List[List[float]]]:
+        if self.metrics_file.exists():
+            try:
+                with open(self.metrics_file, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except (json.JSONDecodeError, IOError) as e:
+                print(f"Warning: Could not load metrics: {e}")
+        return {}
+
+    def _save_metrics(self):
+        try:
+            with open(self.metrics_file, "w", encoding="utf-8") as f:
+                json.dump(self._metrics, f)
+        except IOError as e:
+            print(f"Error: Could not save metrics: {e}")
+
+    @contextmanager
+    def span(self, name: str, **args):
+        """Time a block. Yields its args dict; set 'bytes' in it to get throughput."""
+        start = time.perf_counter_ns()
+        try:
+            yield args
+        except BaseException as e:
+            args["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            duration = time.perf_counter_ns() - start
+            self._record(name, start, duration, args)
+
+    def _record(self, name: str, start: int, duration: int, args: Dict[str, Any]):
+        thread = threading.current_thread()
+        collector = _collector.get()
+        if collector is not None:
+            with collector.lock:
+                collector.thread_names[thread.ident] = thread.name
+                collector.events.append(
+                    {
+                        "name": name,
+                        "cat": "gwem",
+                        "ph": "X",
+                        "ts": start / 1000,
+                        "dur": duration / 1000,
+                        "pid": os.getpid(),
+                        "tid": thread.ident,
+                        "args": args,
+                    }
+                )
+        with self._lock:
+            if "error" not in args:
+                samples = self._metrics.setdefault(name, [])
+                samples.append([duration / 1e9, args.get("bytes", 0)])
+                del samples[:-MAX_SAMPLES]
+
+    @contextmanager
+    def trace(self, name: str, **args):
+        """Span that also collects every span inside it into a trace file.
+
+        Nested trace() calls behave like span().
+        """
+        if _collector.get() is not None:
+            with self.span(name, **args) as span_args:
+                yield span_args
+            return
+
+        collector = _Collector()
+        reset = _collector.set(collector)
+        try:
+            with self.span(name, **args) as span_args:
+                yield span_args
+        finally:
+            _collector.reset(reset)
+            with collector.lock:
+                events = list(collector.events)
+                thread_names = dict(collector.thread_names)
+            self._export(name, args, events, thread_names)
+            with self._lock:
+                self._save_metrics()
+
+    def bind(self, function: Callable[..., T]) -> Callable[..., T]:
+        """function made to record into the calling thread's trace.
+
+        Wrap the target of worker threads started inside a trace with it;
+        new threads otherwise record into no trace.
+        """
+        collector = _collector.get()
+
+        def run(*args, **kwargs):
+            reset = _collector.set(collector)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                _collector.reset(reset)
+
+        return run
+
+    def http_trace(self, prefix: str = "http"):
+        """An httpx 'trace' extension recording connect, TLS and header phases.
+
+        Pass as extensions={"trace": trace_manager.http_trace()}. Name
+        resolution happens inside connect_tcp, so that span covers DNS too.
+        """
+        started = {}
+
+        def callback(event_name: str, info: Dict[str, Any]):
+            phase, _, state = event_name.rpartition(".")
+            phase = phase.rpartition(".")[2]
+            if state == "started":
+                started[phase] = time.perf_counter_ns()
+            elif state in ("complete", "failed") and phase in started:
+                start = started.pop(phase)
+                args = {"error": "failed"} if state == "failed" else {}
+                self._record(
+                    f"{prefix}.{phase}", start, time.perf_counter_ns() - start, args
+                )
+
+        return callback
+
+    def _export(
+        self,
+        name: str,
+        args: Dict[str, Any],
+        events: List[Dict[str, Any]],
+        thread_names: Dict[int, str],
+    ):
+        """Write a Chrome trace-event file and keep only the newest few"""
+        TRACES_DIR.mkdir(parents=True, exist_ok=True)
+        label = "-".join(str(value) for value in [name, *args.values()])
+        label = re.sub(r"[^\w.-]+", "_", label)[:80]
+        trace_file = TRACES_DIR / f"{time.strftime('%Y%m%d-%H%M%S')}-{label}.json"
+
+        metadata = [
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": os.getpid(),
+                "tid": tid,
+                "args": {"name": thread_name},
+            }
+            for tid, thread_name in thread_names.items()
+        ]
+        try:
+            with open(trace_file, "w", encoding="utf-8") as f:
+                json.dump(
+                    {"traceEvents": metadata + events, "displayTimeUnit": "ms"},
+                    f,
+                    default=str,
+                )
+        except IOError as e:
+            print(f"Error: Could not write trace file: {e}")
+            return
+
+        traces = sorted(TRACES_DIR.glob("*.json"), key=os.path.getmtime)
+        for old_trace in traces[:-MAX_TRACE_FILES]:
+            old_trace.unlink(missing_ok=True)
+        print(f"Trace written to {trace_file}")
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """p50/p95 duration per phase and throughput over the rolling window"""
+        result = {}
+        with self._lock:
+            metrics = {name: list(samples) for name, samples in self._metrics.items()}
+        for name, samples in sorted(metrics.items()):
+            durations = [duration for duration, _ in samples]
+            total_bytes = sum(size for _, size in samples)
+            timed_bytes = sum(duration for duration, size in samples if size)
+            result[name] = {
+                "count": len(samples),
+                "p50_ms": round(percentile(durations, 0.5) * 1000, 1),
+                "p95_ms": round(percentile(durations, 0.95) * 1000, 1),
+            }
+            if total_bytes and timed_bytes:
+                result[name]["mb_per_s"] = round(total_bytes / timed_bytes / 1e6, 2)
+        return result
+
+    def format_summary(self) -> str:
+        lines = []
+        for name, stats in self.summary().items():
+            line = f"{name}: n={stats['count']} p50={stats['p50_ms']}ms p95={stats['p95_ms']}ms"
+            if "mb_per_s" in stats:
+                line += f" {stats['mb_per_s']} MB/s"
+            lines.append(line)
+        return "\n".join(lines)
+
+    def get_latest_trace(self) -> Optional[str]:
+        traces = sorted(TRACES_DIR.glob("*.json"), key=os.path.getmtime)
+        return str(traces[-1]) if traces else None
+
+
+# Global trace manager instance
+trace_manager = TraceManager()
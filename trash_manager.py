@@ -0,0 +1,177 @@
+import os
+import queue
+import shutil
+import stat
+import threading
+import uuid
+from pathlib import Path
+from typing import List
+from state_manager import TRASH_DIR
+
+
+class TrashManager:
+    """Moves directories out of the way instantly and deletes them in the background.
+
+    A discarded directory is renamed into TRASH_DIR (same volume as APPS_DIR, so the
+    rename is atomic) and then removed by a parallel walker on a daemon thread.
+    Anything left in the trash after a crash or early exit is purged by recover().
+    """
+
+    def __init__(self, workers: int = None):
+        self.trash_dir = TRASH_DIR
+        self.workers = workers or min(16, (os.cpu_count() or 2) * 2)
+        self._queue = queue.Queue()
+        self._scheduled = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._ensure_trash_directory()
+
+    def _ensure_trash_directory(self):
+        """Ensure the trash directory exists"""
+        self.trash_dir.mkdir(parents=True, exist_ok=True)
+
+    def discard(self, path) -> bool:
+        """Atomically move a directory into the trash and schedule its deletion.
+
+        Raises OSError if the rename fails (e.g. a file inside is in use), in which
+        case the directory is left untouched.
+        """
+        path = Path(path)
+        if not path.exists():
+            return False
+
+        target = self.trash_dir / f"{uuid.uuid4().hex}-{path.name}"
+        os.replace(path, target)
+        print(f"Moved {path} to trash")
+        self._schedule(target)
+        return True
+
+    def discard_quietly(self, path) -> bool:
+        """discard() for cleanup while handling another error.
+
+        If the rename fails, whatever can be deleted in place is deleted
+        instead and a warning is printed; nothing is raised.
+        """
+        try:
+            return self.discard(path)
+        except OSError as e:
+            print(f"Warning: Could not move {path} to trash, deleting in place: {e}")
+            shutil.rmtree(path, ignore_errors=True)
+            return False
+
+    def recover(self):
+        """Schedule deletion of everything left in the trash by a previous session"""
+        if not self.trash_dir.exists():
+            return 0
+
+        leftovers = list(self.trash_dir.iterdir())
+        for entry in leftovers:
+            self._schedule(entry)
+        if leftovers:
+            print(f"Resuming deletion of {len(leftovers)} trashed item(s)")
+        return len(leftovers)
+
+    def pending_count(self) -> int:
+        """Number of trashed items still waiting to be deleted"""
+        with self._lock:
+            return len(self._scheduled)
+
+    def wait(self):
+        """Block until all scheduled deletions have finished"""
+        self._queue.join()
+
+    def _schedule(self, path: Path):
+        with self._lock:
+            if path in self._scheduled:
+                return
+            self._scheduled.add(path)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="gwem-trash", daemon=True
+                )
+                self._thread.start()
+        self._queue.put(path)
+
+    def _run(self):
+        while True:
+            path = self._queue.get()
+            try:
+                self._purge(path)
+            except Exception as e:
+                print(f"Warning: Could not delete {path}: {e}")
+            finally:
+                with self._lock:
+                    self._scheduled.discard(path)
+                self._queue.task_done()
+
+    def _purge(self, root: Path):
+        """Delete a tree using several threads to list directories and unlink files"""
+        if not root.is_dir() or root.is_symlink():
+            self._unlink(str(root))
+            return
+
+        pending = queue.Queue()
+        directories: List[str] = []
+        directories_lock = threading.Lock()
+
+        def walker():
+            while True:
+                current = pending.get()
+                if current is None:
+                    pending.task_done()
+                    return
+                try:
+                    with os.scandir(current) as entries:
+                        for entry in entries:
+                            if entry.is_dir(follow_symlinks=False):
+                                pending.put(entry.path)
+                            else:
+                                self._unlink(entry.path)
+                    with directories_lock:
+                        directories.append(current)
+                except OSError as e:
+                    print(f"Warning: Could not scan {current}: {e}")
+                finally:
+                    pending.task_done()
+
+        pending.put(str(root))
+        threads = [
+            threading.Thread(target=walker, daemon=True) for _ in range(self.workers)
+        ]
+        for thread in threads:
+            thread.start()
+        pending.join()
+        for _ in threads:
+            pending.put(None)
+        for thread in threads:
+            thread.join()
+
+        # Children always have longer paths than their parents
+        for directory in sorted(directories, key=len, reverse=True):
+            try:
+                os.rmdir(directory)
+            except OSError as e:
+                print(f"Warning: Could not remove directory {directory}: {e}")
+
+    def _unlink(self, path: str):
+        try:
+            os.unlink(path)
+        except PermissionError:
+            # Read-only files (common in Go and Node trees) can't be unlinked on Windows
+            try:
+                os.chmod(path, stat.S_IWRITE)
+                os.unlink(path)
+            except OSError:
+                # Directory symlinks and junctions need rmdir on Windows
+                try:
+                    os.rmdir(path)
+                except OSError as e:
+                    print(f"Warning: Could not delete {path}: {e}")
+        except IsADirectoryError:
+            os.rmdir(path)
+        except FileNotFoundError:
+            pass
+
+
+# Global trash manager instance
+trash_manager = TrashManager()
@@ -0,0 +1,251 @@
+import json
+import threading
+from typing import Any, Dict, List, Optional
+from PySide6 import QtCore
+from download_manager import download_manager
+from state_manager import state_manager, BASEDIR
+from usage_manager import usage_manager
+from versions import parse_version, version_name
+
+CHECK_INTERVAL_MS = 6 * 60 * 60 * 1000
+# Give startup a moment before the first check
+FIRST_CHECK_DELAY_MS = 10 * 1000
+DEFAULT_PREFETCH_RATE_LIMIT = 2 * 1024 * 1024
+IDLE_POLL_SECONDS = 2
+
+
+class UpdateNotifier(QtCore.QObject):
+    """Carries update notifications from the checker thread to the UI"""
+
+    updates_changed = QtCore.Signal(str)
+
+
+class UpdateManager:
+    """Finds newer releases on the line of each installed version.
+
+    Checks run on a background thread against the apps' catalogs (cached by
+    catalog_cache for provider apps). When the "prefetch_updates" preference
+    is on, archives of updates are downloaded ahead of time at a capped
+    speed while no other download runs, so upgrading is a local extract and
+    switch, starting with the versions used most through shims lately.
+    Found updates are kept in updates.json and announced through
+    notifier.updates_changed(app_name).
+
+    The checker thread works on app instances of its own, so the instances
+    the widgets hold are never reloaded underneath them.
+    """
+
+    def __init__(self):
+        self.updates_file = BASEDIR / "updates.json"
+        self.notifier = UpdateNotifier()
+        # Instances used only by the checker thread
+        self.apps = {}
+        self._updates = self._load_updates()
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._timer = None
+
+    def _load_updates(self) -> Dict[str, Dict[str, Any]]:
+        if self.updates_file.exists():
+            try:
+                with open(self.updates_file, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except (json.JSONDecodeError, IOError) as e:
+                print(f"Warning: Could not load updates: {e}")
+        return {}
+
+    def _save_updates(self):
+        try:
+            with open(self.updates_file, "w", encoding="utf-8") as f:
+                json.dump(self._updates, f, indent=2)
+        except IOError as e:
+            print(f"Error: Could not save updates: {e}")
+
+    def watch(self, app):
+        """Include a managed app in the background checks"""
+        if getattr(app, "update_line_depth", None) and app.app_name not in self.apps:
+            self.apps[app.app_name] = type(app)()
+
+    def find_updates(self, app, available: List) -> Dict[str, str]:
+        """Map each installed version to the newest release on its line.
+
+        Only versions whose newest release is not installed yet are listed.
+        Prereleases are offered only for installed prereleases.
+        """
+        depth = app.update_line_depth
+        installed = app.list_installed_versions()
+        installed_parsed = {parse_version(name) for name in installed}
+        newest_per_line = {}
+        for entry in available:
+            name = version_name(entry)
+            candidate = parse_version(name)
+            line = (candidate.line(depth), candidate.is_prerelease)
+            current = newest_per_line.get(line)
+            if current is None or candidate > parse_version(current):
+                newest_per_line[line] = name
+
+        updates = {}
+        for name in installed:
+            version = parse_version(name)
+            lines = [(version.line(depth), False)]
+            if version.is_prerelease:
+                lines.append((version.line(depth), True))
+            candidates = [
+                newest_per_line[line] for line in lines if line in newest_per_line
+            ]
+            if not candidates:
+                continue
+            newest = max(candidates, key=parse_version)
+            if (
+                parse_version(newest) > version
+                and parse_version(newest) not in installed_parsed
+            ):
+                updates[name] = newest
+        return updates
+
+    def check(self, app):
+        """Check one app now (blocking) and prefetch its updates if enabled.
+
+        Pass an instance nothing else is using; its state is reloaded.
+        """
+        app._refresh_state()
+        if not app.list_installed_versions():
+            self._set_updates(app.app_name, {})
+            return {}
+
+        updates = self.find_updates(app, app.get_available_versions())
+        self._set_updates(
+            app.app_name,
+            {installed: {"version": newer} for installed, newer in updates.items()},
+        )
+
+        if hasattr(app, "prefetch") and state_manager.get_preference(
+            "prefetch_updates", False
+        ):
+            # Updates of the versions people actually run come first
+            hints = {
+                version: count
+                for app_name, version, count in usage_manager.get_prefetch_hints()
+                if app_name == app.app_name
+            }
+            ordered = sorted(
+                updates.items(), key=lambda item: hints.get(item[0], 0), reverse=True
+            )
+            for newer in dict.fromkeys(newer for _, newer in ordered):
+                self._prefetch(app, newer)
+        return updates
+
+    def _prefetch(self, app, version: str):
+        if app.get_prefetched(version):
+            return
+        # Only use idle time: wait for user-started downloads to finish
+        while download_manager.busy:
+            if self._stopping.wait(IDLE_POLL_SECONDS):
+                return
+        rate_limit = state_manager.get_preference(
+            "prefetch_rate_limit", DEFAULT_PREFETCH_RATE_LIMIT
+        )
+        try:
+            app.prefetch(version, rate_limit=rate_limit)
+        except Exception as e:
+            print(f"Warning: Could not prefetch {app.app_name} {version}: {e}")
+            return
+        self.notifier.updates_changed.emit(app.app_name)
+
+    def _set_updates(self, app_name: str, updates: Dict[str, Dict[str, Any]]):
+        with self._lock:
+            changed = self._updates.get(app_name, {}) != updates
+            if updates:
+                self._updates[app_name] = updates
+            else:
+                self._updates.pop(app_name, None)
+            if changed:
+                self._save_updates()
+        if changed:
+            self.notifier.updates_changed.emit(app_name)
+
+    def get_update(self, app, installed_version: str = None) -> Optional[Dict]:
+        """The pending update of an installed version (the active one by default).
+
+        Returns {"version", "prefetched"} or None.
+        """
+        installed_version = installed_version or app.active_version
+        with self._lock:
+            update = self._updates.get(app.app_name, {}).get(installed_version)
+        if not update:
+            return None
+        prefetched = hasattr(app, "get_prefetched") and bool(
+            app.get_prefetched(update["version"])
+        )
+        return {"version": update["version"], "prefetched": prefetched}
+
+    def upgrade(self, app, installed_version: str = None) -> Optional[str]:
+        """Install the update of a version and switch to it if it was active.
+
+        The old version stays installed. Returns the new version, or None.
+        """
+        installed_version = installed_version or app.active_version
+        update = self.get_update(app, installed_version)
+        if not update:
+            return None
+
+        new_version = update["version"]
+        app.install(new_version)
+        app._load_state()
+        if new_version not in app.list_installed_versions():
+            return None
+        if app.active_version == installed_version:
+            app.switch_version(new_version)
+
+        with self._lock:
+            self._updates.get(app.app_name, {}).pop(installed_version, None)
+            self._save_updates()
+        self.notifier.updates_changed.emit(app.app_name)
+        return new_version
+
+    def check_all_async(self):
+        """Check every watched app on a background thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(
+            target=self._check_all, name="update-check", daemon=True
+        )
+        self._thread.start()
+
+    def _check_all(self):
+        # Busiest apps first, so their updates get the idle bandwidth first
+        counts = {}
+        for app_name, _, count in usage_manager.get_prefetch_hints(limit=None):
+            counts[app_name] = counts.get(app_name, 0) + count
+        apps = sorted(
+            self.apps.values(),
+            key=lambda app: counts.get(app.app_name, 0),
+            reverse=True,
+        )
+        for app in apps:
+            if self._stopping.is_set():
+                return
+            try:
+                self.check(app)
+            except Exception as e:
+                print(f"Warning: Update check for {app.app_name} failed: {e}")
+
+    def start(self, interval_ms: int = CHECK_INTERVAL_MS):
+        """Check shortly after startup and then periodically"""
+        self._stopping.clear()
+        self._timer = QtCore.QTimer()
+        self._timer.setInterval(interval_ms)
+        self._timer.timeout.connect(self.check_all_async)
+        self._timer.start()
+        QtCore.QTimer.singleShot(FIRST_CHECK_DELAY_MS, self.check_all_async)
+
+    def stop(self):
+        self._stopping.set()
+        if self._timer is not None:
+            self._timer.stop()
+            self._timer = None
+
+
+# Global update manager instance
+update_manager = UpdateManager()
@@ -0,0 +1,157 @@
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from state_manager import BASEDIR
+
+USAGE_LOG = BASEDIR / "usage.log"
+
+
+class UsageManager:
+    """Aggregates the local usage log written by shims and launchers.
+
+    Shims append one 'app<TAB>version<TAB>unix_time' line per invocation to
+    usage.log, which costs a single file append. Nothing is sent anywhere: GWEM
+    folds the log into usage.json the first time usage data is requested, then
+    rotates the log away so it never grows without bound. Folding happens
+    under a lock shared with other GWEM processes, so each record is counted
+    once.
+    """
+
+    def __init__(self):
+        self.log_file = USAGE_LOG
+        self.usage_file = BASEDIR / "usage.json"
+        self._lock = threading.Lock()
+        self._usage = self._load_usage()
+
+    def _load_usage(self) -> Dict[str, Dict[str, Dict[str, int]]]:
+        """Load aggregated usage from the usage.json file"""
+        if self.usage_file.exists():
+            try:
+                with open(self.usage_file, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except (json.JSONDecodeError, IOError) as e:
+                print(f"Warning: Could not load usage file: {e}")
+        return {}
+
+    def _save_usage(self, usage):
+        """Save aggregated usage to the usage.json file"""
+        try:
+            partial = self.usage_file.with_name(self.usage_file.name + ".tmp")
+            with open(partial, "w", encoding="utf-8") as f:
+                json.dump(usage, f, indent=2, ensure_ascii=False)
+            os.replace(partial, self.usage_file)
+        except IOError as e:
+            print(f"Error: Could not save usage file: {e}")
+
+    def aggregate(self) -> int:
+        """Fold new usage.log records into usage.json. Returns records read."""
+        return self._update(lambda usage: 0)
+
+    def _update(self, change) -> int:
+        """Fold the log into the latest usage.json, apply change(usage) and save.
+
+        change returns how many entries it modified; the sum with the records
+        read is returned.
+        """
+        from lock_manager import lock_manager
+
+        with self._lock, lock_manager.hold("usage.json"):
+            # Another process may have folded records in since we last looked
+            usage = self._load_usage()
+            if self.log_file.exists():
+                # Rotate first so shims keep appending to a fresh file while we read
+                rotated = self.log_file.with_name(f"usage.{time.time_ns()}.log")
+                try:
+                    os.replace(self.log_file, rotated)
+                except OSError:
+                    # A shim is writing right now; pick the records up next time
+                    pass
+
+            # Also picks up logs rotated by a session that exited before reading them
+            count = 0
+            for rotated in sorted(self.log_file.parent.glob("usage.*.log")):
+                try:
+                    count += self._read_log(rotated, usage)
+                    rotated.unlink(missing_ok=True)
+                except OSError as e:
+                    print(f"Warning: Could not read usage log {rotated}: {e}")
+
+            count += change(usage)
+            if count:
+                self._save_usage(usage)
+            # Replaced, never changed in place, so readers need no lock
+            self._usage = usage
+        return count
+
+    def _read_log(self, path, usage) -> int:
+        count = 0
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                parts = line.rstrip("\r\n").split("\t")
+                if len(parts) != 3:
+                    continue
+                app_name, version, timestamp = parts
+                try:
+                    timestamp = int(timestamp)
+                except ValueError:
+                    continue
+                entry = usage.setdefault(app_name, {}).setdefault(
+                    version, {"count": 0, "last_used": 0}
+                )
+                entry["count"] += 1
+                entry["last_used"] = max(entry["last_used"], timestamp)
+                count += 1
+        return count
+
+    def get_app_usage(self, app_name: str) -> Dict[str, Dict[str, int]]:
+        """Get { version: { 'count', 'last_used' } } for an app"""
+        self.aggregate()
+        return self._usage.get(app_name, {})
+
+    def get_last_used(self, app_name: str, version: str) -> Optional[float]:
+        """Get when a version was last run through a shim, as a unix timestamp"""
+        entry = self.get_app_usage(app_name).get(version)
+        return entry["last_used"] if entry else None
+
+    def get_most_used(self, app_name: str) -> List[str]:
+        """Get the versions of an app ordered from most to least used"""
+        usage = self.get_app_usage(app_name)
+        return sorted(
+            usage.keys(),
+            key=lambda version: (usage[version]["count"], usage[version]["last_used"]),
+            reverse=True,
+        )
+
+    def get_prefetch_hints(
+        self, max_age_days: int = 30, limit: Optional[int] = 10
+    ) -> List[Tuple[str, str, int]]:
+        """Get (app, version, count) for versions used recently, busiest first.
+
+        limit=None returns all of them.
+        """
+        self.aggregate()
+        cutoff = time.time() - max_age_days * 86400
+        hints = [
+            (app_name, version, entry["count"])
+            for app_name, versions in self._usage.items()
+            for version, entry in versions.items()
+            if entry["last_used"] >= cutoff
+        ]
+        hints.sort(key=lambda hint: hint[2], reverse=True)
+        return hints[:limit]
+
+    def forget(self, app_name: str, version: str = None):
+        """Drop usage data for a version, or for a whole app"""
+
+        def remove(usage) -> int:
+            if version is None:
+                return int(usage.pop(app_name, None) is not None)
+            return int(usage.get(app_name, {}).pop(version, None) is not None)
+
+        self._update(remove)
+
+
+# Global usage manager instance
+usage_manager = UsageManager()
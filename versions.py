@@ -0,0 +1,311 @@
+"""Version parsing, ordering and range queries shared by every app.
+
+Upstream catalogs name versions in different ways ("v20.11.1", "go1.22rc1",
+"4.3-stable", "3.13.0a1", "php-8.3.1-nts-Win32-vs16-x64.zip"). parse_version
+pulls out the first dotted number run and any prerelease tag after it, and
+returns a cached, comparable Version.
+"""
+
+import re
+from functools import lru_cache
+from typing import Any, Callable, Iterable, List, Optional
+
+_VERSION_PATTERN = re.compile(
+    r"(\d+(?:\.\d+)*)(?:[-_.]?(dev|alpha|a|beta|b|preview|pre|rc|c)\.?(\d*)(?![a-z]))?",
+    re.IGNORECASE,
+)
+_SPEC_PART_PATTERN = re.compile(r"^(\^|~|>=|<=|>|<|=)?\s*(.+)$")
+# An operator and the space after it, e.g. ">= " in ">= 1.2"
+_SPACED_OPERATOR_PATTERN = re.compile(r"(\^|~|>=|<=|>|<|=)\s+")
+
+# Ordering of prerelease stages; a final release sorts after all of them
+_STAGES = {
+    "dev": 0,
+    "alpha": 1,
+    "a": 1,
+    "beta": 2,
+    "b": 2,
+    "preview": 2,
+    "pre": 3,
+    "rc": 3,
+    "c": 3,
+}
+_FINAL = 4
+_PAD = 4
+
+
+class Version:
+    """A parsed version. Instances are immutable and cached by parse_version."""
+
+    __slots__ = ("raw", "release", "stage", "stage_number", "_key")
+
+    def __init__(self, raw: str, release: tuple, stage: str = "", stage_number=0):
+        self.raw = raw
+        self.release = release
+        self.stage = stage
+        self.stage_number = stage_number
+        padded = release + (0,) * (_PAD - len(release))
+        self._key = (
+            padded,
+            _STAGES.get(stage, _FINAL) if stage else _FINAL,
+            stage_number,
+        )
+
+    @property
+    def major(self) -> int:
+        return self.release[0] if self.release else 0
+
+    @property
+    def minor(self) -> int:
+        return self.release[1] if len(self.release) > 1 else 0
+
+    @property
+    def patch(self) -> int:
+        return self.release[2] if len(self.release) > 2 else 0
+
+    @property
+    def is_prerelease(self) -> bool:
+        return bool(self.stage)
+
+    def line(self, depth: int = 2) -> tuple:
+        """The release line, e.g. (20, 11) for 20.11.1 with depth 2"""
+        return self._key[0][:depth]
+
+    def __lt__(self, other):
+        return self._key < other._key
+
+    def __le__(self, other):
+        return self._key <= other._key
+
+    def __gt__(self, other):
+        return self._key > other._key
+
+    def __ge__(self, other):
+        return self._key >= other._key
+
+    def __eq__(self, other):
+        if not isinstance(other, Version):
+            return NotImplemented
+        return self._key == other._key
+
+    def __hash__(self):
+        return hash(self._key)
+
+    def __str__(self):
+        text = ".".join(str(part) for part in self.release)
+        if self.stage:
+            text += f"{self.stage}{self.stage_number or ''}"
+        return text
+
+    def __repr__(self):
+        return f"Version({self.raw!r})"
+
+
+@lru_cache(maxsize=65536)
+def parse_version(text: str) -> Version:
+    """Parse a version string. Strings without any digits parse as 0."""
+    match = _VERSION_PATTERN.search(text)
+    if not match:
+        return Version(text, ())
+    release = tuple(int(part) for part in match.group(1).split("."))
+    stage = (match.group(2) or "").lower()
+    stage_number = int(match.group(3)) if match.group(3) else 0
+    return Version(text, release, stage, stage_number)
+
+
+class CatalogEntry:
+    """One installable version in a catalog, with what is known about its archive.
+
+    url, size and sha256 describe the archive as listed by the catalog; any
+    of them may be None when the catalog does not say. date is the release
+    date (YYYY-MM-DD), stable None when the catalog has no such flag.
+    Entries are cached as rows (to_row/from_row) and can be read like the
+    dicts plugins return, e.g. entry["real_name"] or entry.get("lts").
+    """
+
+    __slots__ = (
+        "real_name",
+        "display_name",
+        "url",
+        "size",
+        "sha256",
+        "date",
+        "lts",
+        "stable",
+    )
+
+    def __init__(
+        self,
+        real_name: str,
+        display_name: str = None,
+        url: str = None,
+        size: int = None,
+        sha256: str = None,
+        date: str = None,
+        lts: bool = False,
+        stable: bool = None,
+    ):
+        self.real_name = real_name
+        self.display_name = display_name or real_name
+        self.url = url
+        self.size = size
+        self.sha256 = sha256
+        self.date = date
+        self.lts = lts
+        self.stable = stable
+
+    def to_row(self) -> list:
+        return [getattr(self, field) for field in self.__slots__]
+
+    @classmethod
+    def from_row(cls, row) -> "CatalogEntry":
+        """Rebuild an entry from to_row(), or from a catalog entry dict"""
+        if isinstance(row, dict):
+            return cls(**{k: v for k, v in row.items() if k in cls.__slots__})
+        return cls(*row)
+
+    def __getitem__(self, key: str):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.__slots__ and getattr(self, key) is not None
+
+    def get(self, key: str, default=None):
+        value = getattr(self, key, None) if key in self.__slots__ else None
+        return default if value is None else value
+
+    def __str__(self):
+        return self.real_name
+
+    def __repr__(self):
+        return f"CatalogEntry({self.real_name!r})"
+
+
+def version_name(version_obj) -> str:
+    """The version string of a catalog entry (CatalogEntry, dict or plain str)"""
+    if isinstance(version_obj, CatalogEntry):
+        return version_obj.real_name
+    if isinstance(version_obj, dict):
+        return version_obj.get("real_name", str(version_obj))
+    return str(version_obj)
+
+
+def sort_versions(
+    items: Iterable, key: Callable[[Any], str] = version_name, reverse: bool = True
+) -> List:
+    """Sort catalog entries by version, newest first by default"""
+    # Sorting on the precomputed tuple keeps comparisons in C
+    return sorted(
+        items, key=lambda item: parse_version(key(item))._key, reverse=reverse
+    )
+
+
+class VersionRange:
+    """A version range such as '20.x', '^3.12', '~1.21.3', '>=1.2 <2' or 'latest'."""
+
+    __slots__ = ("spec", "_checks", "allow_prerelease")
+
+    def __init__(self, spec: str):
+        self.spec = spec.strip()
+        self._checks = []
+        self.allow_prerelease = False
+
+        spec = _SPACED_OPERATOR_PATTERN.sub(r"\1", self.spec)
+        for part in re.split(r"[\s,]+", spec):
+            if part.lower() in ("", "*", "x", "latest"):
+                continue
+            operator, text = _SPEC_PART_PATTERN.match(part).groups()
+            self._add_check(operator or "", text)
+
+    def _add_check(self, operator: str, text: str):
+        bound = parse_version(text.lower().rstrip(".x*"))
+        if bound.is_prerelease:
+            self.allow_prerelease = True
+        depth = len(bound.release)
+        bound_key = bound._key
+
+        if operator == "^":
+            # Compatible: same major (or same minor while major is 0)
+            cut = 2 if bound.major == 0 and depth > 1 else 1
+            prefix = bound.release[:cut]
+            self._checks.append(
+                lambda v: v._key >= bound_key and v.release[:cut] == prefix
+            )
+        elif operator == "~":
+            # Same minor when a minor is given, otherwise same major
+            cut = min(depth, 2)
+            prefix = bound.release[:cut]
+            self._checks.append(
+                lambda v: v._key >= bound_key and v.release[:cut] == prefix
+            )
+        elif operator == ">=":
+            self._checks.append(lambda v: v._key >= bound_key)
+        elif operator == ">":
+            self._checks.append(lambda v: v._key > bound_key)
+        elif operator == "<=":
+            self._checks.append(lambda v: v._key <= bound_key)
+        elif operator == "<":
+            self._checks.append(lambda v: v._key < bound_key)
+        elif operator == "" and not bound.is_prerelease:
+            # '20', '20.x' and '1.21' all mean "anything on that line"
+            prefix = bound.release
+            self._checks.append(lambda v: v.release[:depth] == prefix)
+        else:
+            self._checks.append(lambda v: v._key == bound_key)
+
+    def matches(self, version) -> bool:
+        if not isinstance(version, Version):
+            version = parse_version(version)
+        if version.stage and not self.allow_prerelease:
+            return False
+        for check in self._checks:
+            if not check(version):
+                return False
+        return True
+
+    def __repr__(self):
+        return f"VersionRange({self.spec!r})"
+
+
+@lru_cache(maxsize=1024)
+def parse_range(spec: str) -> VersionRange:
+    """Parse a range spec (cached)"""
+    return VersionRange(spec)
+
+
+def filter_versions(
+    spec: str, items: Iterable, key: Callable[[Any], str] = version_name
+) -> List:
+    """Catalog entries matching a range, newest first"""
+    version_range = parse_range(spec)
+    return sort_versions(
+        (item for item in items if version_range.matches(parse_version(key(item)))),
+        key=key,
+    )
+
+
+def resolve_version(
+    spec: str, items: Iterable, key: Callable[[Any], str] = version_name
+) -> Optional[Any]:
+    """The newest catalog entry matching a range, or None.
+
+    An exact version name always wins, so pins like 'v20.11.1' or
+    'php-8.3.1-nts-Win32-vs16-x64.zip' resolve to themselves.
+    """
+    items = list(items)
+    for item in items:
+        if key(item) == spec:
+            return item
+
+    version_range = parse_range(spec)
+    best = None
+    best_key = None
+    for item in items:
+        version = parse_version(key(item))
+        if (best_key is None or version._key > best_key) and version_range.matches(
+            version
+        ):
+            best, best_key = item, version._key
+    return best
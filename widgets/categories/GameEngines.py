@@ -2,6 +2,8 @@ from PySide6 import QtWidgets
 from widgets.installable_widget import InstallableWidget
 from widgets.version_selector_dialog import VersionSelectorDialog
 from widgets.version_manager_widget import VersionManagerWidget
+from update_manager import update_manager
+from widgets.install_progress_dialog import InstallProgressDialog
 from ..FlowLayout import FlowLayout
 
 from apps.godot import Godot
@@ -22,6 +24,7 @@ class GameEngines(QtWidgets.QStackedWidget):
             installed=self.godot_app.is_installed,
             on_install=self._handle_godot_install,
             on_manage_versions=self._handle_godot_manage_versions,
+            on_update=self._handle_godot_update,
             show_success_message=False,
         )
         self.godot_version_manager = VersionManagerWidget(
@@ -30,6 +33,10 @@ class GameEngines(QtWidgets.QStackedWidget):
 
         self.layout.addWidget(self.godot_widget)
 
+        update_manager.watch(self.godot_app)
+        self._refresh_update(self.godot_app.app_name)
+        update_manager.notifier.updates_changed.connect(self._refresh_update)
+
     def _handle_godot_install(self):
         self._handle_app_install(self.godot_app, self.godot_widget, "Godot")
 
@@ -44,11 +51,16 @@ class GameEngines(QtWidgets.QStackedWidget):
             available_versions = app.get_available_versions()
 
         selected_version = VersionSelectorDialog.select_version(
-            app_name, available_versions, parent=self
+            app_name, available_versions, parent=self, app_key=app.app_name
         )
 
         if selected_version:
-            app.install(selected_version)
+            if not InstallProgressDialog.run(
+                f"Installing {app_name} {selected_version}",
+                lambda: app.install(selected_version),
+                parent=self,
+            ):
+                raise Exception("Installation cancelled by user")
             widget.installed = app.is_installed
             widget.update_manage_versions_button()
             current_description = widget.description_label.text()
@@ -65,5 +77,20 @@ class GameEngines(QtWidgets.QStackedWidget):
         else:
             raise Exception("Installation cancelled by user")
 
+    def _refresh_update(self, app_name):
+        """Show or hide the update button on the Godot card"""
+        if app_name != self.godot_app.app_name:
+            return
+        update = update_manager.get_update(self.godot_app)
+        if update:
+            self.godot_widget.set_update(update["version"], ready=update["prefetched"])
+        else:
+            self.godot_widget.set_update(None)
+
+    def _handle_godot_update(self):
+        """Upgrade the active Godot version to the newest release on its line"""
+        self.godot_widget.run_update(self.godot_app, "Godot")
+        self._refresh_update(self.godot_app.app_name)
+
     def _handle_godot_manage_versions(self):
         self.godot_version_manager.show_manager()
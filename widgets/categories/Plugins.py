@@ -1,7 +1,12 @@
 from PySide6 import QtWidgets
 from widgets.installable_widget import InstallableWidget
+from widgets.install_progress_dialog import InstallProgressDialog
 from widgets.version_manager_widget import VersionManagerWidget
+from widgets.version_selector_dialog import VersionSelectorDialog
 from plugin_manager import plugin_manager
+from plugin_host import plugin_host
+from plugin_watcher import create_plugin_watcher
+from state_manager import state_manager, PLUGINS_DIR
 from ..FlowLayout import FlowLayout
 
 
@@ -17,101 +22,129 @@ class Plugins(QtWidgets.QStackedWidget):
         self.plugin_version_managers = {}
 
         self._load_plugin_widgets()
-
-    def _load_plugin_widgets(self):
-        """Load widgets for all available plugins"""
-        plugin_apps = plugin_manager.get_plugin_apps()
-
-        for plugin_name, apps in plugin_apps.items():
-            for app_instance in apps:
-                self._create_widget_for_app(app_instance, plugin_name)
-
-    def _create_widget_for_app(self, app_instance, plugin_name):
-        """Create a widget for a plugin app instance"""
-        # Try to get a readable name for the app
-        app_display_name = getattr(app_instance, "display_name", None)
-        if not app_display_name:
-            app_display_name = getattr(
-                app_instance, "app_name", app_instance.__class__.__name__
-            )
-
-        # Try to get a description for the app
-        app_description = getattr(
-            app_instance, "description", f"Plugin from {plugin_name}"
+        self.plugin_watcher = create_plugin_watcher(
+            PLUGINS_DIR, self.apply_plugin_changes, parent=self
         )
 
-        widget_key = f"{plugin_name}_{app_instance.__class__.__name__}"
+    def _load_plugin_widgets(self):
+        """Create widgets from the plugin manifests without importing any plugin"""
+        for plugin_name, manifest in plugin_manager.get_plugin_manifests().items():
+            for app_manifest in manifest["provides"]:
+                self._create_widget_for_app(app_manifest, plugin_name, manifest)
 
-        # Check if this is a ManagedApp or NonManagedApp
-        is_managed_app = hasattr(app_instance, "is_installed")
+    def _create_widget_for_app(self, app_manifest, plugin_name, manifest):
+        """Create a widget for an app a plugin provides"""
+        app_display_name = app_manifest["display_name"]
+        app_description = app_manifest["description"] or f"Plugin from {plugin_name}"
+        class_name = app_manifest["class"]
+        widget_key = f"{plugin_name}_{class_name}"
+        is_managed_app = app_manifest["managed"]
 
         if is_managed_app:
-            # ManagedApp - has version management
+            # ManagedApp - has version management; state comes from apps.json
+            app_name = app_manifest.get("app_name")
             widget = InstallableWidget(
                 title=app_display_name,
                 description=app_description,
-                installed=app_instance.is_installed,
-                on_install=lambda app=app_instance, widget_key=widget_key: self._handle_managed_app_install(
-                    app, widget_key
+                installed=bool(app_name) and state_manager.is_app_installed(app_name),
+                on_install=lambda widget_key=widget_key: self._handle_managed_app_install(
+                    widget_key
                 ),
-                on_manage_versions=lambda app=app_instance, name=app_display_name: self._handle_manage_versions(
-                    app, name
+                on_manage_versions=lambda widget_key=widget_key: self._handle_manage_versions(
+                    widget_key
                 ),
                 show_success_message=False,
             )
-
-            # Create version manager for managed apps
-            version_manager = VersionManagerWidget(
-                app_instance, app_display_name, parent=self
-            )
-            self.plugin_version_managers[widget_key] = version_manager
-
         else:
             # NonManagedApp - simple install only
             widget = InstallableWidget(
                 title=app_display_name,
                 description=app_description,
                 installed=False,  # NonManagedApps don't track installation state
-                on_install=lambda app=app_instance: self._handle_non_managed_app_install(
-                    app
+                on_install=lambda widget_key=widget_key: self._handle_non_managed_app_install(
+                    widget_key
                 ),
                 show_success_message=True,
             )
+        widget.setToolTip(f"{manifest['name']} ({manifest['category']})")
 
         self.plugin_widgets[widget_key] = {
             "widget": widget,
-            "app_instance": app_instance,
             "plugin_name": plugin_name,
+            "class_name": class_name,
+            "app_manifest": app_manifest,
+            "display_name": app_display_name,
             "is_managed": is_managed_app,
         }
 
         self.layout.addWidget(widget)
 
-    def _handle_managed_app_install(self, app_instance, widget_key):
-        """Handle installation for managed apps"""
-        try:
-            app_instance.install()
-            # Update widget state
-            if widget_key in self.plugin_widgets:
-                widget_info = self.plugin_widgets[widget_key]
-                widget_info["widget"].set_installed(app_instance.is_installed)
-        except Exception as e:
-            print(f"Error installing {app_instance.__class__.__name__}: {e}")
+    def _get_app_instance(self, widget_key):
+        """Get the app behind a widget, running it in the plugin host unless disabled"""
+        widget_info = self.plugin_widgets[widget_key]
+        if state_manager.get_preference("isolate_plugins", True):
+            return plugin_host.get_app(
+                widget_info["plugin_name"], widget_info["app_manifest"]
+            )
+        return plugin_manager.get_app(
+            widget_info["plugin_name"], widget_info["class_name"]
+        )
+
+    def _handle_managed_app_install(self, widget_key):
+        """Pick a version here, then install it behind a progress dialog"""
+        widget_info = self.plugin_widgets[widget_key]
+        display_name = widget_info["display_name"]
+        app_instance = self._get_app_instance(widget_key)
+
+        # Workers have no UI, so the version is chosen on this thread
+        selected_version = VersionSelectorDialog.select_version(
+            display_name,
+            app_instance.get_available_versions(),
+            parent=self,
+            app_key=app_instance.app_name,
+        )
+        if not selected_version:
+            raise Exception("Installation cancelled by user")
 
-    def _handle_non_managed_app_install(self, app_instance):
+        if not InstallProgressDialog.run(
+            f"Installing {display_name} {selected_version}",
+            lambda: app_instance.install(selected_version),
+            parent=self,
+        ):
+            raise Exception("Installation cancelled by user")
+
+        widget = widget_info["widget"]
+        widget.installed = app_instance.is_installed
+        widget.update_manage_versions_button()
+        if not app_instance.is_installed:
+            raise Exception(f"{display_name} {selected_version} was not installed")
+
+    def _handle_non_managed_app_install(self, widget_key):
         """Handle installation for non-managed apps"""
         try:
-            app_instance.install()
+            self._get_app_instance(widget_key).install()
         except Exception as e:
-            print(f"Error installing {app_instance.__class__.__name__}: {e}")
+            print(f"Error installing {widget_key}: {e}")
 
-    def _handle_manage_versions(self, app_instance, app_name):
-        """Show version manager for managed apps"""
-        for widget_key, version_manager in self.plugin_version_managers.items():
-            widget_info = self.plugin_widgets.get(widget_key)
-            if widget_info and widget_info["app_instance"] == app_instance:
-                version_manager.show_manager()
-                break
+    def _handle_manage_versions(self, widget_key):
+        """Show version manager for managed apps, creating it on first use"""
+        version_manager = self.plugin_version_managers.get(widget_key)
+        if version_manager is None:
+            try:
+                app_instance = self._get_app_instance(widget_key)
+            except Exception as e:
+                print(f"Error loading plugin for {widget_key}: {e}")
+                QtWidgets.QMessageBox.critical(
+                    self, "Plugin Error", f"Could not load plugin: {str(e)}"
+                )
+                return
+            version_manager = VersionManagerWidget(
+                app_instance,
+                self.plugin_widgets[widget_key]["display_name"],
+                parent=self,
+            )
+            self.plugin_version_managers[widget_key] = version_manager
+        version_manager.show_manager()
 
     def _handle_app_install(self, app_instance, widget, app_name):
         """Generic handler for app installation with version selection"""
@@ -141,12 +174,86 @@ class Plugins(QtWidgets.QStackedWidget):
         self.plugin_widgets.clear()
         self.plugin_version_managers.clear()
 
-        # Reload plugins
+        # Reload plugins; workers re-import them on their next call
         plugin_manager.reload_plugins()
+        plugin_host.shutdown()
 
         # Recreate widgets
         self._load_plugin_widgets()
 
+    def apply_plugin_changes(self):
+        """Reload only the plugin files that changed and update just their widgets"""
+        changes = plugin_manager.refresh_plugins()
+        manifests = plugin_manager.get_plugin_manifests()
+
+        for plugin_name in changes["removed"]:
+            plugin_host.forget(plugin_name)
+            for widget_key in self._plugin_widget_keys(plugin_name):
+                self._remove_widget(widget_key)
+        for plugin_name in changes["changed"]:
+            plugin_host.forget(plugin_name)
+            self._update_plugin_widgets(plugin_name, manifests[plugin_name])
+        for plugin_name in changes["added"]:
+            for app_manifest in manifests[plugin_name]["provides"]:
+                self._create_widget_for_app(
+                    app_manifest, plugin_name, manifests[plugin_name]
+                )
+
+        for kind, plugin_names in changes.items():
+            if plugin_names:
+                print(f"Plugins {kind}: {', '.join(plugin_names)}")
+
+    def _plugin_widget_keys(self, plugin_name):
+        return [
+            widget_key
+            for widget_key, widget_info in self.plugin_widgets.items()
+            if widget_info["plugin_name"] == plugin_name
+        ]
+
+    def _remove_widget(self, widget_key):
+        widget_info = self.plugin_widgets.pop(widget_key)
+        widget_info["widget"].setParent(None)
+        version_manager = self.plugin_version_managers.pop(widget_key, None)
+        if version_manager is not None:
+            version_manager.deleteLater()
+
+    def _update_plugin_widgets(self, plugin_name, manifest):
+        """Bring the widgets of an edited plugin in line with its new manifest"""
+        remaining = {
+            self.plugin_widgets[widget_key]["class_name"]: widget_key
+            for widget_key in self._plugin_widget_keys(plugin_name)
+        }
+        for app_manifest in manifest["provides"]:
+            widget_key = remaining.pop(app_manifest["class"], None)
+            if (
+                widget_key is not None
+                and self.plugin_widgets[widget_key]["is_managed"]
+                != app_manifest["managed"]
+            ):
+                self._remove_widget(widget_key)
+                widget_key = None
+            if widget_key is None:
+                self._create_widget_for_app(app_manifest, plugin_name, manifest)
+                continue
+
+            widget_info = self.plugin_widgets[widget_key]
+            widget_info["app_manifest"] = app_manifest
+            widget_info["display_name"] = app_manifest["display_name"]
+            widget = widget_info["widget"]
+            widget.title_label.setText(app_manifest["display_name"])
+            widget.description_label.setText(
+                app_manifest["description"] or f"Plugin from {plugin_name}"
+            )
+            widget.setToolTip(f"{manifest['name']} ({manifest['category']})")
+
+            # Recreated on next use so it talks to the reloaded app
+            version_manager = self.plugin_version_managers.pop(widget_key, None)
+            if version_manager is not None:
+                version_manager.deleteLater()
+
+        for widget_key in remaining.values():
+            self._remove_widget(widget_key)
+
     def get_plugin_info(self):
         """Get information about loaded plugins"""
         return plugin_manager.get_plugin_info()
@@ -1,7 +1,9 @@
 from PySide6 import QtWidgets
 from widgets.installable_widget import InstallableWidget
 from widgets.version_selector_dialog import VersionSelectorDialog
+from widgets.install_progress_dialog import InstallProgressDialog
 from widgets.version_manager_widget import VersionManagerWidget
+from update_manager import update_manager
 from ..FlowLayout import FlowLayout
 
 
@@ -31,6 +33,7 @@ class Runtimes(QtWidgets.QStackedWidget):
             installed=self.nodejs_app.is_installed,
             on_install=self._handle_nodejs_install,
             on_manage_versions=self._handle_nodejs_manage_versions,
+            on_update=self._handle_nodejs_update,
             show_success_message=False,  # Disable default success message for managed apps
         )
 
@@ -40,6 +43,7 @@ class Runtimes(QtWidgets.QStackedWidget):
             installed=self.bun_app.is_installed,
             on_install=self._handle_bun_install,
             on_manage_versions=self._handle_bun_manage_versions,
+            on_update=self._handle_bun_update,
             show_success_message=False,  # Disable default success message for managed apps
         )
 
@@ -49,6 +53,7 @@ class Runtimes(QtWidgets.QStackedWidget):
             installed=self.golang_app.is_installed,
             on_install=self._handle_golang_install,
             on_manage_versions=self._handle_golang_manage_versions,
+            on_update=self._handle_golang_update,
             show_success_message=False,  # Disable default success message for managed apps
         )
 
@@ -58,6 +63,7 @@ class Runtimes(QtWidgets.QStackedWidget):
             installed=self.python_app.is_installed,
             on_install=self._handle_python_install,
             on_manage_versions=self._handle_python_manage_versions,
+            on_update=self._handle_python_update,
             show_success_message=False,  # Disable default success message for managed apps
         )
 
@@ -95,6 +101,20 @@ class Runtimes(QtWidgets.QStackedWidget):
         self.layout.addWidget(self.python_widget)
         self.layout.addWidget(self.php_widget)
 
+        self.update_widgets = {
+            app.app_name: (app, widget)
+            for app, widget in (
+                (self.nodejs_app, self.nodejs_widget),
+                (self.bun_app, self.bun_widget),
+                (self.golang_app, self.golang_widget),
+                (self.python_app, self.python_widget),
+            )
+        }
+        for app_name, (app, widget) in self.update_widgets.items():
+            update_manager.watch(app)
+            self._refresh_update(app_name)
+        update_manager.notifier.updates_changed.connect(self._refresh_update)
+
     def _handle_nodejs_install(self):
         """Handle Node.js installation with version selection"""
         self._handle_app_install(self.nodejs_app, self.nodejs_widget, "Node.js")
@@ -105,6 +125,10 @@ class Runtimes(QtWidgets.QStackedWidget):
             self.nodejs_app, self.nodejs_widget, "The bulky JavaScript runtime."
         )
 
+    def _handle_nodejs_update(self):
+        """Upgrade the active Node.js version to the newest release on its line"""
+        self._handle_app_update(self.nodejs_app, self.nodejs_widget, "Node.js")
+
     def _handle_nodejs_manage_versions(self):
         """Show the Node.js version manager dialog"""
         self.nodejs_version_manager.show_manager()
@@ -119,6 +143,10 @@ class Runtimes(QtWidgets.QStackedWidget):
             self.bun_app, self.bun_widget, "The fast JavaScript runtime."
         )
 
+    def _handle_bun_update(self):
+        """Upgrade the active Bun version to the newest release on its line"""
+        self._handle_app_update(self.bun_app, self.bun_widget, "Bun")
+
     def _handle_bun_manage_versions(self):
         """Show the Bun version manager dialog"""
         self.bun_version_manager.show_manager()
@@ -133,6 +161,10 @@ class Runtimes(QtWidgets.QStackedWidget):
             self.golang_app, self.golang_widget, "The Go programming language."
         )
 
+    def _handle_golang_update(self):
+        """Upgrade the active Go version to the newest release on its line"""
+        self._handle_app_update(self.golang_app, self.golang_widget, "Go")
+
     def _handle_golang_manage_versions(self):
         """Show the Go version manager dialog"""
         self.golang_version_manager.show_manager()
@@ -147,6 +179,10 @@ class Runtimes(QtWidgets.QStackedWidget):
             self.python_app, self.python_widget, "The Python programming language."
         )
 
+    def _handle_python_update(self):
+        """Upgrade the active Python version to the newest release on its line"""
+        self._handle_app_update(self.python_app, self.python_widget, "Python")
+
     def _handle_python_manage_versions(self):
         """Show the Python version manager dialog"""
         self.python_version_manager.show_manager()
@@ -172,11 +208,16 @@ class Runtimes(QtWidgets.QStackedWidget):
             available_versions = app.get_available_versions()
 
         selected_version = VersionSelectorDialog.select_version(
-            app_name, available_versions, parent=self
+            app_name, available_versions, parent=self, app_key=app.app_name
         )
 
         if selected_version:
-            app.install(selected_version)
+            if not InstallProgressDialog.run(
+                f"Installing {app_name} {selected_version}",
+                lambda: app.install(selected_version),
+                parent=self,
+            ):
+                raise Exception("Installation cancelled by user")
             widget.installed = app.is_installed
             widget.update_manage_versions_button()
             current_description = widget.description_label.text()
@@ -193,6 +234,22 @@ class Runtimes(QtWidgets.QStackedWidget):
         else:
             raise Exception("Installation cancelled by user")
 
+    def _refresh_update(self, app_name):
+        """Show or hide the update button on an app's card"""
+        if app_name not in self.update_widgets:
+            return
+        app, widget = self.update_widgets[app_name]
+        update = update_manager.get_update(app)
+        if update:
+            widget.set_update(update["version"], ready=update["prefetched"])
+        else:
+            widget.set_update(None)
+
+    def _handle_app_update(self, app, widget, app_name):
+        """Universal one-click patch upgrade handler"""
+        widget.run_update(app, app_name)
+        self._refresh_update(app.app_name)
+
     def _handle_app_uninstall(self, app, widget, original_description):
         """Universal app uninstall handler"""
         reply = QtWidgets.QMessageBox.question(
@@ -0,0 +1,99 @@
+import threading
+from PySide6 import QtWidgets, QtCore
+from cancellation import CancelToken, cancel_scope
+
+
+class InstallProgressDialog(QtWidgets.QDialog):
+    """Runs an install on a worker thread with Pause/Resume and Cancel buttons.
+
+    The install gets a CancelToken through cancel_scope; pausing stops
+    downloads (closing their connections) and extraction until resumed, and
+    cancelling rolls the install back. The dialog stays open until the
+    worker has actually stopped.
+    """
+
+    work_finished = QtCore.Signal()
+
+    def __init__(self, title: str, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(title)
+        self.setModal(True)
+        self.token = CancelToken()
+        self.error = None
+
+        layout = QtWidgets.QVBoxLayout()
+        self.status_label = QtWidgets.QLabel(f"{title}...")
+        self.progress_bar = QtWidgets.QProgressBar()
+        # No byte counts are reported, so show a busy indicator
+        self.progress_bar.setRange(0, 0)
+
+        buttons = QtWidgets.QHBoxLayout()
+        self.pause_button = QtWidgets.QPushButton("Pause")
+        self.pause_button.clicked.connect(self.toggle_pause)
+        self.cancel_button = QtWidgets.QPushButton("Cancel")
+        self.cancel_button.clicked.connect(self.cancel)
+        buttons.addWidget(self.pause_button)
+        buttons.addWidget(self.cancel_button)
+
+        layout.addWidget(self.status_label)
+        layout.addWidget(self.progress_bar)
+        layout.addLayout(buttons)
+        self.setLayout(layout)
+        self.setMinimumWidth(320)
+
+        self.work_finished.connect(self.accept)
+
+    def toggle_pause(self):
+        if self.token.paused:
+            self.token.resume()
+            self.pause_button.setText("Pause")
+            self.status_label.setText(self.windowTitle() + "...")
+            self.progress_bar.setRange(0, 0)
+        else:
+            self.token.pause()
+            self.pause_button.setText("Resume")
+            self.status_label.setText("Paused")
+            self.progress_bar.setRange(0, 1)
+
+    def cancel(self):
+        self.token.cancel()
+        self.pause_button.setEnabled(False)
+        self.cancel_button.setEnabled(False)
+        self.status_label.setText("Cancelling and cleaning up...")
+
+    def reject(self):
+        # Escape and the close button cancel; the dialog closes once the worker stops
+        self.cancel()
+
+    def _work(self, install):
+        try:
+            try:
+                # Shortcuts go through COM, which needs initialising per thread
+                import pythoncom
+
+                pythoncom.CoInitialize()
+            except ImportError:
+                pass
+            with cancel_scope(self.token):
+                install()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.work_finished.emit()
+
+    @staticmethod
+    def run(title: str, install, parent=None) -> bool:
+        """Run install() behind the dialog; returns False if it was cancelled.
+
+        Exceptions raised by install are re-raised on the calling thread.
+        """
+        dialog = InstallProgressDialog(title, parent)
+        worker = threading.Thread(
+            target=dialog._work, args=(install,), name="install", daemon=True
+        )
+        worker.start()
+        dialog.exec()
+        worker.join()
+        if dialog.error is not None and not dialog.token.interrupted:
+            raise dialog.error
+        return not dialog.token.interrupted
@@ -1,4 +1,6 @@
 from PySide6 import QtWidgets, QtCore
+from widgets.install_progress_dialog import InstallProgressDialog
+from update_manager import update_manager
 
 
 class InstallableWidget(QtWidgets.QWidget):
@@ -10,6 +12,7 @@ class InstallableWidget(QtWidgets.QWidget):
         on_install=None,
         on_uninstall=None,
         on_manage_versions=None,
+        on_update=None,
         parent=None,
         is_managed=True,
         show_success_message=True,
@@ -22,6 +25,7 @@ class InstallableWidget(QtWidgets.QWidget):
         self.on_install = on_install
         self.on_uninstall = on_uninstall
         self.on_manage_versions = on_manage_versions
+        self.on_update = on_update
         self.is_managed = is_managed
         self.show_success_message = show_success_message
 
@@ -35,10 +39,15 @@ class InstallableWidget(QtWidgets.QWidget):
             self.installed and self.on_manage_versions is not None
         )
 
+        self.update_button = QtWidgets.QPushButton()
+        self.update_button.clicked.connect(self.handle_update)
+        self.update_button.setVisible(False)
+
         layout.addWidget(self.title_label)
         layout.addWidget(self.description_label)
         layout.addWidget(self.install_button)
         layout.addWidget(self.manage_versions_button)
+        layout.addWidget(self.update_button)
         layout.setAlignment(QtCore.Qt.AlignmentFlag.AlignTop)
         self.setLayout(layout)
         self.setSizePolicy(
@@ -78,6 +87,57 @@ class InstallableWidget(QtWidgets.QWidget):
         if self.on_manage_versions:
             self.on_manage_versions()
 
+    def handle_update(self):
+        if self.on_update:
+            try:
+                self.on_update()
+            except Exception as e:
+                QtWidgets.QMessageBox.critical(
+                    self, "Update Error", f"Update failed: {str(e)}"
+                )
+
+    def run_update(self, app, app_name):
+        """Upgrade app's active version behind a progress dialog and show it on the card.
+
+        Raises if the update was cancelled or did not install. Returns the new version.
+        """
+        result = {}
+        if not InstallProgressDialog.run(
+            f"Updating {app_name}",
+            lambda: result.update(version=update_manager.upgrade(app)),
+            parent=self,
+        ):
+            raise Exception("Update cancelled by user")
+        new_version = result.get("version")
+        if not new_version:
+            raise Exception(f"Could not update {app_name}")
+
+        current_description = self.description_label.text()
+        if " (v" in current_description:
+            current_description = current_description.split(" (v")[0]
+        self.description_label.setText(f"{current_description} (v{new_version})")
+
+        QtWidgets.QMessageBox.information(
+            self, "Update Complete", f"{app_name} updated to {new_version}"
+        )
+        return new_version
+
+    def set_update(self, version=None, ready=False):
+        """Show an update button for version, or hide it when version is None"""
+        if not version or self.on_update is None:
+            self.update_button.setVisible(False)
+            return
+        text = f"Update to {version}"
+        if ready:
+            text += " (downloaded)"
+        self.update_button.setText(text)
+        self.update_button.setToolTip(
+            "The update is downloaded and installs without going online"
+            if ready
+            else "A newer release of the installed version is available"
+        )
+        self.update_button.setVisible(True)
+
     def update_button_text(self):
         if not self.is_managed:
             self.install_button.setText("Launch Installer")
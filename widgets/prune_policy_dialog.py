@@ -0,0 +1,74 @@
+from PySide6 import QtWidgets
+from typing import Any, Dict, Optional
+from disk_usage_manager import disk_usage_manager
+
+MB = 1024 * 1024
+
+
+class PrunePolicyDialog(QtWidgets.QDialog):
+    """Edits the pruning policy of one app. A value of 0 turns a rule off."""
+
+    def __init__(self, app_key: str, app_name: str, parent=None):
+        super().__init__(parent)
+        self.app_key = app_key
+        self.setWindowTitle(f"{app_name} Pruning Policy")
+        self.setModal(True)
+
+        policy = disk_usage_manager.get_policy(app_key)
+
+        self.keep_latest = QtWidgets.QSpinBox()
+        self.keep_latest.setRange(0, 100)
+        self.keep_latest.setSpecialValueText("Off")
+        self.keep_latest.setValue(policy.get("keep_latest_per_major") or 0)
+
+        self.max_unused_days = QtWidgets.QSpinBox()
+        self.max_unused_days.setRange(0, 3650)
+        self.max_unused_days.setSpecialValueText("Off")
+        self.max_unused_days.setSuffix(" days")
+        self.max_unused_days.setValue(policy.get("max_unused_days") or 0)
+
+        self.max_total_mb = QtWidgets.QSpinBox()
+        self.max_total_mb.setRange(0, 1024 * 1024)
+        self.max_total_mb.setSpecialValueText("Off")
+        self.max_total_mb.setSuffix(" MB")
+        self.max_total_mb.setValue((policy.get("max_total_bytes") or 0) // MB)
+
+        form = QtWidgets.QFormLayout()
+        form.addRow("Keep latest versions per major:", self.keep_latest)
+        form.addRow("Remove versions unused for:", self.max_unused_days)
+        form.addRow("Cap total size at:", self.max_total_mb)
+
+        buttons = QtWidgets.QDialogButtonBox(
+            QtWidgets.QDialogButtonBox.StandardButton.Save
+            | QtWidgets.QDialogButtonBox.StandardButton.Cancel
+        )
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+
+        layout = QtWidgets.QVBoxLayout()
+        layout.addLayout(form)
+        layout.addWidget(buttons)
+        self.setLayout(layout)
+
+    def get_policy(self) -> Dict[str, Any]:
+        """The policy as entered, without the rules that are off"""
+        policy = {}
+        if self.keep_latest.value():
+            policy["keep_latest_per_major"] = self.keep_latest.value()
+        if self.max_unused_days.value():
+            policy["max_unused_days"] = self.max_unused_days.value()
+        if self.max_total_mb.value():
+            policy["max_total_bytes"] = self.max_total_mb.value() * MB
+        return policy
+
+    @staticmethod
+    def edit_policy(
+        app_key: str, app_name: str, parent=None
+    ) -> Optional[Dict[str, Any]]:
+        """Show the dialog and save the policy; returns it, or None if cancelled"""
+        dialog = PrunePolicyDialog(app_key, app_name, parent)
+        if dialog.exec() != QtWidgets.QDialog.DialogCode.Accepted:
+            return None
+        policy = dialog.get_policy()
+        disk_usage_manager.set_policy(app_key, policy)
+        return policy
@@ -1,6 +1,11 @@
 from PySide6 import QtWidgets, QtCore
 from typing import Dict, Any, Callable, Optional
 from widgets.version_selector_dialog import VersionSelectorDialog
+from widgets.install_progress_dialog import InstallProgressDialog
+from widgets.prune_policy_dialog import PrunePolicyDialog
+from disk_usage_manager import disk_usage_manager, format_size
+from state_manager import state_manager
+from versions import CatalogEntry
 
 
 class VersionManagerWidget(QtWidgets.QDialog):
@@ -66,10 +71,16 @@ class VersionManagerWidget(QtWidgets.QDialog):
         self.reshim_button = QtWidgets.QPushButton("Reshim")
         self.reshim_button.clicked.connect(self.reshim_active_version)
         self.reshim_button.setEnabled(True)
+        self.prune_button = QtWidgets.QPushButton("Prune")
+        self.prune_button.clicked.connect(self.prune_versions)
+        self.prune_policy_button = QtWidgets.QPushButton("Pruning Policy...")
+        self.prune_policy_button.clicked.connect(self.edit_prune_policy)
 
         version_buttons_layout.addWidget(self.switch_button)
         version_buttons_layout.addWidget(self.uninstall_version_button)
         version_buttons_layout.addWidget(self.reshim_button)
+        version_buttons_layout.addWidget(self.prune_button)
+        version_buttons_layout.addWidget(self.prune_policy_button)
 
         versions_layout.addLayout(version_buttons_layout)
         self.versions_group.setLayout(versions_layout)
@@ -143,7 +154,7 @@ class VersionManagerWidget(QtWidgets.QDialog):
 
         display_name_map = {}
         for v in available_versions:
-            if isinstance(v, dict):
+            if isinstance(v, (dict, CatalogEntry)):
                 display_name_map[v.get("real_name", str(v))] = v.get(
                     "display_name", v.get("real_name", str(v))
                 )
@@ -162,6 +173,8 @@ class VersionManagerWidget(QtWidgets.QDialog):
             )
         self.versions_list.clear()
         if installed_versions:
+            sizes = disk_usage_manager.get_app_sizes(self.app_instance.app_name)
+            cold = state_manager.get_app_cold_versions(self.app_instance.app_name)
             for version in installed_versions:
                 display_name = display_name_map.get(version, version)
                 item = QtWidgets.QListWidgetItem(display_name)
@@ -169,8 +182,15 @@ class VersionManagerWidget(QtWidgets.QDialog):
                 if version == active_version:
                     item.setText(f"{display_name} (Active)")
                     item.setBackground(QtCore.Qt.GlobalColor.darkGray)
+                if version in cold:
+                    item.setText(f"{item.text()} (Cold)")
+                if version in sizes:
+                    item.setText(f"{item.text()} - {format_size(sizes[version])}")
                 self.versions_list.addItem(item)
-            self.status_label.setText(f"{len(installed_versions)} version(s) installed")
+            self.status_label.setText(
+                f"{len(installed_versions)} version(s) installed, "
+                f"{format_size(sum(sizes.values()))} on disk"
+            )
         else:
             self.status_label.setText("No versions installed")
         self.update_button_states()
@@ -182,6 +202,7 @@ class VersionManagerWidget(QtWidgets.QDialog):
         has_selection = selected_item is not None
 
         self.uninstall_all_button.setEnabled(has_versions)
+        self.prune_button.setEnabled(has_versions)
         self.switch_button.setEnabled(has_selection)
         self.uninstall_version_button.setEnabled(has_selection)
 
@@ -221,11 +242,20 @@ class VersionManagerWidget(QtWidgets.QDialog):
                 return
 
             selected_version = VersionSelectorDialog.select_version(
-                self.app_name, available_versions, parent=self
+                self.app_name,
+                available_versions,
+                parent=self,
+                app_key=self.app_instance.app_name,
             )
 
             if selected_version:
-                self.app_instance.install(selected_version)
+                if not InstallProgressDialog.run(
+                    f"Installing {self.app_name} {selected_version}",
+                    lambda: self.app_instance.install(selected_version),
+                    parent=self,
+                ):
+                    self.refresh_ui()
+                    return
                 self.refresh_ui()  # Refresh after installation
                 QtWidgets.QMessageBox.information(
                     self,
@@ -321,6 +351,44 @@ class VersionManagerWidget(QtWidgets.QDialog):
                     f"Failed to uninstall all versions: {str(e)}",
                 )
 
+    def edit_prune_policy(self):
+        """Let the user set the pruning policy of this app"""
+        return PrunePolicyDialog.edit_policy(
+            self.app_instance.app_name, self.app_name, parent=self
+        )
+
+    def prune_versions(self):
+        """Show a dry-run of the pruning policy and apply it if confirmed"""
+        policy = disk_usage_manager.get_policy(self.app_instance.app_name)
+        if not policy:
+            # Nothing configured yet; ask for a policy first
+            policy = self.edit_prune_policy()
+            if not policy:
+                return
+
+        plan = disk_usage_manager.prune(self.app_instance, policy)
+        report = disk_usage_manager.format_prune_report(self.app_name, plan)
+        if not plan:
+            QtWidgets.QMessageBox.information(self, "Prune", report)
+            return
+
+        reply = QtWidgets.QMessageBox.question(
+            self,
+            "Confirm Prune",
+            f"{report}\n\nRemove these versions?",
+            QtWidgets.QMessageBox.StandardButton.Yes
+            | QtWidgets.QMessageBox.StandardButton.No,
+        )
+
+        if reply == QtWidgets.QMessageBox.StandardButton.Yes:
+            try:
+                disk_usage_manager.prune(self.app_instance, plan=plan, dry_run=False)
+                self.refresh_ui()
+            except Exception as e:
+                QtWidgets.QMessageBox.critical(
+                    self, "Prune Error", f"Failed to prune {self.app_name}: {str(e)}"
+                )
+
     def reshim_active_version(self):
         """Re-create shims and shortcuts for the currently active version"""
         try:
@@ -1,20 +1,269 @@
+import re
 from PySide6 import QtWidgets, QtCore
 from typing import List, Optional
+from versions import CatalogEntry, parse_version, version_name
+
+
+def _display_name(version_obj) -> str:
+    if isinstance(version_obj, (dict, CatalogEntry)):
+        return version_obj.get(
+            "display_name", version_obj.get("real_name", str(version_obj))
+        )
+    return str(version_obj)
+
+
+class VersionListModel(QtCore.QAbstractListModel):
+    """Flat list model over catalog entries with precomputed filter keys.
+
+    Each row's search text, major line and LTS/stable flags are computed once
+    when the catalog is loaded, so filtering never touches the raw entries.
+    With grouping enabled, non-selectable header rows are inserted per major.
+    """
+
+    VersionRole = QtCore.Qt.ItemDataRole.UserRole
+    HeaderRole = QtCore.Qt.ItemDataRole.UserRole + 1
+
+    def __init__(self, available_versions: List, parent=None):
+        super().__init__(parent)
+        self._grouped = False
+        self._entries = []
+        self._rows = []
+        self.set_versions(available_versions)
+
+    def set_versions(self, available_versions: List):
+        """Replace the catalog and precompute the filter keys"""
+        entries = []
+        for version_obj in available_versions:
+            real_name = version_name(version_obj)
+            display_name = _display_name(version_obj)
+            parsed = parse_version(real_name)
+            numbers = list(parsed.release[:2])
+            is_dict = isinstance(version_obj, (dict, CatalogEntry))
+            lts = bool(version_obj.get("lts")) if is_dict else False
+            if is_dict and "stable" in version_obj:
+                stable = bool(version_obj["stable"])
+            else:
+                stable = not parsed.is_prerelease
+            entries.append(
+                {
+                    "version": version_obj,
+                    "display_name": display_name,
+                    "search_key": f"{display_name} {real_name}".lower(),
+                    "numbers": numbers,
+                    "lts": lts,
+                    "stable": stable,
+                }
+            )
+
+        # Group by major, or by major.minor when every entry shares the major (Go)
+        majors = {tuple(entry["numbers"][:1]) for entry in entries}
+        depth = 2 if len(majors) == 1 else 1
+        for entry in entries:
+            entry["group"] = ".".join(str(n) for n in entry["numbers"][:depth]) or "?"
+
+        self.beginResetModel()
+        self._entries = entries
+        self._rebuild_rows()
+        self.endResetModel()
+
+    def set_grouped(self, grouped: bool):
+        """Show or hide per-major header rows"""
+        if grouped == self._grouped:
+            return
+        self.beginResetModel()
+        self._grouped = grouped
+        self._rebuild_rows()
+        self.endResetModel()
+
+    def _rebuild_rows(self):
+        if not self._grouped:
+            self._rows = [(False, index) for index in range(len(self._entries))]
+            return
+
+        # Headers keep the upstream order of first appearance of each group
+        groups = {}
+        for index, entry in enumerate(self._entries):
+            groups.setdefault(entry["group"], []).append(index)
+        self._rows = []
+        for group, indexes in groups.items():
+            self._rows.append((True, group))
+            self._rows.extend((False, index) for index in indexes)
+
+    def groups(self) -> List[str]:
+        """All group labels, in upstream order"""
+        return list(dict.fromkeys(entry["group"] for entry in self._entries))
+
+    def entry_count(self) -> int:
+        return len(self._entries)
+
+    def entries(self) -> List[dict]:
+        return self._entries
+
+    def rows(self):
+        """(is_header, entry index or group label) for every model row"""
+        return self._rows
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._rows)
+
+    def data(self, index, role=QtCore.Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        is_header, value = self._rows[index.row()]
+        if is_header:
+            if role == QtCore.Qt.ItemDataRole.DisplayRole:
+                return f"{value}.x"
+            if role == self.HeaderRole:
+                return True
+            return None
+
+        entry = self._entries[value]
+        if role == QtCore.Qt.ItemDataRole.DisplayRole:
+            return entry["display_name"]
+        if role == self.VersionRole:
+            return entry["version"]
+        if role == self.HeaderRole:
+            return False
+        return None
+
+    def flags(self, index):
+        if index.isValid() and self._rows[index.row()][0]:
+            return QtCore.Qt.ItemFlag.NoItemFlags
+        return super().flags(index)
+
+
+class VersionFilterProxyModel(QtCore.QSortFilterProxyModel):
+    """Filters a VersionListModel with fuzzy search and LTS/stable/major filters.
+
+    Matching is done in one pass over the precomputed keys and stored as a set
+    of accepted entries, so filterAcceptsRow is a set lookup. When the query
+    only grows (type-ahead), just the previously accepted entries are rechecked.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._query = ""
+        self._lts_only = False
+        self._stable_only = False
+        self._group = None
+        self._accepted = None
+        self._row_mask = []
+
+    def setSourceModel(self, model):
+        super().setSourceModel(model)
+        model.modelReset.connect(lambda: self._recompute(incremental=False))
+        self._recompute(incremental=False)
+
+    def set_query(self, query: str):
+        query = query.strip().lower()
+        if query == self._query:
+            return
+        incremental = bool(self._query) and query.startswith(self._query)
+        self._query = query
+        self._recompute(incremental=incremental)
+
+    def set_lts_only(self, enabled: bool):
+        if enabled == self._lts_only:
+            return
+        self._lts_only = enabled
+        self._recompute(incremental=enabled)
+
+    def set_stable_only(self, enabled: bool):
+        if enabled == self._stable_only:
+            return
+        self._stable_only = enabled
+        self._recompute(incremental=enabled)
+
+    def set_group(self, group: Optional[str]):
+        if group == self._group:
+            return
+        # Narrowing from "all" to one group only needs the current matches
+        incremental = self._group is None and group is not None
+        self._group = group
+        self._recompute(incremental=incremental)
+
+    def accepted_count(self) -> int:
+        return len(self._accepted) if self._accepted is not None else 0
+
+    def _recompute(self, incremental: bool):
+        model = self.sourceModel()
+        if model is None:
+            return
+
+        entries = model.entries()
+        if incremental and self._accepted is not None:
+            candidates = sorted(self._accepted)
+        else:
+            candidates = range(len(entries))
+
+        pattern = None
+        if self._query:
+            # Fuzzy: the query's characters must appear in order
+            pattern = re.compile(".*?".join(re.escape(c) for c in self._query))
+
+        accepted = set()
+        for index in candidates:
+            entry = entries[index]
+            if self._lts_only and not entry["lts"]:
+                continue
+            if self._stable_only and not entry["stable"]:
+                continue
+            if self._group is not None and entry["group"] != self._group:
+                continue
+            if pattern is not None and not pattern.search(entry["search_key"]):
+                continue
+            accepted.add(index)
+
+        self._accepted = accepted
+        accepted_groups = {entries[index]["group"] for index in accepted}
+        self._row_mask = [
+            value in accepted_groups if is_header else value in accepted
+            for is_header, value in model.rows()
+        ]
+        self.invalidateRowsFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        # Called once per row by Qt, so keep it to a single list lookup
+        mask = self._row_mask
+        return source_row < len(mask) and mask[source_row]
 
 
 class VersionSelectorDialog(QtWidgets.QDialog):
-    def __init__(self, app_name: str, available_versions: List, parent=None):
+    def __init__(
+        self, app_name: str, available_versions: List, parent=None, app_key=None
+    ):
         super().__init__(parent)
         self.app_name = app_name
-        self.available_versions = available_versions
+        self.available_versions = self._order_by_usage(available_versions, app_key)
         self.selected_version = None
         self._setup_ui()
 
+    @staticmethod
+    def _order_by_usage(available_versions: List, app_key: Optional[str]) -> List:
+        """Move the most used versions to the top, otherwise keeping upstream order"""
+        if not app_key:
+            return available_versions
+
+        from usage_manager import usage_manager
+
+        most_used = usage_manager.get_most_used(app_key)
+        if not most_used:
+            return available_versions
+
+        rank = {version: index for index, version in enumerate(most_used)}
+
+        return sorted(
+            available_versions,
+            key=lambda version_obj: rank.get(version_name(version_obj), len(rank)),
+        )
+
     def _setup_ui(self):
         """Setup the dialog UI"""
         self.setWindowTitle(f"Select {self.app_name} Version")
         self.setModal(True)
-        self.setFixedSize(400, 300)
+        self.setFixedSize(460, 420)
 
         layout = QtWidgets.QVBoxLayout()
 
@@ -26,24 +275,44 @@ class VersionSelectorDialog(QtWidgets.QDialog):
         )
         layout.addWidget(header_label)
 
-        self.version_list = QtWidgets.QListWidget()
-        self.version_list.setSelectionMode(
-            QtWidgets.QAbstractItemView.SelectionMode.SingleSelection
+        self.search_edit = QtWidgets.QLineEdit()
+        self.search_edit.setPlaceholderText("Search versions...")
+        self.search_edit.setClearButtonEnabled(True)
+        layout.addWidget(self.search_edit)
+
+        self.version_model = VersionListModel(self.available_versions, self)
+        self.proxy_model = VersionFilterProxyModel(self)
+        self.proxy_model.setSourceModel(self.version_model)
+
+        filters_layout = QtWidgets.QHBoxLayout()
+
+        self.lts_checkbox = QtWidgets.QCheckBox("LTS")
+        self.lts_checkbox.setVisible(
+            any(entry["lts"] for entry in self.version_model.entries())
         )
+        self.stable_checkbox = QtWidgets.QCheckBox("Stable")
+        self.group_checkbox = QtWidgets.QCheckBox("Group")
 
-        for version_obj in self.available_versions:
-            if isinstance(version_obj, dict):
-                display_name = version_obj.get(
-                    "display_name", version_obj.get("real_name", str(version_obj))
-                )
-            else:
-                display_name = str(version_obj)
-            item = QtWidgets.QListWidgetItem(display_name)
-            item.setData(QtCore.Qt.ItemDataRole.UserRole, version_obj)
-            self.version_list.addItem(item)
+        self.major_combo = QtWidgets.QComboBox()
+        self.major_combo.addItem("All versions", None)
+        for group in self.version_model.groups():
+            self.major_combo.addItem(f"{group}.x", group)
 
-        if self.available_versions:
-            self.version_list.setCurrentRow(0)
+        filters_layout.addWidget(self.lts_checkbox)
+        filters_layout.addWidget(self.stable_checkbox)
+        filters_layout.addWidget(self.group_checkbox)
+        filters_layout.addStretch()
+        filters_layout.addWidget(self.major_combo)
+        layout.addLayout(filters_layout)
+
+        self.version_list = QtWidgets.QListView()
+        self.version_list.setSelectionMode(
+            QtWidgets.QAbstractItemView.SelectionMode.SingleSelection
+        )
+        # Uniform heights and batched layout keep 10k+ rows cheap to show
+        self.version_list.setUniformItemSizes(True)
+        self.version_list.setLayoutMode(QtWidgets.QListView.LayoutMode.Batched)
+        self.version_list.setModel(self.proxy_model)
 
         layout.addWidget(self.version_list)
 
@@ -74,25 +343,64 @@ class VersionSelectorDialog(QtWidgets.QDialog):
         layout.addLayout(button_layout)
         self.setLayout(layout)
 
-        self.version_list.currentItemChanged.connect(self._on_version_changed)
-        self.version_list.itemDoubleClicked.connect(self.accept)
+        self.search_edit.textChanged.connect(self._on_filter_changed)
+        self.search_edit.returnPressed.connect(self.accept)
+        self.lts_checkbox.toggled.connect(self._on_filter_changed)
+        self.stable_checkbox.toggled.connect(self._on_filter_changed)
+        self.major_combo.currentIndexChanged.connect(self._on_filter_changed)
+        self.group_checkbox.toggled.connect(self._on_group_toggled)
+        self.version_list.selectionModel().currentChanged.connect(
+            self._on_version_changed
+        )
+        self.version_list.doubleClicked.connect(self.accept)
+        self.search_edit.installEventFilter(self)
+
+        self._select_first_row()
+
+    def eventFilter(self, watched, event):
+        """Let Up/Down in the search box move through the list"""
+        if watched is self.search_edit and event.type() == QtCore.QEvent.Type.KeyPress:
+            if event.key() in (QtCore.Qt.Key.Key_Up, QtCore.Qt.Key.Key_Down):
+                self._move_selection(-1 if event.key() == QtCore.Qt.Key.Key_Up else 1)
+                return True
+        return super().eventFilter(watched, event)
 
+    def _move_selection(self, step: int):
+        row = self.version_list.currentIndex().row()
+        row_count = self.proxy_model.rowCount()
+        row += step
+        while 0 <= row < row_count:
+            index = self.proxy_model.index(row, 0)
+            if index.flags() & QtCore.Qt.ItemFlag.ItemIsSelectable:
+                self.version_list.setCurrentIndex(index)
+                return
+            row += step
+
+    def _select_first_row(self):
+        self.version_list.setCurrentIndex(QtCore.QModelIndex())
+        self._move_selection(1)
         self._on_version_changed()
 
-    def _on_version_changed(self):
+    def _on_filter_changed(self):
+        self.proxy_model.set_query(self.search_edit.text())
+        self.proxy_model.set_lts_only(self.lts_checkbox.isChecked())
+        self.proxy_model.set_stable_only(self.stable_checkbox.isChecked())
+        self.proxy_model.set_group(self.major_combo.currentData())
+        self._select_first_row()
+
+    def _on_group_toggled(self, grouped: bool):
+        self.version_model.set_grouped(grouped)
+        self._select_first_row()
+
+    def _on_version_changed(self, *args):
         """Handle version selection change"""
-        current_item = self.version_list.currentItem()
-        if current_item:
-            version_obj = current_item.data(QtCore.Qt.ItemDataRole.UserRole)
-            if isinstance(version_obj, dict):
-                display_name = version_obj.get(
-                    "display_name", version_obj.get("real_name", str(version_obj))
-                )
-                real_name = version_obj.get("real_name", display_name)
-            else:
-                display_name = str(version_obj)
-                real_name = display_name
-            self.selected_version = real_name
+        current_index = self.version_list.currentIndex()
+        version_obj = None
+        if current_index.isValid():
+            version_obj = current_index.data(VersionListModel.VersionRole)
+        if version_obj is not None:
+            display_name = _display_name(version_obj)
+            self.selected_version = version_name(version_obj)
             self.info_label.setText(f"Version {display_name} will be installed")
             self.info_label.setStyleSheet("color: #ffffff;")
             self.install_button.setEnabled(True)
@@ -102,13 +410,18 @@ class VersionSelectorDialog(QtWidgets.QDialog):
             self.info_label.setStyleSheet("color: #cccccc; font-style: italic;")
             self.install_button.setEnabled(False)
 
+    def accept(self):
+        if self.selected_version is None:
+            return
+        super().accept()
+
     def get_selected_version(self) -> Optional[str]:
         """Get the selected version"""
         return self.selected_version
 
     @staticmethod
     def select_version(
-        app_name: str, available_versions: List[str], parent=None
+        app_name: str, available_versions: List[str], parent=None, app_key=None
     ) -> Optional[str]:
         """Static method to show dialog and return selected version"""
         if not available_versions:
@@ -119,7 +432,9 @@ class VersionSelectorDialog(QtWidgets.QDialog):
             )
             return None
 
-        dialog = VersionSelectorDialog(app_name, available_versions, parent)
+        dialog = VersionSelectorDialog(
+            app_name, available_versions, parent, app_key=app_key
+        )
         if dialog.exec() == QtWidgets.QDialog.DialogCode.Accepted:
             return dialog.get_selected_version()
         return None